@@ -0,0 +1,309 @@
+'''benchmarks for the read path, attribute queries and event dispatch
+
+Runs against the simulated driver unless DAQMX_BACKEND selects another backend. The
+simulator's sample clock is switched off for the read and attribute benchmarks, so
+that their numbers measure the python side only; the callback benchmark keeps it on,
+since without a clock there is no event rate to measure:
+
+    python bench.py
+    python bench.py --json results.json
+    python bench.py --compare results.json
+
+Every benchmark reports samples per second, per call latency percentiles and, on
+python 3, the memory allocated per call: the peak tracemalloc sees, net of what the
+driver itself allocates for reads (the simulator builds every block it returns), plus
+the buffers made with ffi.new, which tracemalloc does not see. That way the copies
+the python side makes show. Benchmarks that cannot run are reported as
+skipped. --compare fails when a benchmark got more than --tolerance slower than in a
+saved run, and lists those of the saved run that are missing.
+'''
+from __future__ import print_function
+
+import argparse
+import gc
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault('DAQMX_BACKEND', 'sim')
+
+import numpy
+
+import daqmx
+import daqmx.lowlevel as d
+from daqmx.clib import lib, ffi
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+BUFFER_SIZES = [1024, 16384, 65536]
+CHANNEL_COUNTS = [1, 2, 8]
+FILL_MODES = [('scan', daqmx.FillMode.GroupByScanNumber), ('channel', daqmx.FillMode.GroupByChannel)]
+
+class CountingFFI(object):
+    '''stands in for the ffi of daqmx.lowlevel and counts the bytes ffi.new allocates'''
+
+    def __init__(self, ffi):
+        self._ffi = ffi
+        self.allocated = 0
+
+    def new(self, cdecl, *init):
+        p = self._ffi.new(cdecl, *init)
+        self.allocated += self._ffi.sizeof(p)
+        return p
+
+    def __getattr__(self, name):
+        return getattr(self._ffi, name)
+
+counting_ffi = CountingFFI(ffi)
+
+def peak_alloc(fn, n_calls):
+    '''peak memory allocated while calling fn() n_calls times, None without tracemalloc'''
+    if tracemalloc is None:
+        return None
+
+    fn()
+    tracemalloc.start()
+    try:
+        for i in range(n_calls):
+            fn()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def measure(name, fn, n_calls, samples_per_call=0, driver_alloc=None):
+    '''call fn() n_calls times and summarize its latency, throughput and allocations
+
+    `driver_alloc` is the peak allocation of the bare driver call, which is taken off 
+    the peak of fn().
+    '''
+    fn() # warm up
+
+    counting_ffi.allocated = 0
+    latencies = numpy.empty(n_calls)
+    gc.disable()
+    if tracemalloc is not None: tracemalloc.start()
+    try:
+        clock = time.time if sys.version_info[0] < 3 else time.perf_counter
+        start = clock()
+        for i in range(n_calls):
+            t = clock()
+            fn()
+            latencies[i] = clock() - t
+        total = clock() - start
+
+        if tracemalloc is not None:
+            peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        if tracemalloc is not None: tracemalloc.stop()
+        gc.enable()
+
+    p50, p90, p99 = numpy.percentile(latencies, [50, 90, 99])*1e6
+    return {
+        'name': name,
+        'calls': n_calls,
+        'samples_per_s': samples_per_call*n_calls/total,
+        'calls_per_s': n_calls/total,
+        'p50_us': p50,
+        'p90_us': p90,
+        'p99_us': p99,
+        'max_us': latencies.max()*1e6,
+        'peak_alloc_bytes': None if tracemalloc is None else \
+                max(peak - (driver_alloc or 0), 0) + counting_ffi.allocated//n_calls,
+        'driver_alloc_bytes': driver_alloc,
+    }
+
+def skipped(name, reason):
+    return {'name': name, 'skipped': reason}
+
+def make_task(name, n_channels, rate=1e6):
+    h = d.make_task(name)
+    d.add_input_voltage_channel(h, 'Dev1/ai0:{}'.format(n_channels - 1), -1., 1.)
+    d.set_timing_sample_clock(h, rate, 1000, sample_mode=daqmx.SampleMode.Continuous)
+    d.set_input_buffer_size(h, max(BUFFER_SIZES))
+    d.start_task(h)
+    return h
+
+def bench_reads(n_calls):
+    d.ffi = counting_ffi
+    try:
+        return _bench_reads(n_calls)
+    finally:
+        d.ffi = ffi
+
+def _bench_reads(n_calls):
+    results = []
+    for n_channels in CHANNEL_COUNTS:
+        h = make_task('bench_read_{}'.format(n_channels), n_channels)
+        handle = d.resolve(h)
+
+        for buf_size in BUFFER_SIZES:
+            n = buf_size//n_channels
+            out = numpy.empty(buf_size)
+
+            out_p = ffi.cast('float64 *', ffi.from_buffer(out))
+            count_p = ffi.new('int32 *')
+
+            for mode_name, mode in FILL_MODES:
+                driver = peak_alloc(lambda: lib.DAQmxReadAnalogF64(h, n, 1., mode, out_p, buf_size, 
+                        count_p, ffi.NULL), min(n_calls, 20))
+
+                suffix = '[{}ch, {}, {}]'.format(n_channels, buf_size, mode_name)
+                results.append(measure('read_f64' + suffix,
+                    lambda: d.read_f64(h, buf_size, n, 1., mode), n_calls, n, driver))
+                results.append(measure('read_f64_into' + suffix,
+                    lambda: d.read_f64_into(h, out, n, 1., mode, n_channels), n_calls, n, driver))
+                results.append(measure('Handle.read_f64_into' + suffix,
+                    lambda: handle.read_f64_into(out, n, 1., mode), n_calls, n, driver))
+
+        d.stop_task(h)
+        d.clear_task(h)
+    return results
+
+def bench_task_read(n_calls):
+    '''Task._read_analog_f64 of the object interface'''
+    from daqmx.daqmx import Task
+
+    results = []
+    for n_channels in CHANNEL_COUNTS:
+        task = Task('bench_task_{}'.format(n_channels))
+        h = task._phandle[0]
+        d.add_input_voltage_channel(h, 'Dev1/ai0:{}'.format(n_channels - 1), -1., 1.)
+        d.set_timing_sample_clock(h, 1e6, 1000, sample_mode=daqmx.SampleMode.Continuous)
+        d.set_input_buffer_size(h, max(BUFFER_SIZES))
+        d.start_task(h)
+
+        for buf_size in BUFFER_SIZES:
+            n = buf_size//n_channels
+            results.append(measure('Task._read_analog_f64[{}ch, {}]'.format(n_channels, buf_size),
+                lambda: task._read_analog_f64(buf_size, n, 1.), n_calls, n))
+
+        d.stop_task(h)
+    return results
+
+def bench_attributes(n_calls):
+    h = d.make_task('bench_attributes')
+    d.add_input_voltage_channel(h, 'Dev1/ai0:7', -1., 1.)
+    device = daqmx.defs.DeviceAttributes('Dev1')
+
+    results = [
+        measure('SystemAttributes.get(devices)',
+            lambda: daqmx.SystemAttributes.get('devices'), n_calls),
+        measure('SystemAttributes.get(devices, uncached)',
+            lambda: daqmx.SystemAttributes.get('devices', cached=False), n_calls),
+        measure('TaskAttributes.get(channels)',
+            lambda: daqmx.TaskAttributes.get(h, 'channels'), n_calls),
+        measure('TaskAttributes.get(channels, uncached)',
+            lambda: daqmx.TaskAttributes.get(h, 'channels', cached=False), n_calls),
+        measure('TaskAttributes.get(is_done)',
+            lambda: daqmx.TaskAttributes.get(h, 'is_done'), n_calls),
+        measure('DeviceAttributes.ai_channels', lambda: device.ai_channels, n_calls),
+    ]
+
+    d.clear_task(h)
+    return results
+
+def bench_callbacks(duration):
+    '''rate at which every N samples events reach python through ffi.callback'''
+    h = d.make_task('bench_callbacks')
+    d.add_input_voltage_channel(h, 'Dev1/ai0', -1., 1.)
+    d.set_timing_sample_clock(h, 1e6, 1000, sample_mode=daqmx.SampleMode.Continuous)
+
+    stamps = []
+    def callback(handle, event_type, n_samples, data):
+        stamps.append(time.time())
+        return 0
+
+    d.register_nsamples_callback(h, 1000, callback)
+    d.start_task(h)
+    time.sleep(duration)
+    d.stop_task(h)
+    d.clear_task(h)
+
+    intervals = numpy.diff(stamps) if len(stamps) > 1 else numpy.zeros(1)
+    p50, p90, p99 = numpy.percentile(intervals, [50, 90, 99])*1e6
+    return [{
+        'name': 'every N samples callback dispatch',
+        'calls': len(stamps),
+        'samples_per_s': 1000*len(stamps)/duration,
+        'calls_per_s': len(stamps)/duration,
+        'p50_us': p50,
+        'p90_us': p90,
+        'p99_us': p99,
+        'max_us': intervals.max()*1e6,
+        'peak_alloc_bytes': None,
+        'driver_alloc_bytes': None,
+    }]
+
+def report(results):
+    print('{:<48} {:>14} {:>10} {:>10} {:>10} {:>9}'.format(
+        'benchmark', 'samples|calls/s', 'p50 us', 'p90 us', 'p99 us', 'peak B'))
+    for r in results:
+        if 'skipped' in r:
+            print('{:<48} skipped: {}'.format(r['name'], r['skipped']))
+            continue
+        allocs = '-' if r['peak_alloc_bytes'] is None else '{:d}'.format(r['peak_alloc_bytes'])
+        rate = r['samples_per_s'] or r['calls_per_s']
+        print('{:<48} {:>14.4g} {:>10.1f} {:>10.1f} {:>10.1f} {:>9}'.format(
+            r['name'], rate, r['p50_us'], r['p90_us'], r['p99_us'], allocs))
+
+def compare(results, baseline, tolerance):
+    '''return the names of benchmarks whose median latency regressed past tolerance, and
+    the (name, reason) of those measured in the baseline but not now'''
+    previous = dict((r['name'], r) for r in baseline if 'skipped' not in r)
+    measured = set(r['name'] for r in results if 'skipped' not in r)
+    reasons = dict((r['name'], r['skipped']) for r in results if 'skipped' in r)
+
+    regressed = []
+    for r in results:
+        old = previous.get(r['name'])
+        if old is not None and 'skipped' not in r and r['p50_us'] > old['p50_us']*(1. + tolerance):
+            regressed.append(r['name'])
+
+    missing = []
+    for name in sorted(set(previous) - measured):
+        # skipped rows stand for a whole group, e.g. Task._read_analog_f64[1ch, 1024]
+        group = name.split('[')[0]
+        missing.append((name, reasons.get(name, reasons.get(group, 'not run'))))
+    return regressed, missing
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('-n', '--calls', type=int, default=200, help='calls per benchmark')
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--compare', help='compare against results saved with --json')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+            help='allowed median latency increase when comparing, as a fraction')
+    args = parser.parse_args()
+
+    simulated = hasattr(lib, 'realtime')
+    if simulated:
+        lib.realtime = False
+
+    results = bench_reads(args.calls) + bench_task_read(args.calls) + bench_attributes(args.calls*10)
+
+    # events are paced by the sample clock, with the simulator's off they would fire back to back
+    if simulated:
+        lib.realtime = True
+    results += bench_callbacks(0.5)
+    report(results)
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=1)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressed, missing = compare(results, json.load(f), args.tolerance)
+        for name in regressed:
+            print('REGRESSION: {}'.format(name))
+        for name, reason in missing:
+            print('MISSING: {} ({})'.format(name, reason))
+        return 1 if regressed else 0
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
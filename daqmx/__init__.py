@@ -1,5 +1,19 @@
 from .lowlevel import *
 from .defs import *
+from .buffers import *
+from .ring import *
+from .streaming import *
+from .scaling import *
+from .record import *
+from .data import *
+from .replay import *
+from .group import *
+from .filters import *
+from .channels import *
+from .template import *
+from .errors import *
+from .control import *
+from .generation import *
 import logging
 
 log = logging.getLogger('daqmx')
@@ -0,0 +1,69 @@
+'''ahead of time build of the cffi modules used by daqmx.clib
+
+    python daqmx/_build.py [nidaqmx|sim|all]
+
+builds, next to this file,
+
+    _nidaqmx    the compiled binding to NIDAQmx (out of line API mode), which needs the
+                NI-DAQmx C headers and library
+    _types      a pure python module with the parsed declarations only (out of line ABI
+                mode), which is all the simulated backend needs
+
+Both only have to be rebuilt when `daqmx.cdefs` changes. `pip install .` builds them
+too, through the cffi_modules of setup.py. Without them daqmx.clib falls back to
+parsing the header, and compiling it with `ffi.verify`, on every import.
+'''
+import os
+import re
+import sys
+
+from cffi import FFI
+
+here = os.path.dirname(os.path.abspath(__file__))
+
+# load the header without importing the package, which would import daqmx.clib
+sys.path.insert(0, here)
+from cdefs import header_str
+del sys.path[0]
+
+if sys.platform == 'win32':
+    _ni_dir = r'C:\Program Files\National Instruments\NI-DAQ\DAQmx ANSI C Dev'
+    build_args = dict(include_dirs=[os.path.join(_ni_dir, 'include')], libraries=['NIDAQmx'],
+            library_dirs=[os.path.join(_ni_dir, r'lib\msvc')])
+else:
+    build_args = dict(libraries=['nidaqmx'])
+
+def nidaqmx_builder():
+    ffibuilder = FFI()
+    ffibuilder.cdef(header_str)
+    ffibuilder.set_source('daqmx._nidaqmx', '#include "NIDAQmx.h"', **build_args)
+    return ffibuilder
+
+def types_builder():
+    # ABI mode cannot resolve `#define NAME ...`, the simulated driver defines its own values
+    ffibuilder = FFI()
+    ffibuilder.cdef(re.sub(r'#define[^\n]*', '', header_str))
+    ffibuilder.set_source('daqmx._types', None)
+    return ffibuilder
+
+ffibuilder = nidaqmx_builder()
+
+def main(argv):
+    target = argv[1] if len(argv) > 1 else 'all'
+    if target not in ('nidaqmx', 'sim', 'all'):
+        raise SystemExit('usage: python daqmx/_build.py [nidaqmx|sim|all]')
+
+    root = os.path.dirname(here)
+    if target in ('sim', 'all'):
+        types_builder().compile(tmpdir=root)
+
+    if target in ('nidaqmx', 'all'):
+        try:
+            ffibuilder.compile(tmpdir=root)
+        except Exception as e:
+            if target == 'nidaqmx':
+                raise
+            sys.stderr.write('could not build daqmx._nidaqmx: {}\n'.format(e))
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,151 @@
+'''asyncio front end for DAQmx tasks
+
+Reads are driven by the DAQmx every N samples and done events instead of polling:
+the driver's callback thread hands each event to the event loop with
+`call_soon_threadsafe`, and coroutines waiting for data are woken there. Several
+tasks can be multiplexed on one loop without a thread per task.
+
+This module needs python 3.6 or newer and is not imported by the `daqmx` package,
+use `from daqmx.aio import AsyncTask`.
+'''
+import asyncio
+import logging
+
+import numpy
+
+from .defs import EventType
+from .errors import error_class
+from .lowlevel import resolve, query_available_samples, register_nsamples_callback, \
+    unregister_nsamples_callback, register_done_callback, unregister_done_callback
+
+log = logging.getLogger('daqmx')
+
+__all__ = ['AsyncTask']
+
+def _running_loop():
+    # asyncio.get_running_loop is new in 3.7, in a coroutine get_event_loop gives the same loop
+    return getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)()
+
+class AsyncTask(object):
+    '''awaitable reads from a configured task
+
+    `samples_per_event` sets the granularity of the every N samples event and therefore
+    how often waiting coroutines are woken up. `start()` is called from a coroutine,
+    the task then belongs to the running loop, or to `loop` if one was given, until it
+    is started again. A typical use is
+
+        task = AsyncTask(handle, n_channels=2, samples_per_event=1024)
+        task.start()
+        async for block in task.stream(1024):
+            ...
+    '''
+
+    def __init__(self, handle, n_channels=1, samples_per_event=1024, loop=None):
+        self._handle = resolve(handle)
+        self._n_channels = n_channels
+        self._samples_per_event = samples_per_event
+        self._given_loop = loop
+        self._loop = None
+
+        self._acquired = 0
+        self._consumed = 0
+        self._done = False
+        self._status = 0
+        self._changed = None
+
+        # the callback store only holds weak references, keep the bound methods alive
+        self._on_samples_ref = self._on_samples
+        self._on_done_ref = self._on_done
+
+    handle = property(lambda self: self._handle)
+    available = property(lambda self: self._acquired - self._consumed)
+    is_done = property(lambda self: self._done)
+
+    def _on_samples(self, handle, event_type, n_samples, data):
+        # runs on a DAQmx thread
+        self._loop.call_soon_threadsafe(self._samples_arrived, n_samples)
+        return 0
+
+    def _on_done(self, handle, status, data):
+        # runs on a DAQmx thread
+        self._loop.call_soon_threadsafe(self._task_done, status)
+        return 0
+
+    def _samples_arrived(self, n_samples):
+        self._acquired += n_samples
+        self._changed.set()
+
+    def _task_done(self, status):
+        self._done = True
+        self._status = status
+        if self._changed is not None:
+            self._changed.set()
+
+    async def _wait_changed(self):
+        self._changed.clear()
+        await self._changed.wait()
+
+    def start(self):
+        '''register the task's events and start it'''
+        self._loop = self._given_loop or _running_loop()
+        # made here so that it belongs to the loop the task runs on
+        self._changed = asyncio.Event()
+        self._acquired = self._consumed = 0
+        self._done = False
+        self._status = 0
+
+        register_nsamples_callback(self._handle, self._samples_per_event, self._on_samples_ref)
+        register_done_callback(self._handle, self._on_done_ref)
+        self._handle.start()
+
+    def stop(self):
+        '''stop the task and unregister its events'''
+        self._handle.stop()
+        unregister_nsamples_callback(self._handle, EventType.Acquired_Into_Buffer)
+        unregister_done_callback(self._handle)
+        self._task_done(0)
+
+    async def wait_until_done(self):
+        '''wait for the task to finish, without polling `query_task_is_done`'''
+        while not self._done:
+            await self._wait_changed()
+
+        if self._status < 0:
+            raise error_class(self._status)(self._status)
+
+    async def read_f64(self, n_samps_per_channel, out=None):
+        '''wait until `n_samps_per_channel` samples are available and read them
+
+        Returns a (samples, channels) array, a view into `out` if it was given. If the
+        task finishes first, whatever samples are left are returned, which may be none.
+        '''
+        while self.available < n_samps_per_channel and not self._done:
+            await self._wait_changed()
+
+        if self._done:
+            # the every N samples event does not fire for a trailing partial block
+            n_samps_per_channel = min(n_samps_per_channel, query_available_samples(self._handle))
+
+        if out is None:
+            out = numpy.empty((n_samps_per_channel, self._n_channels))
+
+        if n_samps_per_channel == 0:
+            return out[:0]
+
+        # the samples are already in the DAQmx buffer, so this does not block the loop
+        out = out[:n_samps_per_channel]
+        count = self._handle.read_f64_into(out, n_samps_per_channel, 0.)
+        self._consumed += count
+        return out[:count]
+
+    async def stream(self, n_samps_per_channel, out=None):
+        '''yield blocks of `n_samps_per_channel` samples until the task is done
+
+        With `out` given, every block is a view into it and is overwritten by the next.
+        '''
+        while True:
+            block = await self.read_f64(n_samps_per_channel, out)
+            if block.shape[0] > 0:
+                yield block
+            elif self._done:
+                return
@@ -0,0 +1,38 @@
+from .clib import ffi
+from .defs import Read, FillMode
+from .lowlevel import read_f64_into
+import numpy
+
+__all__ = ['BufferPool']
+
+class BufferPool(object):
+    '''fixed set of preallocated read buffers handed out round robin
+
+    A pool lets an acquisition loop read into the same memory over and over instead 
+    of allocating and zero-filling a new array for every block. A buffer handed out by 
+    `acquire()` is reused after `depth` further calls, so consumers must be done with 
+    a block (or copy it) before then.
+    '''
+
+    def __init__(self, shape, depth=4, dtype=numpy.float64):
+        if depth < 1:
+            raise ValueError('depth must be at least 1')
+
+        self._buffers = [numpy.empty(shape, dtype=dtype) for i in range(depth)]
+        self._index = 0
+        self._count_p = ffi.new('int32 *')
+
+    depth = property(lambda self: len(self._buffers))
+    shape = property(lambda self: self._buffers[0].shape)
+
+    def acquire(self):
+        '''return the next buffer in the pool'''
+        buf = self._buffers[self._index]
+        self._index = (self._index + 1) % len(self._buffers)
+        return buf
+
+    def read_f64(self, handle, n_samps_per_channel=Read.All, timeout=0., 
+            fill_mode=FillMode.GroupByScanNumber, n_channels=1):
+        '''read into the next buffer of the pool, see `read_f64_into`'''
+        return read_f64_into(handle, self.acquire(), n_samps_per_channel, timeout, 
+                fill_mode, n_channels, self._count_p)
@@ -0,0 +1,48 @@
+import time
+
+__all__ = ['AttributeCache', 'attribute_cache']
+
+class AttributeCache(object):
+    '''memoizes attribute values that are expensive to query from DAQmx
+
+    Entries are keyed by (scope, attribute) tuples. The scope is what the attribute 
+    belongs to: 'system', a native task handle or ('device', name). Everything known 
+    about a scope is dropped with `invalidate(scope)`, which the functions that change 
+    a task (adding channels, configuring timing, clearing it) call. Entries stored with 
+    a `ttl` additionally expire after that many seconds, for values such as the list 
+    of devices that can change behind our back.
+    '''
+
+    def __init__(self, clock=time.time):
+        self._entries = {}
+        self._clock = clock
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, fetch, ttl=None):
+        '''return the cached value for `key`, calling `fetch()` to get it if needed'''
+        entry = self._entries.get(key)
+        if entry is not None and (entry[1] is None or entry[1] > self._clock()):
+            self.hits += 1
+            return entry[0]
+
+        self.misses += 1
+        value = fetch()
+        self._entries[key] = (value, None if ttl is None else self._clock() + ttl)
+        return value
+
+    def invalidate(self, scope=None):
+        '''forget everything cached for `scope`, or everything at all'''
+        if scope is None:
+            self._entries.clear()
+            return
+
+        for key in list(self._entries):
+            if key[0] == scope:
+                self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+'''the cache used by the attribute classes in defs and by lowlevel'''
+attribute_cache = AttributeCache()
@@ -0,0 +1,141 @@
+from .compat import string_types
+import collections
+import numpy
+import re
+
+__all__ = ['expand_channels', 'compress_channels', 'channel_runs', 'ChannelTable']
+
+_range_re = re.compile(r'^(.*?)(\d+):(\d+)$')
+_index_re = re.compile(r'^(.*?)(\d+)$')
+
+def expand_channels(spec):
+    '''expand a physical channel list into one name per channel
+
+    `spec` is a string in DAQmx syntax, e.g. 'Dev1/ai0:3, Dev2/ai0', or a list of such
+    strings. Ranges may count down ('Dev1/ai3:0') as in DAQmx.
+    '''
+    if not isinstance(spec, string_types):
+        return [name for s in spec for name in expand_channels(s)]
+
+    names = []
+    for part in spec.split(','):
+        part = part.strip()
+        m = _range_re.match(part)
+        if m:
+            prefix, first, last = m.group(1), int(m.group(2)), int(m.group(3))
+            step = 1 if last >= first else -1
+            names += ['{}{}'.format(prefix, i) for i in range(first, last + step, step)]
+        elif part:
+            names.append(part)
+    return names
+
+def compress_channels(names):
+    '''the shortest DAQmx range syntax for a list of physical channels, in order
+
+    >>> compress_channels(['Dev1/ai0', 'Dev1/ai1', 'Dev1/ai2', 'Dev2/ai5'])
+    'Dev1/ai0:2, Dev2/ai5'
+    '''
+    parts = []
+    run = None # (prefix, first, last)
+    for name in names:
+        m = _index_re.match(name)
+        if m is None:
+            if run: parts.append(run)
+            parts.append((name, None, None))
+            run = None
+            continue
+
+        prefix, index = m.group(1), int(m.group(2))
+        if run and run[0] == prefix and run[2] is not None and index == run[2] + 1:
+            run = (prefix, run[1], index)
+        else:
+            if run: parts.append(run)
+            run = (prefix, index, index)
+    if run: parts.append(run)
+
+    out = []
+    for prefix, first, last in parts:
+        if first is None:
+            out.append(prefix)
+        elif first == last:
+            out.append('{}{}'.format(prefix, first))
+        else:
+            out.append('{}{}:{}'.format(prefix, first, last))
+    return ', '.join(out)
+
+def channel_runs(physical, *columns):
+    '''(start, stop) of the runs of consecutive physical channels with equal `columns`
+
+    Each run can be written as one range, e.g. 'Dev1/ai0:7', and created by one DAQmx call.
+    '''
+    start = 0
+    for i in range(1, len(physical) + 1):
+        if i < len(physical):
+            a, b = _index_re.match(physical[i - 1]), _index_re.match(physical[i])
+            if a and b and a.group(1) == b.group(1) and int(b.group(2)) == int(a.group(2)) + 1 \
+                    and all(c[i] == c[start] for c in columns):
+                continue
+        yield start, i
+        start = i
+
+ChannelRow = collections.namedtuple('ChannelRow', 'name physical min max units terminal_config')
+
+class ChannelTable(object):
+    '''the virtual channels of a task as columns instead of one object per channel
+
+    `names` and `physical` are lists, `min`, `max`, `units` and `terminal_config`
+    numpy arrays, all indexed by the channel's position in the task, which is also its
+    column in (samples, channels) reads. `table[i]` and `table['name']` give a single
+    channel as a ChannelRow.
+    '''
+
+    def __init__(self):
+        self.names = []
+        self.physical = []
+        self.min = numpy.empty(0)
+        self.max = numpy.empty(0)
+        self.units = numpy.empty(0, dtype=numpy.int32)
+        self.terminal_config = numpy.empty(0, dtype=numpy.int32)
+        self._index = {}
+
+    def extend(self, names, physical, min_vals, max_vals, units, terminal_config):
+        '''append channels, scalar arguments apply to all of them'''
+        n = len(names)
+        if len(physical) != n:
+            raise ValueError('{} names for {} physical channels'.format(n, len(physical)))
+
+        for name in names:
+            if name in self._index:
+                raise ValueError('channel {} is already in the table'.format(name))
+        for i, name in enumerate(names):
+            self._index[name] = len(self.names) + i
+
+        self.names += list(names)
+        self.physical += list(physical)
+        self.min = numpy.concatenate((self.min, numpy.broadcast_to(min_vals, (n,))))
+        self.max = numpy.concatenate((self.max, numpy.broadcast_to(max_vals, (n,))))
+        self.units = numpy.concatenate((self.units, numpy.broadcast_to(units, (n,)).astype(numpy.int32)))
+        self.terminal_config = numpy.concatenate((self.terminal_config,
+            numpy.broadcast_to(terminal_config, (n,)).astype(numpy.int32)))
+
+    def index(self, name):
+        '''column of channel `name`'''
+        return self._index[name]
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, key):
+        i = self._index[key] if isinstance(key, string_types) else key
+        return ChannelRow(self.names[i], self.physical[i], float(self.min[i]), float(self.max[i]),
+                int(self.units[i]), int(self.terminal_config[i]))
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __repr__(self):
+        return 'ChannelTable({})'.format(compress_channels(self.physical))
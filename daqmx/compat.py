@@ -0,0 +1,27 @@
+'''helpers for running the same code on python 2 and python 3
+
+The DAQmx C API deals in byte strings. On python 2 `str` already is one, on python 3 
+text has to be encoded before it is handed to cffi and decoded when it comes back.
+'''
+import sys
+
+PY3 = sys.version_info[0] >= 3
+
+if PY3:
+    string_types = (str, bytes)
+    integer_types = (int,)
+
+    def to_bytes(s):
+        return s.encode('ascii') if isinstance(s, str) else s
+
+    def to_str(b):
+        return b.decode('ascii') if isinstance(b, bytes) else b
+else:
+    string_types = (basestring,)
+    integer_types = (int, long)
+
+    def to_bytes(s):
+        return s
+
+    def to_str(b):
+        return b
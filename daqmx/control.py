@@ -0,0 +1,190 @@
+from .clib import ffi, handle_warning
+from . import clib
+from .defs import TaskAttributes, SampleMode, FillMode
+from .lowlevel import resolve, set_timing_sample_clock
+import threading
+import logging
+import numpy
+import time
+import sys
+
+log = logging.getLogger('daqmx')
+
+__all__ = ['ControlLoop']
+
+if sys.version_info[0] >= 3:
+    _clock = time.perf_counter
+else:
+    _clock = time.clock if sys.platform == 'win32' else time.time
+
+class ControlLoop(object):
+    '''hardware timed single point loop: read, compute and write once per sample clock
+
+    Every period the loop waits for the sample clock of the input task, reads one
+    sample per channel into `inputs`, calls `fn(inputs, outputs)`, which fills
+    `outputs` in place, and writes `outputs` to the output task. Both arrays, and all
+    arguments of the DAQmx calls, are allocated once up front, so an iteration is
+    three C calls and the call to `fn` with no allocation in between.
+
+        def fn(inputs, outputs):
+            outputs[0] = -gain*inputs[0]
+
+        loop = ControlLoop(fn, ai_handle, ao_handle)
+        loop.configure(10e3)
+        loop.run(100000)
+        print(loop.stats())
+
+    An iteration is late when the next sample clock arrived before it finished;
+    `late` counts them. The time between wakeups (`periods`) and the time from wakeup
+    to the end of the write (`busy`) are kept for the last `history` iterations for
+    the jitter statistics of `stats()`.
+    '''
+
+    def __init__(self, fn, input_handle, output_handle=None, timeout=1., history=1<<16):
+        self.fn = fn
+        self.timeout = timeout
+        self.rate = None
+        self._in = resolve(input_handle)
+        self._out = resolve(output_handle) if output_handle is not None else None
+
+        self.inputs = numpy.zeros(TaskAttributes.get(self._in.value, 'channel_count'))
+        n_out = TaskAttributes.get(self._out.value, 'channel_count') if self._out is not None else 0
+        self.outputs = numpy.zeros(n_out)
+
+        self._in_p = ffi.cast('float64 *', ffi.from_buffer(self.inputs))
+        self._out_p = ffi.cast('float64 *', ffi.from_buffer(self.outputs))
+        self._count_p = ffi.new('int32 *')
+        self._written_p = ffi.new('int32 *')
+        self._late_p = ffi.new('bool32 *')
+
+        self.periods = numpy.zeros(history)
+        self.busy = numpy.zeros(history)
+        self.iterations = 0
+        self.late = 0
+        self._stopping = False
+        self._thread = None
+        self.error = None
+
+    is_running = property(lambda self: self._thread is not None and self._thread.is_alive())
+
+    def configure(self, rate):
+        '''time both tasks for hardware timed single point at `rate`
+
+        The input task runs from its onboard clock, the output task from the input
+        task's sample clock, so outputs are updated on the same clock edges.
+        '''
+        set_timing_sample_clock(self._in, rate, 1, SampleMode.HWTimedSinglePoint)
+        if self._out is not None:
+            device = TaskAttributes.get(self._in.value, 'devices').split(',')[0].strip()
+            set_timing_sample_clock(self._out, rate, 1, SampleMode.HWTimedSinglePoint,
+                    source='/{}/ai/SampleClock'.format(device))
+        self.rate = float(rate)
+
+    def run(self, n_iterations=None):
+        '''start the tasks, loop `n_iterations` times or until `stop()`, stop the tasks'''
+        lib = clib.lib
+        wait, read, write = lib.DAQmxWaitForNextSampleClock, lib.DAQmxReadAnalogF64, lib.DAQmxWriteAnalogF64
+        h_in = self._in.value
+        h_out = self._out.value if self._out is not None else None
+        n_in, timeout, layout = len(self.inputs), self.timeout, FillMode.GroupByScanNumber
+        in_p, out_p, count_p, written_p, late_p = \
+                self._in_p, self._out_p, self._count_p, self._written_p, self._late_p
+        null = ffi.NULL
+        fn, inputs, outputs = self.fn, self.inputs, self.outputs
+        periods, busy, history = self.periods, self.busy, len(self.periods)
+        clock = _clock
+
+        self._stopping = False
+        # the output follows the input's sample clock, so it has to be armed first
+        if h_out is not None:
+            res = write(h_out, 1, 0, timeout, layout, out_p, written_p, null)
+            if res: handle_warning(res)
+            self._out.start()
+        self._in.start()
+
+        i = self.iterations
+        end = None if n_iterations is None else i + n_iterations
+        late = 0
+        previous = None
+        try:
+            while i != end and not self._stopping:
+                res = wait(h_in, timeout, late_p)
+                now = clock()
+                if res: handle_warning(res)
+                if late_p[0]: late += 1
+
+                res = read(h_in, 1, timeout, layout, in_p, n_in, count_p, null)
+                if res: handle_warning(res)
+
+                fn(inputs, outputs)
+
+                if h_out is not None:
+                    res = write(h_out, 1, 0, timeout, layout, out_p, written_p, null)
+                    if res: handle_warning(res)
+
+                k = i % history
+                periods[k] = now - previous if previous is not None else numpy.nan
+                busy[k] = clock() - now
+                previous = now
+                i += 1
+        finally:
+            self.iterations = i
+            self.late += late
+            self._in.stop()
+            if self._out is not None:
+                self._out.stop()
+
+    def _run(self, n_iterations):
+        try:
+            self.run(n_iterations)
+        except Exception as e:
+            log.exception(e)
+            self.error = e
+
+    def start(self, n_iterations=None):
+        '''run the loop on its own thread'''
+        if self.is_running:
+            raise RuntimeError('loop is already running')
+
+        self.error = None
+        self._thread = threading.Thread(target=self._run, args=(n_iterations,), name='daqmx-control')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        '''end the loop after the current iteration'''
+        self._stopping = True
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+            self._thread = None
+
+    def reset_stats(self):
+        self.iterations = 0
+        self.late = 0
+        self.periods[:] = 0.
+        self.busy[:] = 0.
+
+    def stats(self):
+        '''loop timing over the last `history` iterations, in seconds
+
+        `jitter` is the standard deviation of the period, `max_deviation` the largest
+        difference between a period and the nominal one, if the rate is known.
+        '''
+        n = min(self.iterations, len(self.periods))
+        periods = self.periods[:n]
+        periods = periods[~numpy.isnan(periods)]
+        busy = self.busy[:n]
+
+        s = {'iterations': self.iterations, 'late': self.late}
+        if len(periods):
+            s.update(period_mean=float(periods.mean()), period_min=float(periods.min()),
+                period_max=float(periods.max()), jitter=float(periods.std()))
+            if self.rate:
+                deviation = numpy.abs(periods - 1./self.rate)
+                s.update(max_deviation=float(deviation.max()),
+                    p99_deviation=float(numpy.percentile(deviation, 99)))
+        if len(busy):
+            s.update(busy_mean=float(busy.mean()), busy_max=float(busy.max()))
+            if self.rate:
+                s['load'] = float(busy.mean()*self.rate)
+        return s
@@ -1,10 +1,22 @@
-from itertools import dropwhile, ifilter
 import time
 import weakref
+import logging
 
-from . import ffi, lib
+from .clib import ffi, lib, handle_error
+from .compat import string_types, to_bytes
+from .defs import TaskAttributes, DeviceAttributes, SystemAttributes, FillMode, Read, Units, \
+    TerminalConfig, LineGrouping
+from .cache import attribute_cache
+from .data import Data, AnalogF64
+from .channels import ChannelTable
+from .lowlevel import add_input_voltage_channels, add_output_voltage_channels, write_f64, \
+    read_digital_into, write_digital
+import numpy
 
-__all__ = ['NIDAQmx', 'Device', 'Task', 'AnalogInputVoltage', 'SampleClock']
+log = logging.getLogger('daqmx')
+
+__all__ = ['NIDAQmx', 'Device', 'Task', 'AnalogInputVoltage', 'AnalogOutputVoltage', 'AnalogOutputCurrent',
+    'DigitalInput', 'DigitalOutput', 'SampleClock']
 
 def _get_chan_attr(handle, name, attr, value=None):
     if value is None:
@@ -45,16 +57,27 @@ class Device(object):
     def __init__(self, name, *args, **kwargs):
         self._name = name
         self._channels = {}
+        self._ports = {}
 
     name = property(lambda self: self._name)
     ai = property(lambda self: self._get_inputs())
     ao = property(lambda self: self._get_outputs())
+    di = property(lambda self: self._get_ports('di_ports', PhysicalChannelInput))
+    do = property(lambda self: self._get_ports('do_ports', PhysicalChannelOutput))
+    ci = property(lambda self: self._get_ports('ci_channels', PhysicalChannelInput))
+
+    def _channel_names(self, attr):
+        # the split lists are cached next to the strings they come from
+        def split():
+            names = getattr(DeviceAttributes(self._name), attr)
+            return tuple(x.strip() for x in names.split(',')) if names else ()
+
+        return attribute_cache.get((('device', self._name), attr + '_names'), split)
 
     def _get_inputs(self):
-        pchan_in = _get_device_attr(self._name, lib.DAQmx_Dev_AI_PhysicalChans)
+        names_in = self._channel_names('ai_channels')
         
-        if pchan_in is not None: 
-            names_in = [x.strip() for x in ffi.string(pchan_in).split(',')] 
+        if names_in: 
             for i in names_in:
                 pin = self._channels.get(i, None) 
                 if pin is None: self._channels.update({i: PhysicalChannelInput(i)})
@@ -64,10 +87,9 @@ class Device(object):
             return []
 
     def _get_outputs(self):
-        pchan_out = _get_device_attr(self._name, lib.DAQmx_Dev_AO_PhysicalChans)
+        names_out = self._channel_names('ao_channels')
         
-        if pchan_out is not None: 
-            names_out = [x.strip() for x in ffi.string(pchan_out).split(',')] 
+        if names_out: 
             for i in names_out:
                 pout = self._channels.get(i, None) 
                 if pout is None: self._channels.update({i: PhysicalChannelOutput(i)})
@@ -76,6 +98,15 @@ class Device(object):
         else: 
             return []
     
+    def _get_ports(self, attr, cls):
+        # the same port is an input and an output, keep one of each
+        ports = []
+        for i in self._channel_names(attr):
+            port = self._ports.get((cls, i), None)
+            if port is None: port = self._ports[(cls, i)] = cls(i)
+            ports.append(port)
+        return ports
+
     def __repr__(self):
         return 'Device(\'{}\', ain=\'{}\', aout=\'{}\')'.format(self.name, self.ai, self.ao) 
 
@@ -89,15 +120,13 @@ class NIDAQmx(object):
         	return cls._instance
 
     def inputs(self):
-        tmp = ifilter(lambda x: len(x)>0, [y.ai for y in _get_devices()])
         ai = []
-        for i in tmp: ai += i
+        for i in [y.ai for y in _get_devices()]: ai += i
         return ai
     
     def outputs(self):
-        tmp = ifilter(lambda x: len(x)>0, [y.ao for y in _get_devices()])
         ao = []
-        for i in tmp: ai += i
+        for i in [y.ao for y in _get_devices()]: ao += i
         return ao
 
     devices = property(lambda self: _get_devices())
@@ -105,16 +134,38 @@ class NIDAQmx(object):
     tasks = property(lambda self: _sys_tasks())
     global_channels = property(lambda self: _sys_global_chans())
 
-from numpy import frombuffer, float64
-from weakref import WeakKeyDictionary
+_devices = {}
+
+def _get_devices():
+    # one Device per name, so its channel objects are kept between calls
+    names = SystemAttributes.get('devices')
+    names = [x.strip() for x in names.split(',')] if names else []
+    for name in names:
+        if name not in _devices: _devices[name] = Device(name)
+    return [_devices[name] for name in names]
+
+def _maj_version():
+    return SystemAttributes.get('major_version')
+
+def _min_version():
+    return SystemAttributes.get('minor_version')
 
-from .units import Auto, GroupByScanNumber
+def _sys_tasks():
+    names = SystemAttributes.get('saved_tasks')
+    return [x.strip() for x in names.split(',')] if names else []
+
+def _sys_global_chans():
+    names = SystemAttributes.get('global_channels')
+    return [x.strip() for x in names.split(',')] if names else []
+
+from weakref import WeakKeyDictionary
 
 class Task(object):
     def __init__(self, name):
         self._phandle = ffi.new('TaskHandle *')
-        res = lib.DAQmxCreateTask(name, self._phandle)
+        res = lib.DAQmxCreateTask(to_bytes(name), self._phandle)
         self._channels = {}
+        self._table = ChannelTable()
         self._data = WeakKeyDictionary()
         self._timing = None
 
@@ -126,22 +177,28 @@ class Task(object):
 
     def set_timing(self, timing, *args, **kwargs):
         if issubclass(timing, SampleTiming):
-        	print 'Making Timing'
+        	log.debug('making timing')
         	self._timing = timing(self._phandle[0], *args, **kwargs)
+        	attribute_cache.invalidate(self._phandle[0])
         else:
         	NotImplementedError('do not understand that timing spec')
 
     def _get_name(self):
-        return ffi.string(_get_task_attr(self._phandle[0], lib.DAQmx_Task_Name))
+        return TaskAttributes.get(self._phandle[0], 'name')
 
     def _get_channels(self):
-        var = _get_task_attr(self._phandle[0], lib.DAQmx_Task_Channels)
+        var = TaskAttributes.get(self._phandle[0], 'channels')
 
         if var is not None:
-            try:
-                chan_names = [self._channels[x.strip()] for x in ffi.string(var).split(',')]
-            except KeyError:
-                raise NotImplementedError('externally added channel. cannot create channel from name')
+            chan_names = []
+            for x in var.split(','):
+                x = x.strip()
+                if x in self._channels:
+                    chan_names.append(self._channels[x])
+                elif x in self._table:
+                    chan_names.append(self._table[x])
+                else:
+                    raise NotImplementedError('externally added channel. cannot create channel from name')
         else:
             chan_names = []
 
@@ -158,23 +215,49 @@ class Task(object):
             res = lib.DAQmxStopTask(self._phandle[0])
             handle_error(res)
         except RuntimeWarning as e:
-            print e
+            log.warning(e)
     
     #XXX Not sure whether I should add the created channel to some inner set 
     # to keep track of it? 
     def add_channel(self, chantype, *args, **kwargs):
         if issubclass(chantype, Channel):
+            if args and isinstance(args[0], (list,) + string_types):
+                return self.add_channels(chantype, *args, **kwargs)
+
             inst = chantype(self._phandle[0], *args, **kwargs) 
+            attribute_cache.invalidate(self._phandle[0])
             self._channels.update({inst.name: inst})
             return inst
         elif isinstance(chantype, PhysicalChannel):
             raise RuntimeWarning('you put the physical channel type first')
         elif isinstance(chantype, list):
-            raise NotImplementedError('cannot create more than one channel at a time yet')
+            raise RuntimeWarning('you put the physical channels first')
+
+    def add_channels(self, chantype, pchannels, min_val, max_val, units=Units.Volts, 
+            terminal_cfg=TerminalConfig.Default, names=None):
+        '''create many channels at once, e.g. add_channels(AnalogInputVoltage, 'Dev1/ai0:31', -1., 1.)
+
+        `pchannels` is a DAQmx physical channel list or a list of PhysicalChannels or 
+        names; `min_val`, `max_val` and `names` can be given per channel. No Channel 
+        objects are created, the channels are kept in the task's ChannelTable, `table`.
+        AnalogOutputVoltage channels take no `terminal_cfg`.
+        '''
+        if chantype not in (AnalogInputVoltage, AnalogOutputVoltage):
+            raise NotImplementedError('can only create analog voltage channels in bulk')
+
+        if isinstance(pchannels, list):
+            pchannels = [p.name if isinstance(p, PhysicalChannel) else p for p in pchannels]
+
+        if chantype is AnalogOutputVoltage:
+            return add_output_voltage_channels(self._phandle[0], pchannels, min_val, max_val, units, 
+                    names, self._table)
+        return add_input_voltage_channels(self._phandle[0], pchannels, min_val, max_val, units, 
+                names, terminal_cfg, self._table)
 
     def __del__(self):
         if self._phandle:
             res = lib.DAQmxClearTask(self._phandle[0])
+            attribute_cache.invalidate(self._phandle[0])
             handle_error(res)
 
     def _is_done(self):
@@ -190,12 +273,27 @@ class Task(object):
             while not self.is_done:
                 time.sleep(0.1)
 
-        print 'Can read now!'
+        log.debug('can read now')
 
-        if rtype != 'AnalogF64': raise NotImplementedError('can only read analog data in floating point')
-        self._read_analog_f64(*args, **kwargs)
+        if rtype in ('DigitalU8', 'DigitalU32'):
+            return self._read_digital(numpy.uint8 if rtype == 'DigitalU8' else numpy.uint32, *args, **kwargs)
+        if rtype != 'AnalogF64': raise NotImplementedError('can only read analog data in floating point or digital data')
+        return self._read_analog_f64(*args, **kwargs)
 
-    def _read_analog_f64(self, buf_size=2048, n_per_channel=Auto, timeout=None, fill_mode=GroupByScanNumber):
+    def _read_digital(self, dtype, buf_size=2048, n_per_channel=Read.All, timeout=None, 
+            fill_mode=FillMode.GroupByScanNumber):
+        if timeout is None:
+        	timeout = 10. # Ten seconds is default
+
+        n_channels = TaskAttributes.get(self._phandle[0], 'channel_count')
+        shape = (buf_size//n_channels, n_channels) if fill_mode == FillMode.GroupByScanNumber \
+                else (n_channels, buf_size//n_channels)
+        data, count = read_digital_into(self._phandle[0], numpy.zeros(shape, dtype=dtype), n_per_channel, 
+                timeout, fill_mode)
+        return data
+
+    def _read_analog_f64(self, buf_size=2048, n_per_channel=Read.All, timeout=None, 
+            fill_mode=FillMode.GroupByScanNumber):
         if timeout is None:
         	timeout = 10. # Ten seconds is default
 
@@ -206,34 +304,39 @@ class Task(object):
                 count_read, ffi.NULL)
 
         handle_error(res)
-        return AnalogF64(samples, count_read[0])
+
+        names = TaskAttributes.get(self._phandle[0], 'channels')
+        names = [x.strip() for x in names.split(',')] if names else []
+        return AnalogF64(samples, count_read[0], names, fill_mode)
+
+    def write(self, data, timeout=10., auto_start=False, fill_mode=FillMode.GroupByScanNumber):
+        '''write samples to the output channels, see lowlevel.write_f64
+
+        Integer data goes to digital output channels, see lowlevel.write_digital.
+        '''
+        if numpy.asarray(data).dtype.kind in 'iub':
+            return write_digital(self._phandle[0], data, timeout, auto_start, fill_mode)
+        return write_f64(self._phandle[0], data, timeout, auto_start, fill_mode)
 
     def channel_by_name(self, name):
+        if name in self._table:
+            return self._table[name]
         return self._channels.get(name, None)
 
     name = property(_get_name)
     channels = property(_get_channels)
     timing = property(lambda self: self._timing)
+    table = property(lambda self: self._table)
     is_done = property(lambda self: self._is_done())
 
-class Data(object):
-    def __init__(self, samples, *args, **kwargs):
-        self._cbuf = samples
-
-class AnalogF64(Data):
-    def __init__(self, samples, count):
-        super(AnalogF64, self).__init__(samples, count)
-        self._data = frombuffer(ffi.buffer(self._cbuf), dtype=float64, count=count)
-
-    data = property(lambda self: self._data)
-
 def _get_phys_channel_attr(name, attr, value=None):
     if value is None: # need to buffer the variable
+        name = to_bytes(name)
         buf_size = lib.DAQmxGetPhysicalChanAttribute(name, attr, ffi.NULL)
         #print 'need buffer of size ', buf_size
 
         if buf_size == 0:
-            value = ffi.new('char []', 'None')
+            value = ffi.new('char []', b'None')
             return value
         else:
             value = ffi.new('char []', buf_size)
@@ -241,7 +344,7 @@ def _get_phys_channel_attr(name, attr, value=None):
             handle_error(res)
             return value
     else: # Prebuffered
-        res = lib.DAQmxGetPhysicalChanAttribute(name, attr, value)
+        res = lib.DAQmxGetPhysicalChanAttribute(to_bytes(name), attr, value)
         
     handle_error(res)
     return value
@@ -293,23 +396,15 @@ class Channel(object):
 
         if isinstance(pchannel, PhysicalChannel):
         	self._pchannel = pchannel 
-        elif isinstance(pchannel, basestring):
+        elif isinstance(pchannel, string_types):
             raise NotImplementedError('cannot create channel by name yet')
         elif isinstance(pchannel, list):
             raise NotImplementedError('cannot create multiple channels at once yet')
         else:
         	raise RuntimeError('cannot interpret pchannel type {}'.format(type(pchannel)))
 
-        try:
-            #TODO: fix this to use get() perhaps?
-            name = kwargs['name']
-
-            if name != '':
-                self._name = name
-            else:
-                self._name = self._pchannel.name
-        except AttributeError:
-            self._name = self._pchannel.name
+        name = kwargs.get('name')
+        self._name = name if name else self._pchannel.name
 
     name = property(lambda self: self._name)
 
@@ -334,21 +429,21 @@ class AnalogInput(AnalogChannel):
         if isinstance(self._pchannel, PhysicalChannelInput) is False:
             raise RuntimeError('cannot create analog input from {}'.format(self._pchannel))
 
-from .units import Volts
+from .defs import Units, TerminalConfig
 class AnalogInputVoltage(AnalogInput):
-    def __init__(self, handle, pchannel, min_val, max_val, units=Volts, terminal_cfg=lib.DAQmx_Val_Cfg_Default,  
+    def __init__(self, handle, pchannel, min_val, max_val, units=Units.Volts, terminal_cfg=TerminalConfig.Default,  
             name=None, custom_scale_name=None):
 
         super(AnalogInputVoltage, self).__init__(handle, pchannel, min_val, max_val, units, 
                 terminal_cfg=terminal_cfg, name=name, custom_scale_name=custom_scale_name)
 
-        if custom_scale_name is not None and units is FromCustomScale:
-            sname = custom_scale_name
+        if custom_scale_name is not None and units is Units.FromCustomScale:
+            sname = to_bytes(custom_scale_name)
         else:
             sname = ffi.NULL
 
-        res = lib.DAQmxCreateAIVoltageChan(self._handle, pchannel.name, self._name, terminal_cfg, min_val,
-                max_val, units, sname) 
+        res = lib.DAQmxCreateAIVoltageChan(self._handle, to_bytes(pchannel.name), to_bytes(self._name),
+                terminal_cfg, min_val, max_val, units, sname) 
 
         handle_error(res)
 
@@ -360,22 +455,90 @@ class AnalogInputVoltageRMS(AnalogInput):
         return 'AnalogInputVoltageRMS(\'{}\')'.format(self._name)
 
 class AnalogOutput(AnalogChannel):
+    def __init__(self, handle, pchannel, min_val, max_val, units, *args, **kwargs):
+        super(AnalogOutput, self).__init__(handle, pchannel, min_val, max_val, units, *args, **kwargs)
+
+        if isinstance(self._pchannel, PhysicalChannelOutput) is False:
+            raise RuntimeError('cannot create analog output from {}'.format(self._pchannel))
+
+    # DAQmxCreateAO*Chan, set by the subclasses
+    _create = None
+
+    def _create_channel(self, custom_scale_name):
+        if custom_scale_name is not None and self._units is Units.FromCustomScale:
+            sname = to_bytes(custom_scale_name)
+        else:
+            sname = ffi.NULL
+
+        res = self._create(self._handle, to_bytes(self._pchannel.name), to_bytes(self._name), 
+                self._min_val, self._max_val, self._units, sname)
+
+        handle_error(res)
+
     def __repr__(self):
         return 'AnalogOutput(\'{}\')'.format(self._name)
 
 class AnalogOutputCurrent(AnalogOutput):
+    def __init__(self, handle, pchannel, min_val, max_val, units=Units.Amps, name=None, 
+            custom_scale_name=None):
+
+        super(AnalogOutputCurrent, self).__init__(handle, pchannel, min_val, max_val, units, 
+                name=name, custom_scale_name=custom_scale_name)
+        self._create_channel(custom_scale_name)
+
+    _create = property(lambda self: lib.DAQmxCreateAOCurrentChan)
+
     def __repr__(self):
         return 'AnalogOutputCurrent(\'{}\')'.format(self._name)
 
 class AnalogOutputVoltage(AnalogOutput):
+    def __init__(self, handle, pchannel, min_val, max_val, units=Units.Volts, name=None, 
+            custom_scale_name=None):
+
+        super(AnalogOutputVoltage, self).__init__(handle, pchannel, min_val, max_val, units, 
+                name=name, custom_scale_name=custom_scale_name)
+        self._create_channel(custom_scale_name)
+
+    _create = property(lambda self: lib.DAQmxCreateAOVoltageChan)
+
     def __repr__(self):
         return 'AnalogOutputVoltage(\'{}\')'.format(self._name)
 
 class DigitalChannel(Channel):
-    pass
+    '''digital lines or ports, read and written as words with a bit per line'''
+    def __init__(self, handle, pchannel, grouping=LineGrouping.AllLines, name=None):
+        super(DigitalChannel, self).__init__(handle, pchannel, name=name)
+        self._grouping = grouping
+
+    grouping = property(lambda self: self._grouping)
 
 class DigitalInput(DigitalChannel):
-    pass
+    def __init__(self, handle, pchannel, grouping=LineGrouping.AllLines, name=None):
+        super(DigitalInput, self).__init__(handle, pchannel, grouping, name)
+
+        if isinstance(self._pchannel, PhysicalChannelInput) is False:
+            raise RuntimeError('cannot create digital input from {}'.format(self._pchannel))
+
+        res = lib.DAQmxCreateDIChan(self._handle, to_bytes(self._pchannel.name), to_bytes(self._name), 
+                grouping)
+        handle_error(res)
+
+    def __repr__(self):
+        return 'DigitalInput(\'{}\')'.format(self._name)
+
+class DigitalOutput(DigitalChannel):
+    def __init__(self, handle, pchannel, grouping=LineGrouping.AllLines, name=None):
+        super(DigitalOutput, self).__init__(handle, pchannel, grouping, name)
+
+        if isinstance(self._pchannel, PhysicalChannelOutput) is False:
+            raise RuntimeError('cannot create digital output from {}'.format(self._pchannel))
+
+        res = lib.DAQmxCreateDOChan(self._handle, to_bytes(self._pchannel.name), to_bytes(self._name), 
+                grouping)
+        handle_error(res)
+
+    def __repr__(self):
+        return 'DigitalOutput(\'{}\')'.format(self._name)
 
 # XXX There are properties that can adjust timing type. this will mean I need to create a new class
 # Maybe it is better to have one megaclass instead that handles all of these logistics? 
@@ -383,10 +546,10 @@ class SampleTiming(object):
     def __init__(self, handle, *args, **kwargs):
         self._handle = handle
 
-from .units import RisingEdge, FiniteSamples
+from .defs import ActiveEdge, SampleMode
 
 class SampleClock(SampleTiming):
-    def __init__(self, handle, rate, edge=RisingEdge, sample_mode=FiniteSamples, n_per_channel=128, source=None):
+    def __init__(self, handle, rate, edge=ActiveEdge.Rising, sample_mode=SampleMode.Finite, n_per_channel=128, source=None):
         super(SampleClock, self).__init__(handle)
         
         self._source = source
@@ -396,7 +559,7 @@ class SampleClock(SampleTiming):
         self._n_per_channel = n_per_channel
 
         # Use onboard clock as source
-        if source is None: source = ffi.NULL
+        source = ffi.NULL if source is None else to_bytes(source)
 
         res = lib.DAQmxCfgSampClkTiming(handle, source, rate, edge, sample_mode, n_per_channel)
         handle_error(res)
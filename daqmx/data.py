@@ -0,0 +1,56 @@
+from .clib import ffi
+from .defs import FillMode
+from numpy import frombuffer, float64, ndarray
+
+__all__ = ['AnalogF64']
+
+class Data(object):
+    def __init__(self, samples, *args, **kwargs):
+        self._cbuf = samples
+
+class AnalogF64(Data):
+    '''floating point samples read from one or more analog channels
+
+    `data` is a view of the read buffer shaped after the fill mode of the read: 
+    (samples, channels) for FillMode.GroupByScanNumber and (channels, samples) for 
+    FillMode.GroupByChannel. `by_scan` and `by_channel` give the other orientation 
+    as a transposed view and `channel()` a single channel, none of them copy.
+
+    `samples` can be the cffi buffer of the read or a numpy array that was read into.
+    '''
+    def __init__(self, samples, count, channels=None, fill_mode=FillMode.GroupByScanNumber):
+        super(AnalogF64, self).__init__(samples, count)
+        self._channels = list(channels) if channels else []
+        self._fill_mode = fill_mode
+
+        n_channels = max(len(self._channels), 1)
+        if isinstance(samples, ndarray):
+            flat = samples.reshape(-1)[:count*n_channels]
+        else:
+            flat = frombuffer(ffi.buffer(self._cbuf), dtype=float64, count=count*n_channels)
+
+        if fill_mode == FillMode.GroupByChannel:
+            self._data = flat.reshape(n_channels, count)
+        else:
+            self._data = flat.reshape(count, n_channels)
+
+    def channel(self, name):
+        '''one dimensional view of the samples of channel `name`'''
+        try:
+            i = self._channels.index(name)
+        except ValueError:
+            raise KeyError('no channel {} in data'.format(name))
+
+        return self.by_channel[i]
+
+    def __len__(self):
+        return self.by_scan.shape[0]
+
+    def __repr__(self):
+        return 'AnalogF64(samples={}, channels={})'.format(len(self), self._channels)
+
+    data = property(lambda self: self._data)
+    channels = property(lambda self: self._channels)
+    fill_mode = property(lambda self: self._fill_mode)
+    by_scan = property(lambda self: self._data.T if self._fill_mode == FillMode.GroupByChannel else self._data)
+    by_channel = property(lambda self: self._data if self._fill_mode == FillMode.GroupByChannel else self._data.T)
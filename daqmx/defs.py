@@ -1,7 +1,10 @@
 from .clib import lib, ffi, handle_error
+from .compat import string_types, to_bytes, to_str
+from .cache import attribute_cache
 
 __all__ = ['TaskState', 'SystemAttributes', 'TaskAttributes', 'TerminalConfig', 'SampleMode', \
-    'Units', 'AnalogInputCouplings', 'FillMode']
+    'Units', 'AnalogInputCouplings', 'FillMode', 'RegenMode', 'LineGrouping', 'CountDirection', \
+    'CounterUnits', 'CounterMethod']
 
 class Units:
     Volts = lib.DAQmx_Val_Volts
@@ -46,6 +49,30 @@ class EventType:
     Acquired_Into_Buffer = lib.DAQmx_Val_Acquired_Into_Buffer
     Transferred_From_Buffer = lib.DAQmx_Val_Transferred_From_Buffer
 
+class RegenMode:
+    Allow = lib.DAQmx_Val_AllowRegen
+    DoNotAllow = lib.DAQmx_Val_DoNotAllowRegen
+
+class LineGrouping:
+    '''one channel per digital line, or one channel for all lines, read as packed words'''
+    PerLine = lib.DAQmx_Val_ChanPerLine
+    AllLines = lib.DAQmx_Val_ChanForAllLines
+
+class CountDirection:
+    Up = lib.DAQmx_Val_CountUp
+    Down = lib.DAQmx_Val_CountDown
+    External = lib.DAQmx_Val_ExtControlled
+
+class CounterUnits:
+    Seconds = lib.DAQmx_Val_Seconds
+    Hz = lib.DAQmx_Val_Hz
+    Ticks = lib.DAQmx_Val_Ticks
+
+class CounterMethod:
+    LowFreq1Ctr = lib.DAQmx_Val_LowFreq1Ctr
+    HighFreq2Ctr = lib.DAQmx_Val_HighFreq2Ctr
+    LargeRng2Ctr = lib.DAQmx_Val_LargeRng2Ctr
+
 class SampleFormat:
     GroupByChannel = lib.DAQmx_Val_GroupByChannel 
     GroupByScanNumber = lib.DAQmx_Val_GroupByScanNumber
@@ -66,6 +93,10 @@ class SystemAttributes(object):
 
     This class allows one to query system attributes. They can be accessed using the 
     `get()` class method, e.g.
+
+    Values are cached. The version never changes, the string lists (devices, saved 
+    tasks and global channels) are queried again once they are `ttl` seconds old. 
+    Pass `cached=False` to always ask DAQmx.
     '''
     
     int_attrs = ['major_version', 'minor_version']
@@ -81,9 +112,19 @@ class SystemAttributes(object):
 
     attributes = attr_map.keys()
 
+    ttl = 1.
+
     @classmethod
-    def get(cls, attr):
-        if not isinstance(attr, basestring):
+    def get(cls, attr, cached=True):
+        if not cached:
+            return cls._query(attr)
+
+        ttl = cls.ttl if attr in cls.str_attrs else None
+        return attribute_cache.get(('system', attr), lambda: cls._query(attr), ttl)
+
+    @classmethod
+    def _query(cls, attr):
+        if not isinstance(attr, string_types):
             raise TypeError('attr must be a string')
 
         if attr in cls.int_attrs:
@@ -106,7 +147,7 @@ class SystemAttributes(object):
                 value = ffi.new('char []', buf_size)
                 res = lib.DAQmxGetSystemInfoAttribute(attr, value, ffi.cast('int32', buf_size))
                 handle_error(res)
-                return ffi.string(value)
+                return to_str(ffi.string(value))
         else:
             raise AttributeError('no system attribute {}'.format(attr))
 
@@ -115,6 +156,10 @@ class TaskAttributes(object):
 
     This class allows one to query task attributes. They can be accessed using the 
     `get(handle, attr)` class method
+
+    Values other than `is_done` are cached per task until the task is changed through 
+    the functions in lowlevel, which call `attribute_cache.invalidate(handle)`. Pass 
+    `cached=False` to always ask DAQmx.
     '''
 
     int_attrs = ['channel_count', 'device_count']
@@ -133,8 +178,15 @@ class TaskAttributes(object):
     attributes = attr_map.keys()
 
     @classmethod
-    def get(cls, handle, attr):
-        if not isinstance(attr, basestring):
+    def get(cls, handle, attr, cached=True):
+        if not cached or attr in cls.bool_attrs:
+            return cls._query(handle, attr)
+
+        return attribute_cache.get((handle, attr), lambda: cls._query(handle, attr))
+
+    @classmethod
+    def _query(cls, handle, attr):
+        if not isinstance(attr, string_types):
             raise TypeError('attr must be a string')
 
         #if not isinstance(handle, ):
@@ -173,11 +225,25 @@ class TaskAttributes(object):
                 value = ffi.new('char []', buf_size)
                 res = lib.DAQmxGetTaskAttribute(handle, attr, value, ffi.cast('int32', buf_size))
                 handle_error(res)
-                return ffi.string(value)
+                return to_str(ffi.string(value))
         else:
             raise AttributeError('no task attribute {}'.format(attr))
 
+def _device_property(query):
+    '''property that is queried once per device and then served from attribute_cache'''
+    attr = query.__name__
+
+    def get(self):
+        return attribute_cache.get((('device', self.name), attr), lambda: query(self))
+
+    return property(get, doc=query.__doc__)
+
 class DeviceAttributes(object):
+    '''device information. 
+    
+    Everything here describes the hardware and does not change while it is installed, 
+    so each value is only queried once per device. `reset_device` drops the cached values.
+    '''
     _category = { \
         lib.DAQmx_Val_MSeriesDAQ: 'M Series DAQ',
         lib.DAQmx_Val_ESeriesDAQ: 'E Series DAQ',
@@ -201,142 +267,227 @@ class DeviceAttributes(object):
 
     def __init__(self, name):
         self.name = name
+        self._cname = to_bytes(name)
 
-    @property
+    @_device_property
     def simulated(self):
         p = ffi.new('bool32 *')
-        res = lib.DAQmxGetDevIsSimulated(self.name, p)
+        res = lib.DAQmxGetDevIsSimulated(self._cname, p)
         handle_error(res)
         return bool(p[0])
 
-    @property
+    @_device_property
     def product_category(self): 
         p = ffi.new('int32 *')
-        res = lib.DAQmxGetDevProductCategory(self.name, p)
+        res = lib.DAQmxGetDevProductCategory(self._cname, p)
         handle_error(res)
-        return cls._category[p[0]]
+        return self._category[p[0]]
 
 
-    @property
+    @_device_property
     def product_type(self):
         p = ffi.new('char[]', 256) 
-        res = lib.DAQmxGetDevProductType(self.name, p, 256)
+        res = lib.DAQmxGetDevProductType(self._cname, p, 256)
         handle_error(res)
-        return ffi.string(p)
+        return to_str(ffi.string(p))
     
 
     def product_number(self):
         p = ffi.new('uInt32 *')
-        res = lib.DAQmxGetDevProductNum(self.name, p)
+        res = lib.DAQmxGetDevProductNum(self._cname, p)
         handle_error(res)
         return p[0]
 
 
-    @property
+    @_device_property
     def serial_number(self):
         p = ffi.new('uInt32 *')
-        res = lib.DAQmxGetDevSerialNum(self.name, p)
+        res = lib.DAQmxGetDevSerialNum(self._cname, p)
         handle_error(res)
         return p[0]
 
-    @property
+    @_device_property
     def analog_triggering_supported(self):
         p = ffi.new('bool32 *')
-        res = lib.DAQmxGetDevAnlgTrigSupported(self.name, p)
+        res = lib.DAQmxGetDevAnlgTrigSupported(self._cname, p)
         handle_error(res)
         return bool(p[0])
     
-    @property
+    @_device_property
     def digital_triggering_supported(self):
         p = ffi.new('bool32 *')
-        res = lib.DAQmxGetDevDigTrigSupported(self.name, p)
+        res = lib.DAQmxGetDevDigTrigSupported(self._cname, p)
         handle_error(res)
         return bool(p[0])
 
-    @property
+    @_device_property
     def ai_channels(self):
         p = ffi.new('char[]', 2048)
-        res = lib.DAQmxGetDevAIPhysicalChans(self.name, p, 2048);
+        res = lib.DAQmxGetDevAIPhysicalChans(self._cname, p, 2048);
+        handle_error(res)
+        return to_str(ffi.string(p))
+
+    @_device_property
+    def ao_channels(self):
+        p = ffi.new('char[]', 2048)
+        res = lib.DAQmxGetDevAOPhysicalChans(self._cname, p, 2048);
         handle_error(res)
-        return ffi.string(p)
+        return to_str(ffi.string(p))
 
+    @_device_property
+    def di_lines(self):
+        p = ffi.new('char[]', 8192)
+        res = lib.DAQmxGetDevDILines(self._cname, p, 8192)
+        handle_error(res)
+        return to_str(ffi.string(p))
+
+    @_device_property
+    def di_ports(self):
+        p = ffi.new('char[]', 2048)
+        res = lib.DAQmxGetDevDIPorts(self._cname, p, 2048)
+        handle_error(res)
+        return to_str(ffi.string(p))
+
+    @_device_property
+    def di_max_rate(self):
+        p = ffi.new('float64 *')
+        res = lib.DAQmxGetDevDIMaxRate(self._cname, p)
+        handle_error(res)
+        return p[0]
+
+    @_device_property
+    def do_lines(self):
+        p = ffi.new('char[]', 8192)
+        res = lib.DAQmxGetDevDOLines(self._cname, p, 8192)
+        handle_error(res)
+        return to_str(ffi.string(p))
+
+    @_device_property
+    def do_ports(self):
+        p = ffi.new('char[]', 2048)
+        res = lib.DAQmxGetDevDOPorts(self._cname, p, 2048)
+        handle_error(res)
+        return to_str(ffi.string(p))
+
+    @_device_property
+    def do_max_rate(self):
+        p = ffi.new('float64 *')
+        res = lib.DAQmxGetDevDOMaxRate(self._cname, p)
+        handle_error(res)
+        return p[0]
+
+    @_device_property
+    def ci_channels(self):
+        p = ffi.new('char[]', 2048)
+        res = lib.DAQmxGetDevCIPhysicalChans(self._cname, p, 2048)
+        handle_error(res)
+        return to_str(ffi.string(p))
+
+    @_device_property
+    def co_channels(self):
+        p = ffi.new('char[]', 2048)
+        res = lib.DAQmxGetDevCOPhysicalChans(self._cname, p, 2048)
+        handle_error(res)
+        return to_str(ffi.string(p))
+
+    @_device_property
+    def ci_max_size(self):
+        '''width of the counters in bits'''
+        p = ffi.new('uInt32 *')
+        res = lib.DAQmxGetDevCIMaxSize(self._cname, p)
+        handle_error(res)
+        return p[0]
+
+    @_device_property
+    def ci_max_timebase(self):
+        p = ffi.new('float64 *')
+        res = lib.DAQmxGetDevCIMaxTimebase(self._cname, p)
+        handle_error(res)
+        return p[0]
+
+    @_device_property
+    def ci_sample_clock_supported(self):
+        p = ffi.new('bool32 *')
+        res = lib.DAQmxGetDevCISampClkSupported(self._cname, p)
+        handle_error(res)
+        return bool(p[0])
 
-    @property
+    @_device_property
     def ai_single_chan_max_rate(self):
         p = ffi.new('float64 *')
-        res = lib.DAQmxGetDevAIMaxSingleChanRate(self.name, p)
+        res = lib.DAQmxGetDevAIMaxSingleChanRate(self._cname, p)
         handle_error(res)
         return p[0]
 
-    @property
+    @_device_property
     def ai_multi_chan_max_rate(self):
         p = ffi.new('float64 *')
-        res = lib.DAQmxGetDevAIMaxMultiChanRate(self.name, p)
+        res = lib.DAQmxGetDevAIMaxMultiChanRate(self._cname, p)
         handle_error(res)
         return p[0]
 
-    @property
+    @_device_property
     def ai_min_rate(self):
         p = ffi.new('float64 *')
-        res = lib.DAQmxGetDevAIMinRate(self.name, p)
+        res = lib.DAQmxGetDevAIMinRate(self._cname, p)
         handle_error(res)
         return p[0]
 
-    @property
+    @_device_property
     def ai_simultaneous_sampling(self):
         p = ffi.new('bool32 *')
-        res = lib.DAQmxGetDevAISimultaneousSamplingSupported(self.name, p)
+        res = lib.DAQmxGetDevAISimultaneousSamplingSupported(self._cname, p)
         handle_error(res)
         return bool(p[0])
 
-    @property
+    @_device_property
     def ai_triggers_supported(self):
         p = ffi.new('int32 *')
-        res = lib.DAQmxGetDevAITrigUsage(self.name, p)
+        res = lib.DAQmxGetDevAITrigUsage(self._cname, p)
         handle_error(res)
         return p[0]
 
-    @property
+    @_device_property
     def ai_voltage_ranges(self):
         # TODO: Can be done with generator expressions
         p = ffi.new('float64[]', 64)
-        res = lib.DAQmxGetDevAIVoltageRngs(self.name, p, 64)
+        res = lib.DAQmxGetDevAIVoltageRngs(self._cname, p, 64)
         handle_error(res)
 
         ranges = []
-        for i in xrange(0, 64, 2): # iterate in pairs
+        for i in range(0, 64, 2): # iterate in pairs
             if max(p[i], p[i+1]) > 0.001: # real range, not just zeros
                 ranges.append((p[i], p[i+1]))
 
         return ranges
 
 
-    @property
+    @_device_property
     def ai_gains(self):
         # TODO: Can be done with generator expressions
         p = ffi.new('float64[]', 64)
-        res = lib.DAQmxGetDevAIVoltageRngs(self.name, p, 64)
+        res = lib.DAQmxGetDevAIVoltageRngs(self._cname, p, 64)
         handle_error(res)
 
         gains = []
-        for i in xrange(0, 64, 1):
+        for i in range(0, 64, 1):
             if p[i] > 0.001: # real range, not just zeros
                 gains.append(p[i])
 
         return gains
 
-    @property
+    @_device_property
     def ai_couplings(self):
         p = ffi.new('int32 *')
-        res = lib.DAQmxGetDevAICouplings(self.name, p);
+        res = lib.DAQmxGetDevAICouplings(self._cname, p);
         handle_error(res)
         return p[0]
 
     
-    @property
+    @_device_property
     def terminals(self):
         p = ffi.new('char[]', 2048) 
-        res = lib.DAQmxGetDevTerminals(self.name, p, 2048)
+        res = lib.DAQmxGetDevTerminals(self._cname, p, 2048)
         handle_error(res)
-        return ffi.string(p)
+        return to_str(ffi.string(p))
 
@@ -0,0 +1,94 @@
+'''exceptions for DAQmx status codes
+
+Negative status codes raise a DAQmxError, positive ones a DAQmxWarning. They derive
+from RuntimeError and RuntimeWarning, so code that catches those keeps working. Codes
+that callers commonly handle have their own subclass:
+
+    try:
+        read_f64_into(handle, out, n, timeout=0.1)
+    except DAQmxTimeoutError:
+        pass
+
+Creating an exception only stores the code. The driver's message is looked up when the
+exception is printed, through a small cache in `daqmx.clib`.
+'''
+
+__all__ = ['DAQmxError', 'DAQmxWarning', 'DAQmxTimeoutError', 'BufferOverwriteError',
+    'BufferUnderflowError', 'TaskStateError', 'InvalidTaskError', 'DeviceError', 'error_class',
+    'warning_class']
+
+class _Status(object):
+    '''message and str() shared by errors and warnings'''
+
+    # status codes this class stands for
+    codes = ()
+
+    def __init__(self, code, extended_info=''):
+        super(_Status, self).__init__(code)
+        self.code = code
+        self.extended_info = extended_info
+
+    def __reduce__(self):
+        return (type(self), (self.code, self.extended_info))
+
+    @property
+    def message(self):
+        from .clib import error_message
+        return error_message(self.code)
+
+    def __str__(self):
+        s = '{} ({:d})'.format(self.message, self.code)
+        if self.extended_info:
+            s += '\n' + self.extended_info
+        return s
+
+class DAQmxError(_Status, RuntimeError):
+    '''a negative DAQmx status code'''
+
+class DAQmxWarning(_Status, RuntimeWarning):
+    '''a positive DAQmx status code'''
+
+class DAQmxTimeoutError(DAQmxError):
+    '''the samples, the buffer space or the task were not ready before the timeout'''
+    codes = (-200284, -200560, -200292)
+
+class BufferOverwriteError(DAQmxError):
+    '''the acquisition overran the buffer before the samples were read'''
+    codes = (-200279, -200361)
+
+class BufferUnderflowError(DAQmxError):
+    '''the generation ran out of new samples to write'''
+    codes = (-200290, -200621, -200018)
+
+class TaskStateError(DAQmxError):
+    '''the operation needs the task to be running, or to be stopped'''
+    codes = (-200983, -200479)
+
+class InvalidTaskError(DAQmxError):
+    '''the task does not exist, or its name is taken'''
+    codes = (-200088, -200089)
+
+class DeviceError(DAQmxError):
+    '''the device or physical channel does not exist or is reserved'''
+    codes = (-200220, -200170, -50103)
+
+def _by_code(base):
+    classes = {}
+    stack = [base]
+    while stack:
+        cls = stack.pop()
+        for code in cls.codes:
+            classes[code] = cls
+        stack += cls.__subclasses__()
+    return classes
+
+_error_classes = _by_code(DAQmxError)
+_warning_classes = _by_code(DAQmxWarning)
+
+def error_class(code):
+    '''the DAQmxError subclass raised for a negative status code'''
+    return _error_classes.get(code, DAQmxError)
+
+def warning_class(code):
+    '''the DAQmxWarning subclass raised for a positive status code'''
+    return _warning_classes.get(code, DAQmxWarning)
@@ -0,0 +1,280 @@
+'''fan blocks of samples out to worker processes through shared memory
+
+This module starts processes and maps shared memory, so it is not imported by the
+`daqmx` package, use `from daqmx.fanout import FanOut`.
+'''
+from .clib import ffi
+from .defs import FillMode
+from .lowlevel import read_f64_into
+import multiprocessing.sharedctypes
+import multiprocessing
+import traceback
+import logging
+import time
+import numpy
+import ctypes
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+log = logging.getLogger('daqmx')
+
+__all__ = ['SharedBlocks', 'FanOut']
+
+class SharedBlocks(object):
+    '''`n_slots` blocks of (samples, channels) in one shared memory segment
+
+    The segment is a `multiprocessing.sharedctypes.RawArray`, so it is inherited by,
+    or passed to, processes started afterwards and mapped there without a copy.
+    `slot(i)` is a numpy view of block `i` in whichever process calls it.
+    '''
+
+    def __init__(self, n_slots, block_samples, n_channels, dtype=numpy.float64, context=multiprocessing):
+        self.dtype = numpy.dtype(dtype)
+        self.shape = (n_slots, block_samples, n_channels)
+        self._raw = context.RawArray(ctypes.c_char, n_slots*block_samples*n_channels*self.dtype.itemsize)
+        self._array = None
+
+    n_slots = property(lambda self: self.shape[0])
+    block_samples = property(lambda self: self.shape[1])
+    n_channels = property(lambda self: self.shape[2])
+
+    def __getstate__(self):
+        # only while starting a process, see multiprocessing.sharedctypes
+        return {'dtype': self.dtype, 'shape': self.shape, '_raw': self._raw, '_array': None}
+
+    def _get_array(self):
+        if self._array is None:
+            self._array = numpy.frombuffer(self._raw, dtype=self.dtype).reshape(self.shape)
+        return self._array
+
+    array = property(_get_array)
+
+    def slot(self, index):
+        return self.array[index]
+
+def _work(fn, blocks, tasks, free, results):
+    '''worker process: run `fn` on every block announced on `tasks`'''
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+
+        index, seq, n = task
+        try:
+            value = fn(seq, blocks.slot(index)[:n])
+        except Exception:
+            results.put((seq, False, traceback.format_exc()))
+        else:
+            if value is not None:
+                results.put((seq, True, value))
+        finally:
+            free.put(index)
+
+class FanOut(object):
+    '''spreads acquired blocks over worker processes without pickling the samples
+
+    Blocks live in a ring of `n_slots` SharedBlocks slots. The publisher fills a free
+    slot, straight from DAQmx with `publish_from()` or by copying with `publish()`, and
+    queues only (slot, sequence number, samples) for the workers. Each block goes to
+    one worker, which calls `fn(seq, block)` on a view of the shared slot and hands
+    the slot back when `fn` returns; `fn` must copy what it wants to keep. Values `fn`
+    returns, other than None, come back through `results()`, tagged with the sequence
+    number since workers finish out of order.
+
+    When all slots are in use the workers are behind. The publisher then waits up to
+    `timeout` for a slot, or, with `block_on_full=False`, drops the block and counts it in
+    `dropped`; `waits` counts how often it had to wait. `fn` is sent to the workers
+    by pickling, so it has to be a module level function.
+
+        def spectrum(seq, block):
+            return numpy.abs(numpy.fft.rfft(block, axis=0)).mean(axis=1)
+
+        fan = FanOut(spectrum, n_channels=4, block_samples=8192)
+        fan.start()
+        while acquiring:
+            fan.publish_from(handle, timeout=1.)
+            for seq, value in fan.results():
+                ...
+        fan.stop()
+    '''
+
+    def __init__(self, fn, n_channels, block_samples, n_workers=None, n_slots=None,
+            dtype=numpy.float64, context=None):
+        if context is None:
+            context = multiprocessing
+        elif not hasattr(context, 'Process'):
+            context = multiprocessing.get_context(context)
+
+        self.n_workers = n_workers or multiprocessing.cpu_count()
+        n_slots = n_slots or 2*self.n_workers
+        if n_slots < self.n_workers:
+            raise ValueError('n_slots must be at least n_workers')
+
+        self._fn = fn
+        self._context = context
+        self.blocks = SharedBlocks(n_slots, block_samples, n_channels, dtype, context)
+        self._tasks = context.Queue()
+        self._free = context.Queue()
+        self._results = context.Queue()
+        self._workers = []
+        self._seq = 0
+        self._free_local = list(range(n_slots))
+        self._count_p = ffi.new('int32 *')
+
+        self._pending = []
+
+        self.published = 0
+        self.dropped = 0
+        self.waits = 0
+        self.errors = []
+
+    is_running = property(lambda self: bool(self._workers))
+    n_slots = property(lambda self: self.blocks.n_slots)
+    block_samples = property(lambda self: self.blocks.block_samples)
+    n_channels = property(lambda self: self.blocks.n_channels)
+
+    def start(self):
+        if self._workers:
+            raise RuntimeError('fan out is already running')
+
+        for i in range(self.n_workers):
+            p = self._context.Process(target=_work, name='daqmx-fanout-{}'.format(i),
+                    args=(self._fn, self.blocks, self._tasks, self._free, self._results))
+            p.daemon = True
+            p.start()
+            self._workers.append(p)
+
+    def acquire(self, timeout=None, block=True):
+        '''index of a free slot, or None if there is none within `timeout`
+
+        Fill `blocks.slot(index)` and pass the index to `submit()`.
+        '''
+        if self._free_local:
+            return self._free_local.pop()
+
+        try:
+            return self._free.get(False)
+        except queue.Empty:
+            if not block:
+                self.dropped += 1
+                return None
+
+        self.waits += 1
+        try:
+            return self._free.get(True, timeout)
+        except queue.Empty:
+            self.dropped += 1
+            return None
+
+    def submit(self, index, n=None):
+        '''hand the first `n` samples of slot `index` to a worker. Returns the sequence number'''
+        seq = self._seq
+        self._seq += 1
+        self._tasks.put((index, seq, self.block_samples if n is None else n))
+        self.published += 1
+        return seq
+
+    def release(self, index):
+        '''give back a slot from `acquire()` without submitting it'''
+        self._free_local.append(index)
+
+    def publish(self, block, timeout=None, block_on_full=True):
+        '''copy a (samples, channels) block into a slot and queue it
+
+        Returns the sequence number, or None if the block was dropped.
+        '''
+        if block.shape[0] > self.block_samples:
+            raise ValueError('block of {} samples, slots hold {}'.format(block.shape[0], self.block_samples))
+
+        index = self.acquire(timeout, block_on_full)
+        if index is None:
+            return None
+
+        self.blocks.slot(index)[:block.shape[0]] = block
+        return self.submit(index, block.shape[0])
+
+    def publish_from(self, handle, timeout=10., block_on_full=True):
+        '''read one block from a task straight into a slot and queue it
+
+        The read waits up to `timeout` for a full block, the slot up to `timeout` as
+        well. Returns the sequence number, or None if no slot was free or nothing
+        was read.
+        '''
+        index = self.acquire(timeout, block_on_full)
+        if index is None:
+            return None
+
+        try:
+            data, count = read_f64_into(handle, self.blocks.slot(index), self.block_samples,
+                    timeout, FillMode.GroupByScanNumber, count_p=self._count_p)
+        except Exception:
+            self.release(index)
+            raise
+
+        if count == 0:
+            self.release(index)
+            return None
+        return self.submit(index, count)
+
+    def results(self, timeout=0.):
+        '''(seq, value) pairs returned by `fn` since the last call
+
+        Waits up to `timeout` for the first one. Failures of `fn` are not returned but
+        appended to `errors` as (seq, traceback) and logged. Results that came in
+        while `stop()` waited for the workers are returned too.
+        '''
+        out, self._pending = self._pending, []
+        return self._collect(out, 0. if out else timeout)
+
+    def _collect(self, out, timeout=0.):
+        block = timeout is None or timeout > 0
+        while True:
+            try:
+                seq, ok, value = self._results.get(block, timeout)
+            except queue.Empty:
+                return out
+            block = False
+
+            if ok:
+                out.append((seq, value))
+            else:
+                log.error('fan out worker failed on block %d\n%s', seq, value)
+                self.errors.append((seq, value))
+
+    def stop(self, timeout=10.):
+        '''let the workers finish the queued blocks and end them
+
+        Their results are kept for `results()`. A worker that is not done after
+        `timeout` is terminated.
+        '''
+        for p in self._workers:
+            self._tasks.put(None)
+
+        # a worker only exits once its results are out of the pipe, so keep taking them
+        deadline = time.time() + timeout
+        for p in self._workers:
+            while p.is_alive() and time.time() < deadline:
+                self._collect(self._pending, 0.05)
+                p.join(0)
+            if p.is_alive():
+                log.warning('terminating fan out worker %s', p.name)
+                p.terminate()
+        self._collect(self._pending)
+
+        self._workers = []
+        # every slot is free again, the workers have returned them
+        while True:
+            try:
+                self._free_local.append(self._free.get(False))
+            except queue.Empty:
+                break
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
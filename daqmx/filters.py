@@ -0,0 +1,230 @@
+import numpy
+
+__all__ = ['lowpass_taps', 'FIRDecimator', 'CICDecimator', 'MovingAverage', 'Envelope',
+    'Pipeline', 'envelope']
+
+def lowpass_taps(factor, n_taps=None):
+    '''windowed sinc lowpass taps for decimating by `factor`
+
+    The cutoff is at the new Nyquist frequency, 0.5/factor of the input rate. The taps
+    sum to one, so DC passes unchanged.
+    '''
+    if n_taps is None:
+        n_taps = 8*factor + 1
+
+    n = numpy.arange(n_taps) - (n_taps - 1)/2.
+    taps = numpy.sinc(n/float(factor))*numpy.hamming(n_taps)
+    return taps/taps.sum()
+
+def envelope(block, n_bins):
+    '''min and max of a (samples, channels) block in `n_bins` nearly equal bins
+
+    Returns two (n_bins, channels) arrays. Blocks shorter than `n_bins` are returned
+    as they are, for both.
+    '''
+    n = block.shape[0]
+    if n <= n_bins:
+        return block, block
+
+    edges = (numpy.arange(n_bins)*n)//n_bins
+    return numpy.minimum.reduceat(block, edges, axis=0), numpy.maximum.reduceat(block, edges, axis=0)
+
+class _Stage(object):
+    '''state shared by the stages: the samples carried over from the previous block
+
+    Blocks are (samples, channels) arrays as produced by FillMode.GroupByScanNumber
+    reads and `RingReader.read()`. Blocks of any length can be processed, the output
+    is the same as if all blocks had been joined and processed at once.
+    '''
+
+    factor = 1
+
+    def __init__(self, history):
+        self._n_history = history
+        self._history = None
+
+    def reset(self):
+        '''forget the samples of previous blocks'''
+        self._history = None
+
+    def _extend(self, block):
+        '''return the history followed by `block`, and keep its tail as the next history'''
+        if self._history is None:
+            self._history = numpy.zeros((self._n_history, block.shape[1]))
+
+        extended = numpy.concatenate((self._history, block))
+        if self._n_history:
+            self._history = extended[-self._n_history:].copy()
+        return extended
+
+class _Decimator(_Stage):
+    '''a stage that keeps every `factor`th sample of its filtered output'''
+
+    def __init__(self, factor, history):
+        if factor < 1:
+            raise ValueError('factor must be at least 1')
+
+        super(_Decimator, self).__init__(history)
+        self.factor = factor
+        self._skip = 0
+
+    def reset(self):
+        super(_Decimator, self).reset()
+        self._skip = 0
+
+    def _advance(self, n):
+        '''number of outputs within the next `n` inputs, and where the first one is'''
+        first = self._skip
+        n_out = max(0, (n - first + self.factor - 1)//self.factor)
+        self._skip = first + n_out*self.factor - n
+        return first, n_out
+
+class FIRDecimator(_Decimator):
+    '''FIR lowpass filter followed by decimation, computed only at the kept samples
+
+    `taps` default to `lowpass_taps(factor)`. Only every `factor`th output is
+    computed: the filter is evaluated as one vectorized multiply-add per tap over
+    strided views of the input, so the cost is len(taps)/factor operations per input
+    sample and no (samples, taps) temporaries are created.
+    '''
+
+    def __init__(self, factor, taps=None):
+        taps = lowpass_taps(factor) if taps is None else numpy.asarray(taps, dtype=numpy.float64)
+        super(FIRDecimator, self).__init__(factor, len(taps) - 1)
+        self.taps = taps
+
+    def process(self, block):
+        extended = self._extend(block)
+        first, n_out = self._advance(block.shape[0])
+        n_taps = len(self.taps)
+
+        out = numpy.zeros((n_out, block.shape[1]))
+        if n_out == 0:
+            return out
+
+        tmp = numpy.empty_like(out)
+        stop = first + (n_out - 1)*self.factor + 1
+        # output i is sum_k taps[k]*x[first + i*factor - k], with x offset by the history
+        for k in range(n_taps):
+            start = first + n_taps - 1 - k
+            numpy.multiply(extended[start:start + stop - first:self.factor], self.taps[k], out=tmp)
+            out += tmp
+        return out
+
+class _MovingSum(_Stage):
+    '''sum over the last `length` samples, for each sample'''
+
+    def __init__(self, length):
+        if length < 1:
+            raise ValueError('length must be at least 1')
+        super(_MovingSum, self).__init__(length - 1)
+        self.length = length
+
+    def process(self, block):
+        extended = self._extend(block)
+        # differences of a running sum that restarts every block, so it cannot drift
+        total = numpy.empty((extended.shape[0] + 1, extended.shape[1]))
+        total[0] = 0.
+        numpy.cumsum(extended, axis=0, out=total[1:])
+        return total[self.length:] - total[:-self.length]
+
+class MovingAverage(object):
+    '''mean of the last `length` samples, one output per input sample'''
+
+    factor = 1
+
+    def __init__(self, length):
+        self._sum = _MovingSum(length)
+        self.length = length
+
+    def reset(self):
+        self._sum.reset()
+
+    def process(self, block):
+        out = self._sum.process(block)
+        out /= self.length
+        return out
+
+class CICDecimator(_Decimator):
+    '''cascaded integrator comb decimator of `order` stages
+
+    Equivalent to `order` cascaded moving sums of `factor` samples followed by
+    decimation by `factor`, scaled to unit gain at DC. It needs no multiplications
+    per tap, which makes it the cheap choice for large decimation factors; follow it
+    with a short FIRDecimator to flatten its passband if needed. The sums are
+    computed per block instead of with free running integrators, so floating point
+    input does not accumulate rounding error over long acquisitions.
+    '''
+
+    def __init__(self, factor, order=3):
+        super(CICDecimator, self).__init__(factor, 0)
+        self.order = order
+        self._sums = [_MovingSum(factor) for i in range(order)]
+        self._gain = float(factor)**order
+
+    def reset(self):
+        super(CICDecimator, self).reset()
+        for s in self._sums:
+            s.reset()
+
+    def process(self, block):
+        for s in self._sums:
+            block = s.process(block)
+
+        first, n_out = self._advance(block.shape[0])
+        out = block[first:first + n_out*self.factor:self.factor]
+        out /= self._gain
+        return out
+
+class Envelope(_Stage):
+    '''min and max of every `factor` consecutive samples
+
+    `process()` returns a (lo, hi) pair of (samples/factor, channels) arrays, so an
+    Envelope has to be the last stage of a Pipeline. Unlike averaging, it keeps
+    spikes and the full signal range visible after decimation, which is what a plot
+    wants.
+    '''
+
+    def __init__(self, factor):
+        if factor < 1:
+            raise ValueError('factor must be at least 1')
+        super(Envelope, self).__init__(0)
+        self.factor = factor
+        self._pending = None
+
+    def reset(self):
+        self._pending = None
+
+    def process(self, block):
+        if self._pending is not None and self._pending.shape[0] > 0:
+            block = numpy.concatenate((self._pending, block))
+
+        n_out = block.shape[0]//self.factor
+        used = n_out*self.factor
+        self._pending = block[used:].copy()
+
+        bins = block[:used].reshape(n_out, self.factor, block.shape[1])
+        return bins.min(axis=1), bins.max(axis=1)
+
+class Pipeline(object):
+    '''stages applied one after the other to every block
+
+        pipeline = Pipeline(CICDecimator(16), FIRDecimator(4), Envelope(8))
+        for block in stream:
+            lo, hi = pipeline.process(block)
+    '''
+
+    def __init__(self, *stages):
+        self.stages = list(stages)
+
+    factor = property(lambda self: int(numpy.prod([s.factor for s in self.stages])))
+
+    def reset(self):
+        for s in self.stages:
+            s.reset()
+
+    def process(self, block):
+        block = numpy.asarray(block, dtype=numpy.float64)
+        for s in self.stages:
+            block = s.process(block)
+        return block
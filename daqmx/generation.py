@@ -0,0 +1,235 @@
+from .defs import SampleMode, RegenMode, EventType
+from .errors import BufferUnderflowError, error_class
+from .lowlevel import resolve, set_timing_sample_clock, set_output_buffer_size, \
+    set_regeneration_mode, register_nsamples_callback, unregister_nsamples_callback, \
+    register_done_callback, unregister_done_callback, query_samples_generated, wait_until_done
+import threading
+import logging
+import numpy
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+log = logging.getLogger('daqmx')
+
+__all__ = ['generate_waveform', 'WaveformStreamer']
+
+def _as_samples(data):
+    '''(samples, channels) float64 view of `data`, copied only if it has to be'''
+    data = numpy.ascontiguousarray(data, dtype=numpy.float64)
+    return data.reshape(-1, 1) if data.ndim == 1 else data
+
+def generate_waveform(handle, waveform, rate, continuous=True, start=True, timeout=10.):
+    '''play a waveform of (samples, channels) from the output buffer, repeating it if `continuous`
+
+    The whole waveform is written to the device once and regenerated from there, so
+    nothing has to be written while it plays. Stop the task to end a continuous
+    generation, or `wait_until_done` for a single pass.
+    '''
+    handle = resolve(handle)
+    waveform = _as_samples(waveform)
+    n = waveform.shape[0]
+
+    set_timing_sample_clock(handle, rate, n, SampleMode.Continuous if continuous else SampleMode.Finite)
+    set_regeneration_mode(handle, RegenMode.Allow)
+    set_output_buffer_size(handle, n)
+    handle.write_f64_from(waveform, n, timeout)
+
+    if start:
+        handle.start()
+
+class WaveformStreamer(object):
+    '''streams a waveform too long for the output buffer, refilling the buffer as it plays
+
+    The output buffer holds `n_blocks` blocks of `block_samples` (two by default, a
+    double buffer). They are filled before the task starts; then every time the
+    device has taken a block out of the buffer, the Transferred_From_Buffer event
+    wakes the streamer's thread, which writes the next block into the space freed.
+    Regeneration is disabled, so if the writes fall behind the task stops with a
+    BufferUnderflowError rather than repeating old samples.
+
+    `source` is either an array of (samples, channels), e.g. a numpy.memmap of a
+    waveform on disk, or a function `fill(out)` that fills a (samples, channels)
+    block. Contiguous float64 arrays are written straight from their memory, block
+    by block, without a copy. An array source is played once; a function source
+    plays `n_samples` samples, or until `stop()` if that is None.
+
+        streamer = WaveformStreamer(ao_handle, numpy.load('sweep.npy', mmap_mode='r'), 1e6,
+                block_samples=1<<18)
+        streamer.start()
+        streamer.wait()
+
+    `min_ahead` is the fewest samples per channel that were left in the buffer when a
+    block was written, how close the generation came to an underflow.
+    '''
+
+    def __init__(self, handle, source, rate, block_samples, n_blocks=2, n_samples=None,
+            n_channels=None, timeout=10.):
+        if n_blocks < 2:
+            raise ValueError('n_blocks must be at least 2')
+
+        self._handle = resolve(handle)
+        self.rate = rate
+        self.block_samples = block_samples
+        self.n_blocks = n_blocks
+        self.timeout = timeout
+
+        if callable(source):
+            if n_channels is None:
+                raise ValueError('n_channels is needed for a function source')
+            self._fill = source
+            self._source = None
+            self.n_samples = n_samples
+            self._block = numpy.zeros((block_samples, n_channels))
+        else:
+            source = numpy.asarray(source)
+            self._fill = None
+            self._source = source.reshape(-1, 1) if source.ndim == 1 else source
+            self.n_samples = self._source.shape[0]
+            self._block = numpy.zeros((block_samples, self._source.shape[1]))
+
+        self.position = 0
+        self.blocks_written = 0
+        self.min_ahead = None
+        self.error = None
+
+        self._handle_started = False
+        self._events = queue.Queue()
+        self._done = threading.Event()
+        self._thread = None
+
+        # the callback store only holds weak references, keep the bound methods alive
+        self._on_transferred_ref = self._on_transferred
+        self._on_done_ref = self._on_done
+
+    is_running = property(lambda self: self._thread is not None and self._thread.is_alive())
+    is_done = property(lambda self: self._done.is_set())
+    finished = property(lambda self: self.n_samples is not None and self.position >= self.n_samples)
+
+    def _on_transferred(self, handle, event_type, n_samples, data):
+        # runs on a DAQmx thread, only wake the writer
+        self._events.put(n_samples)
+        return 0
+
+    def _on_done(self, handle, status, data):
+        if status:
+            self.error = error_class(status)(status)
+            log.error('waveform generation stopped: %s', self.error)
+        self._done.set()
+        self._events.put(None)
+        return 0
+
+    def _next_block(self):
+        '''the next block to write, None at the end of the waveform'''
+        n = self.block_samples
+        if self.n_samples is not None:
+            n = min(n, self.n_samples - self.position)
+        if n <= 0:
+            return None
+
+        if self._source is not None:
+            block = self._source[self.position:self.position + n]
+            if block.dtype != numpy.float64 or not block.flags.c_contiguous:
+                block = self._block[:n]
+                block[...] = self._source[self.position:self.position + n]
+        else:
+            block = self._block[:n]
+            self._fill(block)
+
+        self.position += n
+        return block
+
+    def _write_block(self):
+        block = self._next_block()
+        if block is None:
+            return False
+
+        self._handle.write_f64_from(block, block.shape[0], self.timeout)
+        self.blocks_written += 1
+
+        if self._handle_started:
+            ahead = self.position - block.shape[0] - query_samples_generated(self._handle)
+            if self.min_ahead is None or ahead < self.min_ahead:
+                self.min_ahead = ahead
+        return True
+
+    def _run(self):
+        while True:
+            if self._events.get() is None:
+                break
+            try:
+                self._write_block()
+            except BufferUnderflowError as e:
+                self.error = e
+                break
+            except Exception as e:
+                log.exception(e)
+                self.error = e
+                break
+
+    def start(self):
+        '''configure the task, fill the buffer and start the generation'''
+        if self.is_running:
+            raise RuntimeError('streamer is already running')
+
+        h = self._handle
+        buffer_samples = self.n_blocks*self.block_samples
+        if self.n_samples is None:
+            set_timing_sample_clock(h, self.rate, buffer_samples, SampleMode.Continuous)
+        else:
+            set_timing_sample_clock(h, self.rate, self.n_samples, SampleMode.Finite)
+        set_regeneration_mode(h, RegenMode.DoNotAllow)
+        set_output_buffer_size(h, buffer_samples)
+
+        self.position = 0
+        self.blocks_written = 0
+        self.min_ahead = None
+        self.error = None
+        self._done.clear()
+        self._handle_started = False
+        # the done event and stop() both end the writer, one of them is left over from the last run
+        self._events = queue.Queue()
+
+        register_nsamples_callback(h, self.block_samples, self._on_transferred_ref,
+                event_type=EventType.Transferred_From_Buffer)
+        register_done_callback(h, self._on_done_ref)
+
+        for i in range(self.n_blocks):
+            if not self._write_block():
+                break
+
+        self._thread = threading.Thread(target=self._run, name='daqmx-generator')
+        self._thread.daemon = True
+        self._thread.start()
+
+        try:
+            h.start()
+            self._handle_started = True
+        except Exception:
+            self._events.put(None)
+            raise
+
+    def wait(self, timeout=-1):
+        '''wait until a finite waveform has been generated, raising the error it stopped with'''
+        if self.n_samples is None:
+            raise RuntimeError('a continuous generation only ends with stop()')
+
+        wait_until_done(self._handle, timeout)
+        if self.error is not None:
+            raise self.error
+
+    def stop(self):
+        '''stop the writer thread and the task'''
+        try:
+            # the writer goes first, a write landing after the stop would be
+            # written to the beginning of the buffer of the next start
+            if self._thread is not None:
+                self._events.put(None)
+                self._thread.join()
+                self._thread = None
+        finally:
+            self._handle.stop()
+            unregister_nsamples_callback(self._handle, EventType.Transferred_From_Buffer)
+            unregister_done_callback(self._handle)
@@ -0,0 +1,180 @@
+from .data import AnalogF64
+from .defs import TaskAttributes, SampleMode, ActiveEdge, FillMode, TaskState
+from .lowlevel import resolve, set_timing_sample_clock, set_start_trigger_digital_edge, \
+    control_task
+import numpy
+import logging
+
+log = logging.getLogger('daqmx')
+
+__all__ = ['TaskGroup']
+
+class TaskGroup(object):
+    '''analog input tasks on several devices that acquire as one
+
+    The first task is the master. `configure()` times it from its onboard clock and
+    makes every other task (the slaves) take its sample clock and wait for its start
+    trigger, so all tasks acquire the same sample instants. `start()` arms the slaves
+    before starting the master, `read()` reads the same number of samples from each
+    task into one buffer.
+
+        group = TaskGroup([h_dev1, h_dev2])
+        group.configure(1e5, 1000, SampleMode.Continuous)
+        group.start()
+        data = group.read(1000, timeout=1.)
+
+    The aligned buffer is laid out (channels, samples), channels in task order. With
+    that layout each task's rows are contiguous, so DAQmx reads straight into the
+    shared buffer (FillMode.GroupByChannel) and nothing is copied. The per task reads
+    are set up once per buffer, a read of the group is one C call per task.
+
+    When a task returns more samples than the others, the extra samples are held back
+    and come first in the next read, so the tasks never fall out of step.
+    '''
+
+    def __init__(self, handles):
+        if len(handles) < 1:
+            raise ValueError('a group needs at least one task')
+
+        self._handles = [resolve(h) for h in handles]
+        self._n_channels = []
+        self._channels = []
+        for h in self._handles:
+            names = TaskAttributes.get(h.value, 'channels')
+            names = [x.strip() for x in names.split(',')] if names else []
+            self._n_channels.append(len(names))
+            self._channels += names
+
+        self._out = None
+        self._reads = None
+        self._surplus = [numpy.empty((n, 0)) for n in self._n_channels]
+        self._running = False
+
+    master = property(lambda self: self._handles[0])
+    slaves = property(lambda self: self._handles[1:])
+    handles = property(lambda self: list(self._handles))
+    channels = property(lambda self: list(self._channels))
+    n_channels = property(lambda self: len(self._channels))
+    is_running = property(lambda self: self._running)
+
+    def _device(self, handle):
+        devices = TaskAttributes.get(handle.value, 'devices')
+        return devices.split(',')[0].strip()
+
+    def configure(self, rate, n_samples, sample_mode=SampleMode.Continuous,
+            share_clock=True, share_trigger=True):
+        '''time all tasks from the master's sample clock and start trigger
+
+        With `share_clock` False the slaves use their own onboard clocks at the same
+        rate (they still start together, but may drift apart over long acquisitions).
+        '''
+        device = self._device(self.master)
+        set_timing_sample_clock(self.master, rate, n_samples, sample_mode)
+
+        for h in self.slaves:
+            if share_clock:
+                source = '/{}/ai/SampleClock'.format(device)
+                set_timing_sample_clock(h, rate, n_samples, sample_mode, source=source)
+            else:
+                set_timing_sample_clock(h, rate, n_samples, sample_mode)
+
+            if share_trigger:
+                set_start_trigger_digital_edge(h, '/{}/ai/StartTrigger'.format(device), ActiveEdge.Rising)
+
+    def start(self):
+        '''commit all tasks, start the slaves and then the master'''
+        if self._running:
+            raise RuntimeError('group is already running')
+
+        # programming the hardware up front keeps the time between the starts short
+        for h in self._handles:
+            control_task(h, TaskState.Commit)
+
+        started = []
+        try:
+            for h in self.slaves + [self.master]:
+                h.start()
+                started.append(h)
+        except Exception:
+            for h in started:
+                try:
+                    h.stop()
+                except Exception as e:
+                    log.warning(e)
+            raise
+
+        self._surplus = [numpy.empty((n, 0)) for n in self._n_channels]
+        self._running = True
+
+    def stop(self):
+        '''stop the master, which stops the sample clock, and then the slaves'''
+        errors = []
+        for h in [self.master] + self.slaves:
+            try:
+                h.stop()
+            except Exception as e:
+                errors.append(e)
+
+        self._running = False
+        if errors:
+            raise errors[0]
+
+    def _prepare(self, out):
+        # per task (read, view) pairs for this buffer, reused while it does not change
+        reads = []
+        row = 0
+        for h, n in zip(self._handles, self._n_channels):
+            reads.append((h.read_f64_into, out[row:row + n]))
+            row += n
+
+        self._out = out
+        self._reads = reads
+
+    def read_into(self, out, n_samps_per_channel, timeout=10.):
+        '''read `n_samps_per_channel` samples of every task into `out`
+
+        `out` is a C contiguous float64 array of shape (channels, n_samps_per_channel).
+        Returns the number of samples per channel that every task has read; columns
+        past that are not aligned. Samples a task read past that count are kept for the
+        next call. Reuse the same `out` to keep reads cheap.
+        '''
+        if out.shape != (len(self._channels), n_samps_per_channel) or not out.flags.c_contiguous:
+            raise ValueError('out must be a contiguous ({}, {}) array'.format(len(self._channels), n_samps_per_channel))
+
+        if out is not self._out:
+            self._prepare(out)
+
+        counts = []
+        for i, (read, view) in enumerate(self._reads):
+            held = self._surplus[i]
+            m = min(held.shape[1], n_samps_per_channel)
+            n = 0
+            if m < n_samps_per_channel:
+                n = read(view, n_samps_per_channel - m, timeout, FillMode.GroupByChannel)
+                if m or n < n_samps_per_channel:
+                    # a short read packs the channels n samples apart, spread them out again
+                    k = view.shape[0]
+                    view[:, m:m + n] = view.reshape(-1)[:k*n].reshape(k, n).copy()
+            if m:
+                view[:, :m] = held[:, :m]
+                self._surplus[i] = held[:, m:]
+            counts.append(m + n)
+
+        count = min(counts)
+        for i, (read, view) in enumerate(self._reads):
+            if counts[i] > count:
+                # keep what this task read ahead of the others, in front of anything still held
+                self._surplus[i] = numpy.concatenate((view[:, count:counts[i]], self._surplus[i]), axis=1)
+        return count
+
+    def read(self, n_samps_per_channel, timeout=10., out=None):
+        '''read `n_samps_per_channel` aligned samples of all tasks
+
+        Returns an AnalogF64 in FillMode.GroupByChannel layout named after all channels
+        of the group, `by_scan` gives the (samples, channels) view.
+        '''
+        if out is None:
+            out = numpy.empty((len(self._channels), n_samps_per_channel))
+
+        count = self.read_into(out, n_samps_per_channel, timeout)
+        return AnalogF64(out[:, :count], count, self._channels, FillMode.GroupByChannel)
@@ -0,0 +1,264 @@
+'''opt-in timing and accounting of every DAQmx call
+
+    from daqmx import instrument
+    instrument.enable()
+    ...
+    print(instrument.prometheus())
+
+`enable()` replaces the `lib` object that the daqmx modules call through with a proxy
+that times each call and records, per function and task, the number of calls, a
+latency histogram, the error and warning codes returned and the bytes read or written. Nothing
+is recorded, and nothing costs anything, until it is enabled. `section()` times python
+code into the same statistics, to tell driver time from time spent around it.
+
+This module is not imported by the `daqmx` package.
+'''
+from .cdefs import header_str
+from . import clib
+import collections
+import contextlib
+import threading
+import bisect
+import time
+import sys
+import re
+
+__all__ = ['enable', 'disable', 'is_enabled', 'reset', 'snapshot', 'prometheus', 'section',
+    'InstrumentedLib', 'Stats']
+
+if sys.version_info[0] >= 3:
+    _clock = time.perf_counter
+else:
+    _clock = time.clock if sys.platform == 'win32' else time.time
+
+# upper bounds of the latency histogram buckets, in seconds
+BUCKETS = [float('{:g}'.format(m*10.**e)) for e in range(-6, 1) for m in (1., 2.5, 5.)] + [10.]
+
+# functions whose first argument is a task handle, they are accounted per task
+_task_functions = frozenset(re.findall(r'int32\s+(DAQmx\w+)\s*\(\s*TaskHandle\b', header_str))
+
+# reads and writes whose bytes are counted: (bytes per sample, index of the samples
+# read or written argument)
+_sample_sizes = {
+    'DAQmxReadDigitalU8': (1, 6),
+    'DAQmxReadDigitalU32': (4, 6),
+    'DAQmxReadCounterF64': (8, 5),
+    'DAQmxReadCounterU32': (4, 5),
+    'DAQmxWriteAnalogF64': (8, 6),
+    'DAQmxWriteDigitalU8': (1, 6),
+    'DAQmxWriteDigitalU32': (4, 6),
+}
+
+class _Entry(object):
+    __slots__ = ('count', 'total', 'max', 'buckets', 'codes', 'bytes')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.
+        self.max = 0.
+        self.buckets = [0]*(len(BUCKETS) + 1)
+        self.codes = collections.Counter()
+        self.bytes = 0
+
+class Stats(object):
+    '''call statistics keyed by (function, task)'''
+
+    def __init__(self):
+        self._entries = collections.defaultdict(_Entry)
+        self._lock = threading.Lock()
+
+    def record(self, function, task, seconds, code=0, nbytes=0):
+        with self._lock:
+            e = self._entries[(function, task)]
+            e.count += 1
+            e.total += seconds
+            if seconds > e.max: e.max = seconds
+            e.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+            if code: e.codes[code] += 1
+            e.bytes += nbytes
+
+    def reset(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self):
+        '''{(function, task): {...}} copy of the statistics'''
+        with self._lock:
+            return dict(((k, {
+                'count': e.count,
+                'total_s': e.total,
+                'max_s': e.max,
+                'buckets': list(zip(BUCKETS + [float('inf')], e.buckets)),
+                'errors': dict((c, n) for c, n in e.codes.items() if c < 0),
+                'warnings': dict((c, n) for c, n in e.codes.items() if c > 0),
+                'bytes': e.bytes,
+            }) for k, e in self._entries.items()))
+
+class InstrumentedLib(object):
+    '''proxy for a cffi lib that records every DAQmx function call in `stats`
+
+    Constants and other attributes are passed through. Wrapped functions are created
+    on first use and then found in the instance dictionary, like attributes of lib.
+    '''
+
+    def __init__(self, lib, stats):
+        self.__dict__['_lib'] = lib
+        self.__dict__['_stats'] = stats
+        self.__dict__['_n_channels'] = {}
+
+    def __getattr__(self, name):
+        value = getattr(self._lib, name)
+        if name.startswith('DAQmx') and callable(value):
+            value = self._wrap(name, value)
+            self.__dict__[name] = value
+        return value
+
+    def __setattr__(self, name, value):
+        # e.g. lib.realtime of the simulated driver
+        setattr(self._lib, name, value)
+
+    def _task_name(self, handle):
+        from .lowlevel import task_map
+        return task_map.inv.get(handle, str(handle))
+
+    def _channels(self, handle):
+        n = self._n_channels.get(handle)
+        if n is None:
+            p = clib.ffi.new('uInt32 *')
+            if self._lib.DAQmxGetTaskAttribute(handle, self._lib.DAQmx_Task_NumChans, p) == 0:
+                n = self._n_channels[handle] = p[0]
+            else:
+                n = 1
+        return n
+
+    def _wrap(self, name, fn):
+        stats = self._stats
+        per_task = name in _task_functions
+
+        if name == 'DAQmxReadAnalogF64':
+            count = lambda args: args[6][0]*self._channels(args[0])*8
+        elif name == 'DAQmxReadRaw':
+            count = lambda args: args[5][0]*self._channels(args[0])*args[6][0]
+        elif name in _sample_sizes:
+            size, i = _sample_sizes[name]
+            count = lambda args: args[i][0]*self._channels(args[0])*size
+        else:
+            count = None
+
+        # every DAQmxCreate*Chan adds channels to the task
+        if name == 'DAQmxClearTask' or (name.startswith('DAQmxCreate') and name.endswith('Chan')):
+            forget = self._n_channels.pop
+        else:
+            forget = None
+
+        # getters return the buffer size they need when passed NULL, that is no warning
+        warns = not name.startswith('DAQmxGet')
+
+        def call(*args):
+            t0 = _clock()
+            res = fn(*args)
+            dt = _clock() - t0
+
+            task = self._task_name(args[0]) if per_task else ''
+            nbytes = count(args) if count is not None and res >= 0 else 0
+            if forget is not None: forget(args[0], None)
+            code = res if res < 0 or warns else 0
+            stats.record(name, task, dt, code, nbytes)
+            return res
+
+        call.__name__ = name
+        return call
+
+stats = Stats()
+_original = None
+
+def _swap(new):
+    '''point every loaded daqmx module, and the cached Handles, at `new`'''
+    old = clib.lib
+    for mod in list(sys.modules.values()):
+        if mod is not None and getattr(mod, '__name__', '').startswith('daqmx') and \
+                getattr(mod, 'lib', None) is old:
+            mod.lib = new
+
+    from .lowlevel import handle_cache, _HandleState
+    for h in handle_cache.values():
+        h._start = new.DAQmxStartTask
+        h._stop = new.DAQmxStopTask
+        h._read_f64 = new.DAQmxReadAnalogF64
+        h._write_f64 = new.DAQmxWriteAnalogF64
+        # digital read functions are looked up again on the next read, in every thread
+        h._state = _HandleState()
+
+def enable():
+    '''start recording DAQmx calls
+
+    Handles created before are switched over as well, functions that callers looked
+    up on `lib` themselves are not.
+    '''
+    global _original
+    if _original is not None: return
+    _original = clib.lib
+    _swap(InstrumentedLib(_original, stats))
+
+def disable():
+    '''stop recording, the statistics are kept'''
+    global _original
+    if _original is None: return
+    _swap(_original)
+    _original = None
+
+def is_enabled():
+    return _original is not None
+
+def reset():
+    stats.reset()
+
+def snapshot():
+    '''the statistics as {(function, task): {count, total_s, max_s, buckets, errors, warnings, bytes}}'''
+    return stats.snapshot()
+
+@contextlib.contextmanager
+def section(name, task=''):
+    '''time a block of python code into the statistics as function `name`'''
+    t0 = _clock()
+    try:
+        yield
+    finally:
+        stats.record(name, task, _clock() - t0)
+
+def _labels(function, task, **extra):
+    labels = [('function', function), ('task', task)] + sorted(extra.items())
+    return '{' + ','.join('{}="{}"'.format(k, str(v).replace('\\', r'\\').replace('"', r'\"'))
+            for k, v in labels) + '}'
+
+def prometheus(prefix='daqmx'):
+    '''the statistics in the Prometheus text exposition format'''
+    snap = sorted(snapshot().items())
+    lines = []
+
+    lines.append('# HELP {}_call_seconds Duration of DAQmx calls.'.format(prefix))
+    lines.append('# TYPE {}_call_seconds histogram'.format(prefix))
+    for (function, task), s in snap:
+        total = 0
+        for bound, n in s['buckets']:
+            total += n
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append('{}_call_seconds_bucket{} {}'.format(prefix, _labels(function, task, le=le), total))
+        lines.append('{}_call_seconds_sum{} {!r}'.format(prefix, _labels(function, task), s['total_s']))
+        lines.append('{}_call_seconds_count{} {}'.format(prefix, _labels(function, task), s['count']))
+
+    lines.append('# HELP {}_call_codes_total Nonzero status codes returned by DAQmx calls.'.format(prefix))
+    lines.append('# TYPE {}_call_codes_total counter'.format(prefix))
+    for (function, task), s in snap:
+        for kind in ('errors', 'warnings'):
+            for code, n in sorted(s[kind].items()):
+                lines.append('{}_call_codes_total{} {}'.format(prefix,
+                    _labels(function, task, code=code, kind=kind[:-1]), n))
+
+    lines.append('# HELP {}_transferred_bytes_total Bytes read from or written to DAQmx buffers.'.format(prefix))
+    lines.append('# TYPE {}_transferred_bytes_total counter'.format(prefix))
+    for (function, task), s in snap:
+        if s['bytes']:
+            lines.append('{}_transferred_bytes_total{} {}'.format(prefix, _labels(function, task), s['bytes']))
+
+    return '\n'.join(lines) + '\n'
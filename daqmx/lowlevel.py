@@ -1,22 +1,171 @@
-from .clib import (ffi, lib, handle_error)
-from .defs import SystemAttributes, Units, SampleMode, ActiveEdge, \
-    EventType, SynchronousEventCallbacks, FillMode, Read, TerminalConfig
+from .clib import (ffi, lib, handle_error, handle_warning)
+from .compat import string_types, integer_types, to_bytes
+from .cache import attribute_cache
+import numpy
+from .defs import SystemAttributes, TaskAttributes, Units, SampleMode, ActiveEdge, \
+    EventType, SynchronousEventCallbacks, FillMode, Read, TerminalConfig, LineGrouping, \
+    CountDirection, CounterUnits, CounterMethod
+from .channels import expand_channels, compress_channels, channel_runs, ChannelTable
 from bidict import bidict
+import threading
 import weakref
 import logging
 
 log = logging.getLogger('daqmx')
 
 __all__ = ['query_devices', 'query_tasks', 'query_version', 'make_task', 'clear_task', 
-    'control_task', 'query_task_is_done', 'start_task', 'stop_task', 'reset_device', 
-    'read_f64']
+    'control_task', 'query_task_is_done', 'query_available_samples', 'start_task', 'stop_task', 'reset_device', 
+    'read_f64', 'read_f64_into', 'read_raw_into', 'add_input_voltage_channels', 'query_scaling_coeffs', 'Handle', 'resolve',
+    'add_output_voltage_channels', 'write_f64', 'wait_for_next_sample_clock', 'set_regeneration_mode',
+    'query_write_space', 'query_samples_generated', 'wait_until_done', 'add_digital_input_channels',
+    'add_digital_output_channels', 'read_digital_into', 'write_digital', 'add_counter_edge_channel',
+    'add_counter_period_channel', 'add_counter_frequency_channel', 'read_counter_into']
 
 '''holds mapping between created task and handle'''
 task_map = bidict()
 
+'''holds Handle objects created by resolve(), by native handle'''
+handle_cache = {}
+
 '''holds callbacks registered'''
 callback_store = weakref.WeakKeyDictionary()
 
+def _native(handle):
+    '''return the native TaskHandle for a handle, task name or Handle'''
+    if isinstance(handle, integer_types):
+        return handle
+    elif isinstance(handle, Handle):
+        return handle.value
+    elif isinstance(handle, string_types):
+        return task_map[handle]
+    else:
+    	raise TypeError('handle must be integer, string or Handle')
+
+class _HandleState(threading.local):
+    '''the output arguments and cached buffer pointers of a Handle, one set per thread'''
+
+    def __init__(self):
+        self.count_p = ffi.new('int32 *')
+        self.written_p = ffi.new('int32 *')
+        self.out = None
+        self.out_p = None
+        self.src = None
+        self.src_p = None
+        self.dig = None
+        self.dig_p = None
+        self.read_digital = None
+
+class Handle(object):
+    '''a task handle that has been resolved once, with bound fast path methods
+
+    The functions in this module accept a native handle or a task name and work out 
+    which one they were given on every call. A Handle does that once, when created 
+    by `resolve()`, and keeps the native TaskHandle, the DAQmx functions it calls 
+    and the output arguments it needs, so that e.g. `read_f64_into` costs a single C 
+    call. Handles can be passed to every function in this module as well.
+
+    `resolve()` hands out one Handle per task, which may be used from several threads 
+    at once, e.g. a StreamServer and a RingBuffer reader. The output arguments and 
+    buffer pointers are therefore kept per thread.
+    '''
+    __slots__ = ('value', 'name', '_state', '_start', '_stop', '_read_f64', '_write_f64')
+
+    def __init__(self, value, name=None):
+        self.value = value
+        self.name = name
+        self._state = _HandleState()
+
+        # looking functions up on lib is not free, do it once
+        self._start = lib.DAQmxStartTask
+        self._stop = lib.DAQmxStopTask
+        self._read_f64 = lib.DAQmxReadAnalogF64
+        self._write_f64 = lib.DAQmxWriteAnalogF64
+
+    def __int__(self):
+        return self.value
+
+    def __repr__(self):
+        return 'Handle({}, name={!r})'.format(self.value, self.name)
+
+    def start(self):
+        res = self._start(self.value)
+        if res: handle_error(res)
+
+    def stop(self):
+        res = self._stop(self.value)
+        if res: handle_error(res)
+
+    def read_f64_into(self, out, n_samps_per_channel=Read.All, timeout=0., 
+            fill_mode=FillMode.GroupByScanNumber):
+        '''read into `out` and return the number of samples per channel read
+
+        Like the module level `read_f64_into`, but returns only the count. The pointer 
+        to `out` is kept, so reading into the same array again skips `ffi.from_buffer`.
+        '''
+        s = self._state
+        if out is not s.out:
+            s.out_p = ffi.cast('float64 *', ffi.from_buffer(out))
+            s.out = out
+
+        res = self._read_f64(self.value, n_samps_per_channel, timeout, fill_mode, 
+                s.out_p, out.size, s.count_p, ffi.NULL)
+        if res: handle_warning(res)
+
+        return s.count_p[0]
+
+    def read_digital_into(self, out, n_samps_per_channel=Read.All, timeout=0., 
+            fill_mode=FillMode.GroupByScanNumber):
+        '''read packed digital samples into a uint8 or uint32 `out`, see `read_f64_into`'''
+        s = self._state
+        if out is not s.dig:
+            s.read_digital, ctype = _digital_function('DAQmxReadDigital', out.dtype)
+            s.dig_p = ffi.cast(ctype, ffi.from_buffer(out))
+            s.dig = out
+
+        res = s.read_digital(self.value, n_samps_per_channel, timeout, fill_mode, 
+                s.dig_p, out.size, s.count_p, ffi.NULL)
+        if res: handle_warning(res)
+
+        return s.count_p[0]
+
+    def write_f64_from(self, data, n_samps_per_channel=None, timeout=10., 
+            layout=FillMode.GroupByScanNumber):
+        '''write float64 samples straight from `data` and return the samples per channel written
+
+        `data` has to be a C contiguous float64 array, it is not copied. Like 
+        `read_f64_into`, the pointer to `data` is kept, so writing from the same 
+        array again costs a single C call.
+        '''
+        s = self._state
+        if data is not s.src:
+            if data.dtype != numpy.float64 or not data.flags.c_contiguous:
+                raise ValueError('data must be a C contiguous float64 array')
+            s.src_p = ffi.cast('float64 *', ffi.from_buffer(data))
+            s.src = data
+
+        if n_samps_per_channel is None:
+            n_samps_per_channel = data.shape[0] if data.ndim == 1 or layout == FillMode.GroupByScanNumber \
+                    else data.shape[1]
+
+        res = self._write_f64(self.value, n_samps_per_channel, 0, timeout, layout, s.src_p, 
+                s.written_p, ffi.NULL)
+        if res: handle_warning(res)
+
+        return s.written_p[0]
+
+def resolve(handle):
+    '''return the Handle for a native handle or task name, creating it once'''
+    if isinstance(handle, Handle):
+        return handle
+
+    value = _native(handle)
+    h = handle_cache.get(value)
+    if h is None:
+        h = Handle(value, task_map.inv.get(value))
+        handle_cache[value] = h
+
+    return h
+
 def query_devices():
     '''get devices that NIDAQmx knows about '''
     # TODO: eventually this should return Device classes
@@ -24,7 +173,7 @@ def query_devices():
     tstr = SystemAttributes.get('devices')
     
     if tstr is not None:
-        return [x for x in tstr.split(',')]
+        return [x.strip() for x in tstr.split(',')]
     else:
         return []
 
@@ -34,7 +183,8 @@ def reset_device(name):
     Immediately aborts all tasks associated with a device and returns the device to an 
     initialized state. Aborting a task stops and releases any resources the task reserved.
     '''
-    res = lib.DAQmxResetDevice(name)
+    res = lib.DAQmxResetDevice(to_bytes(name))
+    attribute_cache.invalidate(('device', name))
     handle_error(res)
 
 def query_tasks():
@@ -49,9 +199,9 @@ def query_version():
 
 def make_task(task_name):
     '''create a task and return a handle to that task'''
-    if isinstance(task_name, basestring):
+    if isinstance(task_name, string_types):
         p = ffi.new('TaskHandle *')
-        res = lib.DAQmxCreateTask(task_name, p)
+        res = lib.DAQmxCreateTask(to_bytes(task_name), p)
         handle_error(res)
         task_map.update({task_name: p[0]})
         return p[0]
@@ -62,61 +212,46 @@ def clear_task(handle):
     '''remove task from the system, stopping it if necessary
     '''
 
-    if isinstance(handle, (int, long)):
-        res = lib.DAQmxClearTask(handle)
-        del task_map[:handle]
-        handle_error(res)
-    elif isinstance(handle, basestring):
-        h = task_map[handle]
-        res = lib.DAQmxClearTask(h)
-        del task_map[handle]
-        handle_error(res)
-    else:
-    	raise TypeError('handle must be integer')
+    handle = _native(handle)
+    res = lib.DAQmxClearTask(handle)
+    task_map.inv.pop(handle, None)
+    handle_cache.pop(handle, None)
+    attribute_cache.invalidate(handle)
+    handle_error(res)
 
 def start_task(handle):
     '''begin measurement or generation
     '''
 
-    if isinstance(handle, (int, long)):
-        res = lib.DAQmxStartTask(handle)
-        handle_error(res)
-    elif isinstance(handle, basestring):
-        h = task_map[handle]
-        res = lib.DAQmxStartTask(h)
-        handle_error(res)
-    else:
-    	raise TypeError('handle must be integer')
+    handle = _native(handle)
+    res = lib.DAQmxStartTask(handle)
+    handle_error(res)
 
 def stop_task(handle):
     '''stops measurement or generation
     '''
-    if isinstance(handle, (int, long)):
-        res = lib.DAQmxStopTask(handle)
-        handle_error(res)
-    elif isinstance(handle, basestring):
-        h = task_map[handle]
-        res = lib.DAQmxStopTask(h)
-        handle_error(res)
-    else:
-    	raise TypeError('handle must be integer')
+    handle = _native(handle)
+    res = lib.DAQmxStopTask(handle)
+    handle_error(res)
 
 def query_task_is_done(handle):
     '''checks if task completed measurement
     '''
-    if isinstance(handle, (int, long)):
-        done_p = ffi.new('bool32 *')
-        res = lib.DAQmxIsTaskDone(handle, done_p)
-        handle_error(res)
-        return bool(done_p[0])
-    elif isinstance(handle, basestring):
-        h = task_map[handle]
-        done_p = ffi.new('bool32 *')
-        res = lib.DAQmxIsTaskDone(h, done_p)
-        handle_error(res)
-        return bool(done_p[0])
-    else:
-    	raise TypeError('handle must be integer')
+    handle = _native(handle)
+    done_p = ffi.new('bool32 *')
+    res = lib.DAQmxIsTaskDone(handle, done_p)
+    handle_error(res)
+    return bool(done_p[0])
+
+def query_available_samples(handle):
+    '''number of samples per channel waiting in the input buffer
+    '''
+    handle = _native(handle)
+
+    avail_p = ffi.new('uInt32 *')
+    res = lib.DAQmxGetReadAvailSampPerChan(handle, avail_p)
+    handle_error(res)
+    return avail_p[0]
 
 def control_task(handle, task_state):
     '''advanced function that causes task to transition states
@@ -134,15 +269,9 @@ def control_task(handle, task_state):
     TaskState.Abort   Abort is used to stop an operation, such as Read or Write, that is currently active. Abort puts the task into an unstable but recoverable state. To recover the task, call Start to restart the task or call Stop to reset the task without starting it. 
     '''
 
-    if isinstance(handle, (int, long)):
-        res = lib.DAQmxTaskControl(handle, task_state)
-        handle_error(res)
-    elif isinstance(handle, basestring):
-        h = task_map[handle]
-        res = lib.DAQmxTaskControl(h, task_state)
-        handle_error(res)
-    else:
-    	raise TypeError('handle must be integer')
+    handle = _native(handle)
+    res = lib.DAQmxTaskControl(handle, task_state)
+    handle_error(res)
 
 def load_task(name):
     raise NotImplementedError('loading a task from MAX is not implemented yet')
@@ -153,6 +282,7 @@ def add_input_voltage_channel(handle, pchannel, min, max, units=Units.Volts, nam
 
     '''
     if name is None: name = ffi.NULL
+    else: name = to_bytes(name)
     if units is not Units.FromCustomScale: custom_scale = ffi.NULL 
     
     log.info('adding voltage channel %s', str(pchannel))
@@ -162,38 +292,200 @@ def add_input_voltage_channel(handle, pchannel, min, max, units=Units.Volts, nam
     log.debug('calling with f(%s, %s, %f, %f, %s, %s, %s, %s',
             handle, pchannel, min, max, units, name, str(term_config), str(custom_scale))
 
-    if isinstance(handle, (int, long)):
-        res = lib.DAQmxCreateAIVoltageChan(handle, pchannel, name, term_config, min, max, units, custom_scale)
-        handle_error(res)
-    elif isinstance(handle, basestring):
-        h = task_map[handle]
-        res = lib.DAQmxCreateAIVoltageChan(h, pchannel, name, term_config, min, max, units, custom_scale)
-        handle_error(res)
-    else:
-    	raise TypeError('handle must be integer or string')
+    pchannel = to_bytes(pchannel)
+
+    handle = _native(handle)
+    res = lib.DAQmxCreateAIVoltageChan(handle, pchannel, name, term_config, min, max, units, custom_scale)
+    attribute_cache.invalidate(handle)
+    handle_error(res)
+
+def add_input_voltage_channels(handle, pchannels, min, max, units=Units.Volts, names=None, \
+        term_config=TerminalConfig.Default, table=None):
+    '''adds many analog input channels to a task with as few DAQmx calls as possible
+
+    `pchannels` uses DAQmx physical channel syntax ('Dev1/ai0:31, Dev2/ai0:31') or is a 
+    list of names. `min` and `max` are either one value for all channels or one per 
+    channel, `names` is None (channels are named after their physical channel) or one 
+    name per channel. Runs of consecutive physical channels with the same range are 
+    created by a single DAQmxCreateAIVoltageChan call.
+
+    The channels are appended to `table`, or a new ChannelTable, which is returned.
+    Each run is appended as soon as it is created, so when a later run fails the
+    table still matches the channels left in the task.
+    '''
+    physical = expand_channels(pchannels)
+    n = len(physical)
+    if isinstance(names, string_types): names = expand_channels(names)
+    if names is None: names = physical
+    if len(names) != n:
+        raise ValueError('{} names for {} physical channels'.format(len(names), n))
+
+    mins = numpy.broadcast_to(numpy.asarray(min, dtype=numpy.float64), (n,))
+    maxs = numpy.broadcast_to(numpy.asarray(max, dtype=numpy.float64), (n,))
+
+    if table is None: table = ChannelTable()
+
+    handle = _native(handle)
+    for start, stop in channel_runs(physical, mins, maxs):
+        pchannel = to_bytes(compress_channels(physical[start:stop]))
+        name = ffi.NULL if names is physical else to_bytes(','.join(names[start:stop]))
+        res = lib.DAQmxCreateAIVoltageChan(handle, pchannel, name, term_config, mins[start], 
+                maxs[start], units, ffi.NULL)
+        if res:
+            attribute_cache.invalidate(handle)
+            handle_error(res)
+        table.extend(names[start:stop], physical[start:stop], mins[start:stop], maxs[start:stop],
+                units, term_config)
+
+    attribute_cache.invalidate(handle)
+    log.info('added %d voltage channels', n)
+    return table
+
+def add_output_voltage_channels(handle, pchannels, min, max, units=Units.Volts, names=None, 
+        table=None):
+    '''adds analog output channels to a task, see `add_input_voltage_channels`
+
+    The channels are appended to `table`, or a new ChannelTable, which is returned.
+    '''
+    physical = expand_channels(pchannels)
+    n = len(physical)
+    if isinstance(names, string_types): names = expand_channels(names)
+    if names is None: names = physical
+    if len(names) != n:
+        raise ValueError('{} names for {} physical channels'.format(len(names), n))
+
+    mins = numpy.broadcast_to(numpy.asarray(min, dtype=numpy.float64), (n,))
+    maxs = numpy.broadcast_to(numpy.asarray(max, dtype=numpy.float64), (n,))
+
+    if table is None: table = ChannelTable()
+
+    handle = _native(handle)
+    for start, stop in channel_runs(physical, mins, maxs):
+        pchannel = to_bytes(compress_channels(physical[start:stop]))
+        name = ffi.NULL if names is physical else to_bytes(','.join(names[start:stop]))
+        res = lib.DAQmxCreateAOVoltageChan(handle, pchannel, name, mins[start], maxs[start], 
+                units, ffi.NULL)
+        if res:
+            attribute_cache.invalidate(handle)
+            handle_error(res)
+        table.extend(names[start:stop], physical[start:stop], mins[start:stop], maxs[start:stop],
+                units, TerminalConfig.Default)
+
+    attribute_cache.invalidate(handle)
+    log.info('added %d output voltage channels', n)
+    return table
+
+def _add_digital_channels(create, handle, lines, names, grouping):
+    handle = _native(handle)
+    if not isinstance(lines, string_types): lines = ', '.join(lines)
+    if names is None: names = ffi.NULL
+    elif isinstance(names, string_types): names = to_bytes(names)
+    else: names = to_bytes(','.join(names))
+
+    res = create(handle, to_bytes(lines), names, grouping)
+    attribute_cache.invalidate(handle)
+    handle_error(res)
+
+def add_digital_input_channels(handle, lines, names=None, grouping=LineGrouping.AllLines):
+    '''adds digital input lines to a task
+
+    `lines` are lines or whole ports in DAQmx syntax ('Dev1/port0/line0:31', 'Dev1/port0') 
+    or a list of them. With LineGrouping.AllLines they become one channel whose samples 
+    are the lines packed into a word, bit k for line k of the port, which is what 
+    `read_digital_into` reads fastest. LineGrouping.PerLine makes a channel per line.
+    '''
+    _add_digital_channels(lib.DAQmxCreateDIChan, handle, lines, names, grouping)
+    log.info('added digital input channels %s', lines)
+
+def add_digital_output_channels(handle, lines, names=None, grouping=LineGrouping.AllLines):
+    '''adds digital output lines to a task, see `add_digital_input_channels`'''
+    _add_digital_channels(lib.DAQmxCreateDOChan, handle, lines, names, grouping)
+    log.info('added digital output channels %s', lines)
+
+def _set_counter_terminal(setter, handle, channel, terminal):
+    if terminal is None: return
+    res = setter(handle, channel, to_bytes(terminal))
+    handle_error(res)
+
+def add_counter_edge_channel(handle, counter, name=None, edge=ActiveEdge.Rising, initial_count=0, 
+        direction=CountDirection.Up, terminal=None):
+    '''adds a channel counting the edges on a counter's input, e.g. 'Dev1/ctr0'
+
+    Untimed, each read returns the count so far; with a sample clock the count is 
+    latched on every clock edge and buffered. `terminal` routes another signal, such 
+    as '/Dev1/PFI8', to the counter.
+    '''
+    handle = _native(handle)
+    channel = to_bytes(name if name is not None else counter)
+    name = to_bytes(name) if name is not None else ffi.NULL
+
+    res = lib.DAQmxCreateCICountEdgesChan(handle, to_bytes(counter), name, edge, initial_count, direction)
+    attribute_cache.invalidate(handle)
+    handle_error(res)
+    _set_counter_terminal(lib.DAQmxSetCICountEdgesTerm, handle, channel, terminal)
+
+def add_counter_period_channel(handle, counter, min, max, units=CounterUnits.Seconds, name=None, 
+        edge=ActiveEdge.Rising, method=CounterMethod.LowFreq1Ctr, meas_time=1e-3, divisor=4, 
+        terminal=None):
+    '''adds a channel measuring the period of the signal on a counter's input
+
+    `min` and `max` are the expected range in `units`. `meas_time` and `divisor` are 
+    only used by the two counter methods. Set implicit timing to buffer a measurement 
+    per period of the signal.
+    '''
+    handle = _native(handle)
+    channel = to_bytes(name if name is not None else counter)
+    name = to_bytes(name) if name is not None else ffi.NULL
+
+    res = lib.DAQmxCreateCIPeriodChan(handle, to_bytes(counter), name, min, max, units, edge, method, 
+            meas_time, divisor, ffi.NULL)
+    attribute_cache.invalidate(handle)
+    handle_error(res)
+    _set_counter_terminal(lib.DAQmxSetCIPeriodTerm, handle, channel, terminal)
+
+def add_counter_frequency_channel(handle, counter, min, max, units=CounterUnits.Hz, name=None, 
+        edge=ActiveEdge.Rising, method=CounterMethod.LowFreq1Ctr, meas_time=1e-3, divisor=4, 
+        terminal=None):
+    '''adds a channel measuring the frequency of the signal on a counter's input, see 
+    `add_counter_period_channel`'''
+    handle = _native(handle)
+    channel = to_bytes(name if name is not None else counter)
+    name = to_bytes(name) if name is not None else ffi.NULL
+
+    res = lib.DAQmxCreateCIFreqChan(handle, to_bytes(counter), name, min, max, units, edge, method, 
+            meas_time, divisor, ffi.NULL)
+    attribute_cache.invalidate(handle)
+    handle_error(res)
+    _set_counter_terminal(lib.DAQmxSetCIFreqTerm, handle, channel, terminal)
 
 def set_timing_sample_clock(handle, rate, n_samples, sample_mode=SampleMode.Finite, active_edge=ActiveEdge.Rising, \
         source='OnboardClock'):
-    if isinstance(handle, (int, long)):
-        res = lib.DAQmxCfgSampClkTiming(handle, source, rate, active_edge, sample_mode, n_samples)
-        handle_error(res)
-    elif isinstance(handle, basestring):
-        h = task_map[handle]
-        res = lib.DAQmxCfgSampClkTiming(h, source, rate, active_edge, sample_mode, n_samples)
-        handle_error(res)
-    else:
-    	raise TypeError('handle must be integer or string')
+    source = to_bytes(source)
+
+    handle = _native(handle)
+    res = lib.DAQmxCfgSampClkTiming(handle, source, rate, active_edge, sample_mode, n_samples)
+    attribute_cache.invalidate(handle)
+    handle_error(res)
 
 def set_timing_implicit(handle, n_samples, sample_mode=SampleMode.Finite):
-    if isinstance(handle, (int, long)):
-        res = lib.DAQmxCfgImplicitTiming(handle, sample_mode, n_samples)
-        handle_error(res)
-    elif isinstance(handle, basestring):
-        h = task_map[handle]
-        res = lib.DAQmxCfgImplicitTiming(h, sample_mode, n_samples)
-        handle_error(res)
-    else:
-    	raise TypeError('handle must be integer or string')
+    handle = _native(handle)
+    res = lib.DAQmxCfgImplicitTiming(handle, sample_mode, n_samples)
+    attribute_cache.invalidate(handle)
+    handle_error(res)
+
+def set_start_trigger_digital_edge(handle, source, edge=ActiveEdge.Rising):
+    '''start the task on an edge of a digital signal, e.g. '/Dev1/ai/StartTrigger'
+    '''
+    source = to_bytes(source)
+
+    handle = _native(handle)
+    res = lib.DAQmxCfgDigEdgeStartTrig(handle, source, edge)
+    handle_error(res)
+
+def disable_start_trigger(handle):
+    handle = _native(handle)
+    res = lib.DAQmxDisableStartTrig(handle)
+    handle_error(res)
 
 def register_nsamples_callback(handle, nsamples, callback_function, callback_data=None, 
         event_type=EventType.Acquired_Into_Buffer, options=0):
@@ -203,72 +495,281 @@ def register_nsamples_callback(handle, nsamples, callback_function, callback_dat
 
     if callback_data is None: callback_data = ffi.NULL
 
-    if isinstance(handle, (int, long)):
-        res = lib.DAQmxRegisterEveryNSamplesEvent(handle, event_type, nsamples, options, callback, \
-            callback_data)
-        handle_error(res)
-    elif isinstance(handle, basestring):
-        h = task_map[handle]
-
-        res = lib.DAQmxRegisterEveryNSamplesEvent(h, event_type, nsamples, options, callback, \
-            callback_data)
-        handle_error(res)
-    else:
-    	raise TypeError('handle must be integer or string')
+    handle = _native(handle)
+    res = lib.DAQmxRegisterEveryNSamplesEvent(handle, event_type, nsamples, options, callback, \
+        callback_data)
+    handle_error(res)
 
 def unregister_nsamples_callback(handle, event_type):
-    if isinstance(handle, (int, long)):
-        res = lib.DAQmxRegisterEveryNSamplesEvent(handle, event_type, 0, 0, ffi.NULL, ffi.NULL)
-        handle_error(res)
-    elif isinstance(handle, basestring):
-        h = task_map[handle]
+    handle = _native(handle)
+    res = lib.DAQmxRegisterEveryNSamplesEvent(handle, event_type, 0, 0, ffi.NULL, ffi.NULL)
+    handle_error(res)
 
-        res = lib.DAQmxRegisterEveryNSamplesEvent(h, event_type, 0, 0, ffi.NULL, ffi.NULL)
-        handle_error(res)
+def register_done_callback(handle, callback_function, callback_data=None, options=0):
+    '''register a function to be called when the task stops
+
+    The function is called from a DAQmx thread as f(handle, status, callback_data) and 
+    must return 0. `status` is the error code the task stopped with, if any.
+    '''
+    callback_store[callback_function] = ffi.callback('int32(TaskHandle, int32, void*)', callback_function)
+    callback = callback_store[callback_function]
+
+    if callback_data is None: callback_data = ffi.NULL
+
+    handle = _native(handle)
+
+    res = lib.DAQmxRegisterDoneEvent(handle, options, callback, callback_data)
+    handle_error(res)
+
+def unregister_done_callback(handle):
+    handle = _native(handle)
+
+    res = lib.DAQmxRegisterDoneEvent(handle, 0, ffi.NULL, ffi.NULL)
+    handle_error(res)
 
 def set_input_buffer_size(handle, size):
-    if isinstance(handle, (int, long)):
-        res = lib.DAQmxCfgInputBuffer(handle, size)
-        handle_error(res)
-    elif isinstance(handle, basestring):
-        h = task_map[handle]
-        res = lib.DAQmxCfgInputBuffer(h, size)
-        handle_error(res)
+    handle = _native(handle)
+    res = lib.DAQmxCfgInputBuffer(handle, size)
+    handle_error(res)
 
 def set_output_buffer_size(handle, size):
-    if isinstance(handle, (int, long)):
-        res = lib.DAQmxCfgOutputBuffer(handle, size)
-        handle_error(res)
-    elif isinstance(handle, basestring):
-        h = task_map[handle]
-        res = lib.DAQmxCfgOutputBuffer(h, size)
-        handle_error(res)
+    handle = _native(handle)
+    res = lib.DAQmxCfgOutputBuffer(handle, size)
+    handle_error(res)
 
 def read_f64(handle, buf_size, n_samps_per_channel=Read.All, timeout=0., fill_mode=FillMode.GroupByScanNumber):
     data = ffi.new('float64[]', buf_size)
     nsamp = ffi.new('int32 *')
 
-    if isinstance(handle, (int, long)):
-        res = lib.DAQmxReadAnalogF64(handle, n_samps_per_channel, timeout, fill_mode, \
-                data, buf_size, nsamp, ffi.NULL)
-        try:
-            handle_error(res)
-        except RuntimeWarning as e:
-            log.warning(e)
-        finally:
-            log.debug('count is %d', nsamp[0])
-            return (ffi.buffer(data), nsamp[0])
-
-    elif isinstance(handle, basestring):
-        h = task_map[handle]
-
-        res = lib.DAQmxReadAnalogF64(h, n_samps_per_channel, timeout, fill_mode, \
-                data, buf_size, nsamp, ffi.NULL)
-        try:
-            handle_error(res)
-        except RuntimeWarning as e:
-            log.warning(e)
-        finally:
-            log.debug('count is %d', nsamp[0])
-            return (ffi.buffer(data), nsamp[0])
+    handle = _native(handle)
+    res = lib.DAQmxReadAnalogF64(handle, n_samps_per_channel, timeout, fill_mode, \
+            data, buf_size, nsamp, ffi.NULL)
+    handle_warning(res)
+
+    log.debug('count is %d', nsamp[0])
+    return (ffi.buffer(data), nsamp[0])
+
+def read_f64_into(handle, out, n_samps_per_channel=Read.All, timeout=0., 
+        fill_mode=FillMode.GroupByScanNumber, n_channels=1, count_p=None):
+    '''read samples into a caller supplied float64 numpy array
+
+    DAQmx writes directly into the memory of `out` through `ffi.from_buffer`, so 
+    no buffer is allocated per call. `out` must be a C-contiguous float64 array. If it 
+    is two dimensional, its shape gives the channel count: (samples, channels) for 
+    FillMode.GroupByScanNumber and (channels, samples) for FillMode.GroupByChannel.
+
+    Returns a tuple of a view of `out` holding only the samples actually read and 
+    the number of samples read per channel. `count_p` can be a preallocated 
+    `int32 *` to avoid allocating one on every call.
+    '''
+    if count_p is None: count_p = ffi.new('int32 *')
+
+    handle = _native(handle)
+
+    res = lib.DAQmxReadAnalogF64(handle, n_samps_per_channel, timeout, fill_mode, \
+            ffi.cast('float64 *', ffi.from_buffer(out)), out.size, count_p, ffi.NULL)
+    handle_warning(res)
+
+    count = count_p[0]
+    return (_samples_read(out, count, fill_mode, n_channels), count)
+
+def _samples_read(out, count, fill_mode, n_channels=1):
+    '''view of the part of a read buffer that holds `count` samples per channel'''
+    if out.ndim == 1:
+        return out[:count*n_channels]
+    elif fill_mode == FillMode.GroupByScanNumber:
+        return out[:count]
+    else:
+        # channels are packed back to back using the number of samples actually read
+        n_channels = out.shape[0]
+        return out.reshape(-1)[:count*n_channels].reshape(n_channels, count)
+
+def read_raw_into(handle, out, n_samps_per_channel=Read.All, timeout=0., count_p=None):
+    '''read unscaled samples, in the device's native format, into a numpy array
+
+    The raw samples are usually int16 and four times smaller than the float64 
+    values `read_f64` returns. They are always interleaved by scan, so a two 
+    dimensional `out` should have shape (samples, channels). Use 
+    `query_scaling_coeffs` and `daqmx.scale_raw` to convert them to physical units.
+
+    Returns a tuple of a view of `out` holding the samples actually read, the 
+    number of samples read per channel and the number of bytes per sample.
+    '''
+    if count_p is None: count_p = ffi.new('int32 *')
+    nbytes_p = ffi.new('int32 *')
+
+    handle = _native(handle)
+
+    res = lib.DAQmxReadRaw(handle, n_samps_per_channel, timeout, ffi.from_buffer(out), \
+            out.nbytes, count_p, nbytes_p, ffi.NULL)
+    handle_warning(res)
+
+    count = count_p[0]
+
+    if out.ndim == 1:
+        n_channels = TaskAttributes.get(handle, 'channel_count')
+        return (out[:count*n_channels], count, nbytes_p[0])
+    else:
+        return (out[:count], count, nbytes_p[0])
+
+def _digital_function(prefix, dtype):
+    '''the U8 or U32 variant of a digital read or write for samples of `dtype`, and its pointer type'''
+    if dtype == numpy.uint8:
+        return (getattr(lib, prefix + 'U8'), 'uInt8 *')
+    elif dtype == numpy.uint32:
+        return (getattr(lib, prefix + 'U32'), 'uInt32 *')
+    raise ValueError('digital samples are uint8 or uint32, not {}'.format(dtype))
+
+def read_digital_into(handle, out, n_samps_per_channel=Read.All, timeout=0., 
+        fill_mode=FillMode.GroupByScanNumber, n_channels=1, count_p=None):
+    '''read packed digital samples into a caller supplied uint8 or uint32 numpy array
+
+    Each sample of a channel is one word with a bit per line, bit k for line k of its 
+    port: 32 lines of a port read as a single uint32 per sample instead of 32 booleans. 
+    uint8 only holds ports of up to 8 lines. Otherwise like `read_f64_into`, the shape 
+    of `out` gives the channel count and a view of the samples read is returned with 
+    their number per channel.
+    '''
+    if count_p is None: count_p = ffi.new('int32 *')
+    read, ctype = _digital_function('DAQmxReadDigital', out.dtype)
+
+    handle = _native(handle)
+
+    res = read(handle, n_samps_per_channel, timeout, fill_mode, ffi.cast(ctype, ffi.from_buffer(out)), 
+            out.size, count_p, ffi.NULL)
+    handle_warning(res)
+
+    count = count_p[0]
+    return (_samples_read(out, count, fill_mode, n_channels), count)
+
+def write_digital(handle, data, timeout=10., auto_start=False, layout=FillMode.GroupByScanNumber, 
+        count_p=None):
+    '''write packed digital samples and return the samples per channel written
+
+    `data` is laid out as for `write_f64`. uint8 data is written as it is, any other 
+    integer type as uint32, one word per sample with a bit per line.
+    '''
+    data = numpy.asarray(data)
+    data = numpy.ascontiguousarray(data, dtype=numpy.uint8 if data.dtype == numpy.uint8 else numpy.uint32)
+    write, ctype = _digital_function('DAQmxWriteDigital', data.dtype)
+    if count_p is None: count_p = ffi.new('int32 *')
+
+    if data.ndim == 1:
+        n = data.shape[0]
+    else:
+        n = data.shape[0] if layout == FillMode.GroupByScanNumber else data.shape[1]
+
+    handle = _native(handle)
+    res = write(handle, n, auto_start, timeout, layout, ffi.cast(ctype, ffi.from_buffer(data)), 
+            count_p, ffi.NULL)
+    handle_warning(res)
+    return count_p[0]
+
+def read_counter_into(handle, out, n_samps_per_channel=Read.All, timeout=0., n_channels=1, count_p=None):
+    '''read counter samples into a float64 or uint32 numpy array
+
+    float64 holds scaled measurements, periods in seconds, frequencies in Hz; uint32 
+    raw counts and ticks. Samples are grouped by channel. Returns a view of `out` with 
+    the samples read and their number per channel.
+    '''
+    if count_p is None: count_p = ffi.new('int32 *')
+    if out.dtype == numpy.float64:
+        read, ctype = lib.DAQmxReadCounterF64, 'float64 *'
+    elif out.dtype == numpy.uint32:
+        read, ctype = lib.DAQmxReadCounterU32, 'uInt32 *'
+    else:
+        raise ValueError('counter samples are float64 or uint32, not {}'.format(out.dtype))
+
+    handle = _native(handle)
+
+    res = read(handle, n_samps_per_channel, timeout, ffi.cast(ctype, ffi.from_buffer(out)), out.size, 
+            count_p, ffi.NULL)
+    handle_warning(res)
+
+    count = count_p[0]
+    return (_samples_read(out, count, FillMode.GroupByChannel, n_channels), count)
+
+def write_f64(handle, data, timeout=10., auto_start=False, layout=FillMode.GroupByScanNumber, 
+        count_p=None):
+    '''write float64 samples to an output task and return the samples per channel written
+
+    `data` is (samples, channels) for FillMode.GroupByScanNumber, (channels, samples) 
+    for FillMode.GroupByChannel, or one dimensional for a single channel.
+    '''
+    data = numpy.ascontiguousarray(data, dtype=numpy.float64)
+    if count_p is None: count_p = ffi.new('int32 *')
+
+    if data.ndim == 1:
+        n = data.shape[0]
+    else:
+        n = data.shape[0] if layout == FillMode.GroupByScanNumber else data.shape[1]
+
+    handle = _native(handle)
+    res = lib.DAQmxWriteAnalogF64(handle, n, auto_start, timeout, layout, 
+            ffi.cast('float64 *', ffi.from_buffer(data)), count_p, ffi.NULL)
+    handle_warning(res)
+    return count_p[0]
+
+def set_regeneration_mode(handle, mode):
+    '''RegenMode.Allow repeats the samples in the output buffer, RegenMode.DoNotAllow 
+    makes the task fail instead when it runs out of new samples'''
+    handle = _native(handle)
+    res = lib.DAQmxSetWriteRegenMode(handle, mode)
+    attribute_cache.invalidate(handle)
+    handle_error(res)
+
+def query_write_space(handle):
+    '''number of samples per channel that can be written to the output buffer now'''
+    handle = _native(handle)
+
+    space_p = ffi.new('uInt32 *')
+    res = lib.DAQmxGetWriteSpaceAvail(handle, space_p)
+    handle_error(res)
+    return space_p[0]
+
+def query_samples_generated(handle):
+    '''total number of samples per channel the task has generated'''
+    handle = _native(handle)
+
+    n_p = ffi.new('uInt64 *')
+    res = lib.DAQmxGetWriteTotalSampPerChanGenerated(handle, n_p)
+    handle_error(res)
+    return n_p[0]
+
+def wait_until_done(handle, timeout=10.):
+    '''wait for a finite task to finish, -1 waits forever'''
+    handle = _native(handle)
+    res = lib.DAQmxWaitUntilTaskDone(handle, timeout)
+    handle_error(res)
+
+def wait_for_next_sample_clock(handle, timeout=10.):
+    '''wait for the next sample clock of a hardware timed single point task
+
+    Returns True if the clock had already arrived, that is the loop is late.
+    '''
+    late_p = ffi.new('bool32 *')
+
+    handle = _native(handle)
+    res = lib.DAQmxWaitForNextSampleClock(handle, timeout, late_p)
+    handle_warning(res)
+    return bool(late_p[0])
+
+def query_scaling_coeffs(handle, channels=None, n_coeffs=4):
+    '''polynomial coefficients that convert raw samples of each channel to volts
+
+    Returns a (channels, n_coeffs) float64 array, lowest order coefficient first. 
+    `channels` defaults to all channels of the task in task order.
+    '''
+    handle = _native(handle)
+
+    if channels is None:
+        names = TaskAttributes.get(handle, 'channels')
+        channels = [x.strip() for x in names.split(',')] if names else []
+
+    coeffs = numpy.zeros((len(channels), n_coeffs))
+    for i, name in enumerate(channels):
+        res = lib.DAQmxGetAIDevScalingCoeff(handle, to_bytes(name), 
+                ffi.cast('float64 *', ffi.from_buffer(coeffs[i])), n_coeffs)
+        handle_error(res)
 
+    return coeffs
@@ -0,0 +1,305 @@
+from .defs import TaskAttributes
+from .lowlevel import resolve
+import numpy
+import numpy.lib.format
+import threading
+import logging
+import json
+import time
+import os
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+log = logging.getLogger('daqmx')
+
+__all__ = ['Recorder', 'Recording']
+
+META_FILE = 'meta.json'
+FORMAT_VERSION = 1
+
+def _chunk_name(index):
+    return 'chunk_{:05d}.npy'.format(index)
+
+def _replace(src, dst):
+    # os.replace is python 3 only, and os.rename does not overwrite on windows
+    try:
+        os.replace(src, dst)
+    except AttributeError:
+        if os.path.exists(dst):
+            os.remove(dst)
+        os.rename(src, dst)
+
+class Recorder(object):
+    '''writes a continuous acquisition to a directory of chunked .npy files
+
+    Blocks of (samples, channels) data are handed to `write()`, typically as the
+    callback of a StreamingReader:
+
+        recorder = Recorder.from_task(handle, 'run1', rate=1e6)
+        reader = StreamingReader(handle, 2, 1024, callback=recorder.write)
+        recorder.start(); reader.start()
+        ...
+        reader.stop(); recorder.close()
+
+    `write()` only copies the block into one of `n_buffers` preallocated buffers and
+    queues it; a writer thread appends the buffers to memory mapped chunk files of
+    `chunk_samples` samples each. The acquisition thread therefore never touches the
+    disk. If the writer falls behind and all buffers are queued, the block is dropped
+    and counted in `dropped_blocks` and `dropped_samples` instead of blocking.
+
+    The directory holds chunk_00000.npy, chunk_00001.npy, ... and meta.json with the
+    sample rate, channel names, start time, user metadata and the length of every
+    chunk. meta.json is rewritten whenever a chunk is completed, so a recording that
+    was interrupted is readable up to its last complete chunk. Use `Recording` to
+    read it back.
+    '''
+
+    def __init__(self, path, n_channels, rate, channels=None, chunk_samples=1<<22,
+            buffer_samples=1<<16, n_buffers=64, dtype=numpy.float64, metadata=None):
+        if channels is not None and len(channels) != n_channels:
+            raise ValueError('expected {} channel names, got {}'.format(n_channels, len(channels)))
+
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        if os.path.exists(os.path.join(path, META_FILE)):
+            raise IOError('{} already holds a recording'.format(path))
+
+        self._path = path
+        self._chunk_samples = chunk_samples
+        self._dtype = numpy.dtype(dtype)
+
+        self._meta = {
+            'version': FORMAT_VERSION,
+            'rate': rate,
+            'n_channels': n_channels,
+            'channels': list(channels) if channels is not None else
+                ['ch{}'.format(i) for i in range(n_channels)],
+            'dtype': self._dtype.str,
+            'chunk_samples': chunk_samples,
+            'start_time': None,
+            'samples': 0,
+            'dropped_samples': 0,
+            'chunks': [],
+            'metadata': metadata or {},
+        }
+
+        self._free = queue.Queue()
+        for i in range(n_buffers):
+            self._free.put(numpy.empty((buffer_samples, n_channels), dtype=self._dtype))
+        self._pending = queue.Queue()
+
+        self._chunk = None
+        self._chunk_fill = 0
+        self._thread = None
+        self._closed = False
+
+        self.dropped_blocks = 0
+        self.dropped_samples = 0
+        self.error = None
+
+    @classmethod
+    def from_task(cls, handle, path, rate, **kwargs):
+        '''create a recorder for a task, naming the channels after the task's channels'''
+        handle = resolve(handle)
+        channels = TaskAttributes.get(handle.value, 'channels')
+        channels = [c.strip() for c in channels.split(',')] if channels else []
+        kwargs.setdefault('metadata', {}).setdefault('task', handle.name)
+        return cls(path, len(channels), rate, channels=channels, **kwargs)
+
+    path = property(lambda self: self._path)
+    rate = property(lambda self: self._meta['rate'])
+    channels = property(lambda self: self._meta['channels'])
+    samples = property(lambda self: self._meta['samples'])
+    is_running = property(lambda self: self._thread is not None and self._thread.is_alive())
+
+    def start(self, start_time=None):
+        '''start the writer thread
+
+        `start_time` is stored as the time of the first sample, it defaults to now.
+        Call this right before starting the task.
+        '''
+        if self._closed:
+            raise RuntimeError('recorder is closed')
+        if self.is_running:
+            raise RuntimeError('recorder is already running')
+
+        if self._meta['start_time'] is None:
+            self._meta['start_time'] = time.time() if start_time is None else start_time
+        self._write_meta()
+
+        self._thread = threading.Thread(target=self._run, name='daqmx-recorder')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def write(self, block):
+        '''queue a (samples, channels) block for writing, without blocking
+
+        The block is copied, so it may be a view into a ring that is overwritten later.
+        Returns False if (part of) the block was dropped because the writer is behind.
+        '''
+        block = numpy.asarray(block)
+        if block.ndim == 1:
+            block = block.reshape(-1, 1)
+
+        while block.shape[0] > 0:
+            try:
+                buf = self._free.get_nowait()
+            except queue.Empty:
+                self.dropped_blocks += 1
+                self.dropped_samples += block.shape[0]
+                return False
+
+            n = min(block.shape[0], buf.shape[0])
+            buf[:n] = block[:n]
+            self._pending.put((buf, n))
+            block = block[n:]
+
+        return True
+
+    def _run(self):
+        while True:
+            item = self._pending.get()
+            if item is None: break
+
+            buf, n = item
+            try:
+                self._append(buf[:n])
+            except Exception as e:
+                log.exception(e)
+                self.error = e
+                break
+            finally:
+                self._free.put(buf)
+
+    def _append(self, data):
+        while data.shape[0] > 0:
+            if self._chunk is None:
+                self._open_chunk()
+
+            n = min(data.shape[0], self._chunk_samples - self._chunk_fill)
+            self._chunk[self._chunk_fill:self._chunk_fill + n] = data[:n]
+            self._chunk_fill += n
+            self._meta['samples'] += n
+            data = data[n:]
+
+            if self._chunk_fill == self._chunk_samples:
+                self._close_chunk()
+
+    def _open_chunk(self):
+        name = _chunk_name(len(self._meta['chunks']))
+        self._chunk = numpy.lib.format.open_memmap(os.path.join(self._path, name), mode='w+',
+                dtype=self._dtype, shape=(self._chunk_samples, self._meta['n_channels']))
+        self._chunk_fill = 0
+
+    def _close_chunk(self):
+        name = _chunk_name(len(self._meta['chunks']))
+        self._chunk.flush()
+        self._chunk = None
+
+        if self._chunk_fill < self._chunk_samples:
+            # only the last chunk is ever partial, shrink it to the samples written
+            full = os.path.join(self._path, name)
+            tmp = full[:-len('.npy')] + '.tmp.npy'
+            data = numpy.load(full, mmap_mode='r')
+            numpy.save(tmp, data[:self._chunk_fill])
+            del data
+            _replace(tmp, full)
+
+        self._meta['chunks'].append({'file': name, 'samples': self._chunk_fill})
+        self._meta['dropped_samples'] = self.dropped_samples
+        self._write_meta()
+
+    def _write_meta(self):
+        full = os.path.join(self._path, META_FILE)
+        with open(full + '.tmp', 'w') as f:
+            json.dump(self._meta, f, indent=1)
+        _replace(full + '.tmp', full)
+
+    def close(self):
+        '''write all queued blocks, finish the last chunk and stop the writer thread'''
+        if self._closed: return
+        self._closed = True
+
+        self._pending.put(None)
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        else:
+            # never started, write whatever was queued on this thread
+            self._run()
+
+        if self._chunk is not None and self._chunk_fill > 0:
+            self._close_chunk()
+        elif self._chunk is not None:
+            self._chunk = None
+            os.remove(os.path.join(self._path, _chunk_name(len(self._meta['chunks']))))
+
+        self._meta['dropped_samples'] = self.dropped_samples
+        self._write_meta()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class Recording(object):
+    '''read access to a directory written by `Recorder`
+
+    Chunks are memory mapped when they are first touched, so opening even a very long
+    recording is cheap and only the pages that are read are loaded from disk.
+    '''
+
+    def __init__(self, path):
+        with open(os.path.join(path, META_FILE)) as f:
+            self.meta = json.load(f)
+
+        if self.meta.get('version') != FORMAT_VERSION:
+            raise IOError('unsupported recording version {}'.format(self.meta.get('version')))
+
+        self._path = path
+        self._chunks = [None]*len(self.meta['chunks'])
+        self._offsets = numpy.cumsum([0] + [c['samples'] for c in self.meta['chunks']])
+
+    path = property(lambda self: self._path)
+    rate = property(lambda self: self.meta['rate'])
+    channels = property(lambda self: self.meta['channels'])
+    n_channels = property(lambda self: self.meta['n_channels'])
+    start_time = property(lambda self: self.meta['start_time'])
+    dtype = property(lambda self: numpy.dtype(self.meta['dtype']))
+
+    def __len__(self):
+        return int(self._offsets[-1])
+
+    def _chunk(self, index):
+        if self._chunks[index] is None:
+            name = self.meta['chunks'][index]['file']
+            self._chunks[index] = numpy.load(os.path.join(self._path, name), mmap_mode='r')
+        return self._chunks[index]
+
+    def read(self, start, n, out=None):
+        '''copy up to `n` samples starting at sample `start` into `out`
+
+        Returns a (samples, channels) array, a view into `out` if it was given, that is
+        shorter than `n` at the end of the recording.
+        '''
+        start = max(0, start)
+        n = max(0, min(n, len(self) - start))
+        if out is None:
+            out = numpy.empty((n, self.n_channels), dtype=self.dtype)
+
+        index = int(numpy.searchsorted(self._offsets, start, side='right')) - 1
+        done = 0
+        while done < n:
+            offset = start + done - self._offsets[index]
+            chunk = self._chunk(index)
+            m = min(n - done, chunk.shape[0] - offset)
+            out[done:done + m] = chunk[offset:offset + m]
+            done += m
+            index += 1
+
+        return out[:n]
@@ -0,0 +1,214 @@
+from .data import AnalogF64
+from .defs import EventType, FillMode, Read
+from .record import Recording
+from .errors import DAQmxTimeoutError
+import numpy
+import threading
+import logging
+import time
+
+log = logging.getLogger('daqmx')
+
+__all__ = ['ReplayTask']
+
+class ReplayTask(object):
+    '''serves a recording made by `Recorder` through the interface of a `Task`
+
+    The recording plays back like a finite acquisition of all its samples. With
+    `speed=1.` samples become available at the recorded rate after `start()`, other
+    speeds scale that (`speed=10.` replays ten times faster than real time). With
+    `speed=None` playback runs as fast as the consumer reads: a read gets the samples
+    it asks for without waiting, up to `buffer_samples` unread samples count as
+    available, and every N samples events wait for the reads to catch up instead of
+    piling up.
+
+    Reads (`read_as`, `read_f64`, `read_f64_into`) behave like their DAQmx
+    counterparts and every N samples and done callbacks have the DAQmx signatures,
+    `fn(task, event_type, n_samples, data)` and `fn(task, status, data)`, and are
+    called from a playback thread. Data is paged in from the memory mapped chunks
+    only as it is read.
+    '''
+
+    def __init__(self, path, speed=1., buffer_samples=1<<16, name=None):
+        self._recording = path if isinstance(path, Recording) else Recording(path)
+        self._speed = speed
+        self._buffer_samples = buffer_samples
+        self._name = name or 'replay:{}'.format(self._recording.path)
+
+        self._t0 = None
+        self._read_pos = 0
+        self._stopped = threading.Event()
+        self._progress = threading.Condition()
+        self._thread = None
+
+        self._nsamples_callback = None
+        self._done_callback = None
+
+    recording = property(lambda self: self._recording)
+    name = property(lambda self: self._name)
+    channels = property(lambda self: list(self._recording.channels))
+    rate = property(lambda self: self._recording.rate)
+    timing = property(lambda self: None)
+    read_position = property(lambda self: self._read_pos)
+    is_done = property(lambda self: self._t0 is not None and self._acquired() == len(self._recording))
+
+    def channel_by_name(self, name):
+        return name if name in self._recording.channels else None
+
+    def _acquired(self):
+        '''samples per channel available to reads so far'''
+        if self._t0 is None:
+            return 0
+
+        total = len(self._recording)
+        if self._speed is None:
+            return min(total, self._read_pos + self._buffer_samples)
+
+        elapsed = time.time() - self._t0
+        return min(total, int(elapsed*self._recording.rate*self._speed))
+
+    def _time_of(self, n_samples):
+        # wall clock time at which the sample count n_samples is reached
+        return self._t0 + n_samples/(self._recording.rate*self._speed)
+
+    def register_nsamples_callback(self, nsamples, callback_function, callback_data=None):
+        '''call `callback_function` every `nsamples` replayed samples, see `register_nsamples_callback`'''
+        if self._thread is not None:
+            raise RuntimeError('cannot register events while the task is running')
+        self._nsamples_callback = (nsamples, callback_function, callback_data)
+
+    def unregister_nsamples_callback(self):
+        self._nsamples_callback = None
+
+    def register_done_callback(self, callback_function, callback_data=None):
+        '''call `callback_function` once all samples were replayed'''
+        if self._thread is not None:
+            raise RuntimeError('cannot register events while the task is running')
+        self._done_callback = (callback_function, callback_data)
+
+    def unregister_done_callback(self):
+        self._done_callback = None
+
+    def start(self):
+        if self._t0 is not None:
+            raise RuntimeError('task is already running')
+
+        self._read_pos = 0
+        self._stopped.clear()
+        self._t0 = time.time()
+
+        if self._nsamples_callback is not None or self._done_callback is not None:
+            self._thread = threading.Thread(target=self._run_events, name='daqmx-replay')
+            self._thread.daemon = True
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        with self._progress:
+            self._progress.notify_all()
+
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+        self._thread = None
+        self._t0 = None
+
+    def _wait_acquired(self, target, timeout=None):
+        '''wait until `target` samples are acquired, returns False if stopped or timed out'''
+        deadline = None if timeout is None else time.time() + timeout
+        while not self._stopped.is_set():
+            if self._acquired() >= target:
+                return True
+
+            now = time.time()
+            if deadline is not None and now >= deadline:
+                return False
+
+            if self._speed is None:
+                # only a read can make more samples available
+                with self._progress:
+                    self._progress.wait(None if deadline is None else deadline - now)
+            else:
+                wake = self._time_of(target)
+                if deadline is not None: wake = min(wake, deadline)
+                self._stopped.wait(max(wake - now, 0.))
+        return False
+
+    def _run_events(self):
+        total = len(self._recording)
+        if self._nsamples_callback is not None:
+            nsamples, callback, data = self._nsamples_callback
+            for target in range(nsamples, total + 1, nsamples):
+                if not self._wait_acquired(target): return
+                try:
+                    callback(self, EventType.Acquired_Into_Buffer, nsamples, data)
+                except Exception as e:
+                    log.exception(e)
+
+        if self._done_callback is not None:
+            if not self._wait_acquired(total): return
+            callback, data = self._done_callback
+            try:
+                callback(self, 0, data)
+            except Exception as e:
+                log.exception(e)
+
+    def read_f64_into(self, out, n_samps_per_channel=Read.All, timeout=0.,
+            fill_mode=FillMode.GroupByScanNumber):
+        '''read into a float64 array, returns the number of samples per channel read
+
+        Waits up to `timeout` seconds for `n_samps_per_channel` samples, or reads what
+        is available for Read.All. Like DAQmx, a read past the end of the recording
+        returns the samples that are left and a timed out read raises a RuntimeError.
+        '''
+        if self._t0 is None:
+            raise RuntimeError('task is not running')
+
+        n_channels = self._recording.n_channels
+        capacity = out.size//n_channels
+        total = len(self._recording)
+
+        if n_samps_per_channel == Read.All:
+            n = min(self._acquired() - self._read_pos, capacity)
+        else:
+            if n_samps_per_channel > capacity:
+                raise ValueError('out holds {} samples per channel, {} requested'.format(capacity, n_samps_per_channel))
+            n = min(n_samps_per_channel, total - self._read_pos)
+            timeout = None if timeout == Read.WaitInfinitely else timeout
+            # unpaced playback has every sample ready for the read that asks for it
+            if self._speed is not None and not self._wait_acquired(self._read_pos + n, timeout) \
+                    and not self._stopped.is_set():
+                raise DAQmxTimeoutError(-200284)
+
+        if fill_mode == FillMode.GroupByChannel:
+            block = self._recording.read(self._read_pos, n)
+            out.reshape(-1)[:n*n_channels].reshape(n_channels, n)[:] = block.T
+        else:
+            self._recording.read(self._read_pos, n, out.reshape(-1)[:n*n_channels].reshape(n, n_channels))
+
+        with self._progress:
+            self._read_pos += n
+            self._progress.notify_all()
+        return n
+
+    def read_f64(self, buf_size, n_samps_per_channel=Read.All, timeout=0.,
+            fill_mode=FillMode.GroupByScanNumber):
+        '''read into a new buffer of `buf_size` values, returns (buffer, samples per channel)'''
+        out = numpy.empty(buf_size)
+        count = self.read_f64_into(out, n_samps_per_channel, timeout, fill_mode)
+        return (out, count)
+
+    def read_as(self, rtype='AnalogF64', *args, **kwargs):
+        if (kwargs.pop('blocking', False) is True or not kwargs.get('timeout')) and self._speed is not None:
+            # unpaced playback only moves on as it is read, the read waits for its own samples
+            self._wait_acquired(len(self._recording))
+
+        if rtype != 'AnalogF64': raise NotImplementedError('can only read analog data in floating point')
+        return self._read_analog_f64(*args, **kwargs)
+
+    def _read_analog_f64(self, buf_size=2048, n_per_channel=Read.All, timeout=None,
+            fill_mode=FillMode.GroupByScanNumber):
+        if timeout is None:
+            timeout = 10.
+
+        out, count = self.read_f64(buf_size, n_per_channel, timeout, fill_mode)
+        return AnalogF64(out, count, self.channels, fill_mode)
@@ -0,0 +1,145 @@
+from .clib import ffi
+from .defs import FillMode
+from .lowlevel import read_f64_into
+import numpy
+
+__all__ = ['RingBuffer', 'RingReader']
+
+class RingBuffer(object):
+    '''fixed capacity ring of multichannel samples for continuous acquisition
+
+    Samples are stored as a (capacity, n_channels) array, the layout produced by 
+    FillMode.GroupByScanNumber. A single producer either reads from DAQmx straight 
+    into the ring with `read_from()`, or asks for a `write_slot()`, fills it and 
+    `commit()`s the number of samples written. Consumers call `reader()` and take 
+    views of the data they have not seen yet; nothing is copied.
+
+    The ring never grows. When a consumer falls more than `capacity` samples behind 
+    the producer, the oldest samples are lost and the reader's overrun counters are 
+    incremented instead. No locks are taken: the producer only publishes the total 
+    number of samples written after the data has landed, and consumers only ever 
+    read that counter.
+    '''
+
+    def __init__(self, capacity, n_channels, dtype=numpy.float64):
+        self._data = numpy.zeros((capacity, n_channels), dtype=dtype)
+        self._scratch = None
+        self._written = 0
+        self._count_p = ffi.new('int32 *')
+
+    capacity = property(lambda self: self._data.shape[0])
+    n_channels = property(lambda self: self._data.shape[1])
+    dtype = property(lambda self: self._data.dtype)
+    written = property(lambda self: self._written)
+
+    def write_slot(self, n):
+        '''return a writable view for the next at most `n` samples
+
+        The slot is never wrapped around the end of the ring, so it may be shorter than 
+        requested. Choosing a capacity that is a multiple of the block size avoids that.
+        '''
+        start = self._written % self.capacity
+        return self._data[start:min(start + n, self.capacity)]
+
+    def commit(self, count):
+        '''publish `count` samples written into the last slot'''
+        self._written += count
+
+    def write(self, block):
+        '''copy a (samples, channels) block into the ring, wrapping as needed
+
+        Of a block longer than the ring only the last `capacity` samples are kept, but 
+        all of them count as written, so readers see the rest as an overrun.
+        '''
+        total = block.shape[0]
+        skip = max(total - self.capacity, 0)
+        block = block[skip:]
+        n = block.shape[0]
+        start = (self._written + skip) % self.capacity
+        first = min(n, self.capacity - start)
+        self._data[start:start + first] = block[:first]
+        self._data[:n - first] = block[first:]
+        self._written += total
+
+    def read_from(self, handle, n_samps_per_channel, timeout=0.):
+        '''read up to `n_samps_per_channel` samples from a task directly into the ring
+
+        Returns the number of samples per channel read.
+        '''
+        slot = self.write_slot(n_samps_per_channel)
+        data, count = read_f64_into(handle, slot, slot.shape[0], timeout, 
+                FillMode.GroupByScanNumber, count_p=self._count_p)
+        self.commit(count)
+        return count
+
+    def latest(self, n):
+        '''return the last `n` samples written
+
+        This is a view into the ring unless the samples wrap around its end, in which 
+        case they are copied into a scratch array that is reused between calls.
+        '''
+        n = min(n, self._written, self.capacity)
+        end = self._written % self.capacity or self.capacity
+
+        if end >= n:
+            return self._data[end - n:end]
+
+        if self._scratch is None or self._scratch.shape[0] < n:
+            self._scratch = numpy.empty_like(self._data)
+
+        out = self._scratch[:n]
+        out[:n - end] = self._data[self.capacity - (n - end):]
+        out[n - end:] = self._data[:end]
+        return out
+
+    def reader(self):
+        '''create a consumer that starts at the current write position'''
+        return RingReader(self)
+
+class RingReader(object):
+    '''consumer cursor into a RingBuffer
+
+    `overruns` counts how many times the reader was lapped by the producer and 
+    `dropped` how many samples it lost as a result.
+    '''
+
+    def __init__(self, ring):
+        self._ring = ring
+        self._position = ring.written
+        self.overruns = 0
+        self.dropped = 0
+
+    def _catch_up(self, written):
+        behind = written - self._position - self._ring.capacity
+        if behind > 0:
+            self.overruns += 1
+            self.dropped += behind
+            self._position += behind
+
+    def _get_available(self):
+        written = self._ring.written
+        self._catch_up(written)
+        return written - self._position
+
+    available = property(_get_available)
+
+    def read(self, n=None):
+        '''return a view of at most `n` unread samples and advance past them
+
+        The view never wraps around the end of the ring, so fewer than `n` samples may 
+        be returned even if more are available. It stays valid until the producer 
+        comes around the ring again.
+        '''
+        written = self._ring.written
+        self._catch_up(written)
+
+        start = self._position % self._ring.capacity
+        count = min(written - self._position, self._ring.capacity - start)
+        if n is not None: count = min(count, n)
+
+        self._position += count
+        return self._ring._data[start:start + count]
+
+    def skip(self):
+        '''drop everything that has not been read yet'''
+        self._position = self._ring.written
@@ -0,0 +1,31 @@
+import numpy
+
+__all__ = ['scale_raw']
+
+def scale_raw(raw, coeffs, channels=None, out=None):
+    '''convert raw integer samples to physical units with per channel polynomials
+
+    `raw` is a (samples, channels) array as returned by `read_raw_into` and `coeffs` 
+    a (channels, n) array of polynomial coefficients, lowest order first, as returned 
+    by `query_scaling_coeffs`. Pass `channels` (a list of column indices) to only 
+    convert the channels that are needed, and `out` to reuse a float64 array of 
+    shape (samples, len(channels)) instead of allocating one.
+
+    The polynomial is evaluated with Horner's scheme over whole columns at once, 
+    writing every intermediate into `out` so no temporaries are created.
+    '''
+    if channels is not None:
+        raw = raw[:, channels]
+        coeffs = coeffs[channels]
+
+    if out is None:
+        out = numpy.empty(raw.shape, dtype=numpy.float64)
+    else:
+        out = out[:raw.shape[0]]
+
+    out[...] = coeffs[:, -1]
+    for i in range(coeffs.shape[1] - 2, -1, -1):
+        numpy.multiply(out, raw, out=out)
+        numpy.add(out, coeffs[:, i], out=out)
+
+    return out
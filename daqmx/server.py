@@ -0,0 +1,436 @@
+'''stream the samples of one task to many local subscribers
+
+The server owns the task. It reads blocks on its own thread and sends them, framed, to
+every subscriber over TCP or a Unix socket. Each subscriber asks for its own
+decimation and says what should happen when it cannot keep up.
+
+Protocol: the subscriber sends one JSON line
+
+    {"decimate": 4, "lowpass": true, "policy": "drop_oldest", "queue": 64}
+
+(every key optional) and receives one JSON line describing the stream: channels,
+rate, rate_out, dtype, samples_per_block and, for raw streams, the scaling
+coefficients. Then frames follow, each a FRAME header
+
+    magic b'DQMX', version, flags, reserved, seq, sample_index, timestamp,
+    n_samples, n_channels
+
+followed by n_samples*n_channels samples of dtype, (samples, channels) in C order.
+`seq` counts the blocks read by the server, a gap means frames were dropped for this
+subscriber. `sample_index` is the index of the first sample in the acquisition and
+`timestamp` its time, derived from the start time and the rate.
+
+This module opens sockets and starts threads, so it is not imported by the `daqmx`
+package, use `from daqmx.server import StreamServer, StreamClient`.
+'''
+from .clib import ffi
+from .defs import FillMode, TaskAttributes
+from .errors import DAQmxTimeoutError
+from .filters import FIRDecimator
+from .lowlevel import resolve, read_raw_into, query_scaling_coeffs
+import collections
+import threading
+import logging
+import socket
+import struct
+import numpy
+import json
+import time
+import os
+
+log = logging.getLogger('daqmx')
+
+__all__ = ['StreamServer', 'StreamClient', 'Frame', 'FRAME']
+
+FRAME = struct.Struct('<4sBBHQQdII')
+MAGIC = b'DQMX'
+VERSION = 1
+
+POLICIES = ('drop_oldest', 'drop_newest', 'disconnect')
+
+Frame = collections.namedtuple('Frame', 'seq sample_index timestamp data')
+
+def _listen(address):
+    if isinstance(address, tuple):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    else:
+        if os.path.exists(address):
+            os.unlink(address)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(address)
+    sock.listen(16)
+    return sock
+
+def _connect(address):
+    family = socket.AF_INET if isinstance(address, tuple) else socket.AF_UNIX
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.connect(address)
+    if family == socket.AF_INET:
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+def _read_line(sock, limit=1<<16):
+    line = b''
+    while not line.endswith(b'\n'):
+        c = sock.recv(1)
+        if not c or len(line) > limit:
+            raise EOFError('connection closed before the end of the line')
+        line += c
+    return json.loads(line.decode('utf-8'))
+
+def _send_line(sock, obj):
+    sock.sendall((json.dumps(obj) + '\n').encode('utf-8'))
+
+class _Subscriber(object):
+    '''a connection and the frames queued for it, sent by `_run` on the connection's thread'''
+
+    def __init__(self, sock, address, decimate=1, lowpass=False, policy='drop_oldest',
+            queue=64):
+        if policy not in POLICIES:
+            raise ValueError('policy must be one of {}'.format(', '.join(POLICIES)))
+        if int(decimate) < 1 or int(queue) < 1:
+            raise ValueError('decimate and queue must be at least 1')
+
+        self.sock = sock
+        self.address = address
+        self.decimate = int(decimate)
+        self.policy = policy
+        self.max_queue = int(queue)
+        self.filter = FIRDecimator(self.decimate) if lowpass and self.decimate > 1 else None
+        self._n_out = 0
+        self._first_index = None
+
+        self.sent = 0
+        self.dropped = 0
+        self._frames = collections.deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    is_closed = property(lambda self: self._closed)
+
+    def frame(self, server, seq, index, block, shared):
+        '''the frame for a block read by the server, decimated for this subscriber'''
+        k = self.decimate
+        if k == 1:
+            return shared()
+
+        if self.filter is not None:
+            if self._first_index is None:
+                self._first_index = index
+            data = self.filter.process(block)
+            if server.dtype.kind in 'iu':
+                data = numpy.rint(data)
+            index = self._first_index + self._n_out*k
+            self._n_out += data.shape[0]
+        else:
+            first = -index % k
+            data = block[first::k]
+            index += first
+
+        if data.shape[0] == 0:
+            return None
+        return server._pack(seq, index, numpy.ascontiguousarray(data, dtype=server.dtype))
+
+    def put(self, frame):
+        '''queue a frame without blocking, applying the drop policy when full'''
+        with self._cond:
+            if self._closed:
+                return
+            if len(self._frames) >= self.max_queue:
+                self.dropped += 1
+                if self.policy == 'drop_newest':
+                    return
+                elif self.policy == 'disconnect':
+                    log.warning('subscriber %s is too slow, disconnecting', self.address)
+                    self._close_locked()
+                    return
+                self._frames.popleft()
+            self._frames.append(frame)
+            self._cond.notify()
+
+    def _run(self):
+        try:
+            while True:
+                with self._cond:
+                    while not self._frames and not self._closed:
+                        self._cond.wait()
+                    if self._closed:
+                        break
+                    frame = self._frames.popleft()
+                self.sock.sendall(frame)
+                self.sent += 1
+        except socket.error as e:
+            log.info('subscriber %s went away: %s', self.address, e)
+        finally:
+            self.close()
+
+    def _close_locked(self):
+        if not self._closed:
+            self._closed = True
+            self._frames.clear()
+            self._cond.notify()
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except socket.error:
+                pass
+            self.sock.close()
+
+    def close(self):
+        with self._cond:
+            self._close_locked()
+
+class StreamServer(object):
+    '''owns a task and streams its samples to subscribers
+
+    `address` is a (host, port) tuple for TCP, port 0 picks a free one, or a path for
+    a Unix socket. With `raw` the device's unscaled integers (`raw_dtype`) are sent
+    and the scaling coefficients are part of the stream description, otherwise
+    float64 volts.
+
+        server = StreamServer(handle, ('127.0.0.1', 0), rate=1e5, samples_per_block=1000)
+        server.start()
+        client = StreamClient(server.address, decimate=10)
+        frame = client.read()
+
+    `start()` starts the task and `stop()` stops it, the task is not cleared. Reads
+    that time out are retried, so `timeout` only bounds how long `stop()` waits.
+    '''
+
+    def __init__(self, handle, address, rate, samples_per_block, raw=False,
+            raw_dtype=numpy.int16, timeout=1.):
+        self._handle = resolve(handle)
+        self.rate = float(rate)
+        self.samples_per_block = samples_per_block
+        self.raw = raw
+        self.dtype = numpy.dtype(raw_dtype if raw else numpy.float64)
+        self.timeout = timeout
+
+        channels = TaskAttributes.get(self._handle.value, 'channels')
+        self.channels = [c.strip() for c in channels.split(',')] if channels else []
+        self._buf = numpy.empty((samples_per_block, len(self.channels)), dtype=self.dtype)
+        self._count_p = ffi.new('int32 *')
+        self._coeffs = query_scaling_coeffs(self._handle).tolist() if raw else None
+
+        self._sock = _listen(address)
+        self.address = self._sock.getsockname()
+        self._unix_path = None if isinstance(address, tuple) else address
+        self._subscribers = []
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._threads = []
+
+        self.n_blocks = 0
+        self.n_samples = 0
+        self.start_time = None
+        self.error = None
+
+    n_channels = property(lambda self: len(self.channels))
+    is_running = property(lambda self: any(t.is_alive() for t in self._threads))
+
+    def subscribers(self):
+        with self._lock:
+            return list(self._subscribers)
+
+    def _describe(self, sub):
+        d = {'version': VERSION, 'channels': self.channels, 'rate': self.rate,
+            'rate_out': self.rate/sub.decimate, 'decimate': sub.decimate, 'policy': sub.policy,
+            'dtype': self.dtype.str, 'samples_per_block': self.samples_per_block,
+            'start_time': self.start_time}
+        if self.raw:
+            d['scaling_coeffs'] = self._coeffs
+        return d
+
+    def start(self):
+        '''start accepting subscribers, the task and the reader thread'''
+        if self.is_running:
+            raise RuntimeError('server is already running')
+
+        self._stopping.clear()
+        self.error = None
+        self.n_blocks = self.n_samples = 0
+        self.start_time = time.time()
+        self._handle.start()
+
+        self._threads = [threading.Thread(target=self._accept, name='daqmx-server-accept'),
+            threading.Thread(target=self._acquire, name='daqmx-server-read')]
+        for t in self._threads:
+            t.daemon = True
+            t.start()
+
+    def _accept(self):
+        self._sock.settimeout(0.2)
+        while not self._stopping.is_set():
+            try:
+                sock, address = self._sock.accept()
+            except socket.timeout:
+                continue
+            except socket.error:
+                break
+
+            # a client that is slow to send its subscription only holds up its own thread
+            t = threading.Thread(target=self._subscribe, args=(sock, address or 'unix'),
+                    name='daqmx-server-send')
+            t.daemon = True
+            t.start()
+
+    def _subscribe(self, sock, address):
+        try:
+            sock.settimeout(5.)
+            request = _read_line(sock)
+            sub = _Subscriber(sock, address, **dict((str(k), v) for k, v in request.items()))
+            sock.settimeout(None)
+            _send_line(sock, self._describe(sub))
+        except Exception as e:
+            log.warning('rejected subscriber %s: %s', address, e)
+            try:
+                _send_line(sock, {'error': str(e)})
+            except Exception:
+                pass
+            sock.close()
+            return
+
+        with self._lock:
+            if self._stopping.is_set():
+                sub.close()
+                return
+            self._subscribers.append(sub)
+        log.info('subscriber %s, decimate %d, %s', sub.address, sub.decimate, sub.policy)
+        sub._run()
+
+    def _read(self):
+        if self.raw:
+            data, count, nbytes = read_raw_into(self._handle, self._buf, self.samples_per_block,
+                    self.timeout, count_p=self._count_p)
+            return count
+        return self._handle.read_f64_into(self._buf, self.samples_per_block, self.timeout,
+                FillMode.GroupByScanNumber)
+
+    def _acquire(self):
+        while not self._stopping.is_set():
+            try:
+                count = self._read()
+            except DAQmxTimeoutError:
+                continue
+            except Exception as e:
+                if self._stopping.is_set():
+                    break
+                log.exception(e)
+                self.error = e
+                break
+
+            if count:
+                self._publish(self._buf[:count])
+
+    def _pack(self, seq, index, data):
+        header = FRAME.pack(MAGIC, VERSION, 0, 0, seq, index, self.start_time + index/self.rate,
+                data.shape[0], data.shape[1])
+        return header + data.tobytes()
+
+    def _publish(self, block):
+        seq, index = self.n_blocks, self.n_samples
+        self.n_blocks += 1
+        self.n_samples += block.shape[0]
+
+        # subscribers that take every sample share one frame, packed once
+        full = []
+        def shared():
+            if not full:
+                full.append(self._pack(seq, index, block))
+            return full[0]
+
+        with self._lock:
+            self._subscribers = [s for s in self._subscribers if not s.is_closed]
+            subscribers = list(self._subscribers)
+
+        for sub in subscribers:
+            frame = sub.frame(self, seq, index, block, shared)
+            if frame is not None:
+                sub.put(frame)
+
+    def stop(self):
+        '''stop the task, disconnect all subscribers and close the socket'''
+        self._stopping.set()
+        try:
+            self._handle.stop()
+        finally:
+            for t in self._threads:
+                t.join()
+            self._threads = []
+
+            for sub in self.subscribers():
+                sub.close()
+            with self._lock:
+                self._subscribers = []
+
+    def close(self):
+        if self.is_running:
+            self.stop()
+        self._sock.close()
+        if self._unix_path is not None and os.path.exists(self._unix_path):
+            os.unlink(self._unix_path)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class StreamClient(object):
+    '''subscribes to a StreamServer
+
+    Keyword arguments are sent as the subscription, see the module documentation.
+    `info` is the server's description of the stream. `read()` returns the next
+    Frame, its `data` a (samples, channels) array; the client also iterates frames
+    until the server disconnects.
+    '''
+
+    def __init__(self, address, **subscription):
+        self._sock = _connect(address)
+        _send_line(self._sock, subscription)
+        self.info = _read_line(self._sock)
+        if 'error' in self.info:
+            self._sock.close()
+            raise ValueError(self.info['error'])
+
+        self.dtype = numpy.dtype(str(self.info['dtype']))
+        self.channels = self.info['channels']
+        self._header = bytearray(FRAME.size)
+
+    def _recv_into(self, buf):
+        view = memoryview(buf)
+        while len(view):
+            n = self._sock.recv_into(view)
+            if n == 0:
+                raise EOFError('server closed the stream')
+            view = view[n:]
+
+    def read(self):
+        '''the next frame, raises EOFError when the stream has ended'''
+        self._recv_into(self._header)
+        magic, version, flags, reserved, seq, index, timestamp, n, n_channels = \
+                FRAME.unpack(bytes(self._header))
+        if magic != MAGIC:
+            raise ValueError('not a daqmx stream frame')
+
+        data = numpy.empty((n, n_channels), dtype=self.dtype)
+        if data.nbytes:
+            self._recv_into(data.reshape(-1).view(numpy.uint8))
+        return Frame(seq, index, timestamp, data)
+
+    def __iter__(self):
+        while True:
+            try:
+                yield self.read()
+            except EOFError:
+                return
+
+    def close(self):
+        self._sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,1304 @@
+'''simulated NI-DAQmx driver
+
+`SimulatedLib` stands in for the `lib` object cffi builds from NIDAQmx.h. It implements
+the declared functions in python with the same arguments and return codes, acquiring
+synthetic waveforms in real time: samples become available at the configured sample
+clock rate, reads wait for them or time out, continuous tasks overflow their buffer when
+they are not read, and every N samples and done events are fired from a driver thread.
+This is enough to run, test and benchmark the rest of the package without hardware.
+
+It is selected by setting the environment variable DAQMX_BACKEND=sim before `daqmx` is
+imported, see `daqmx.clib`. The simulated devices can be changed through `lib.devices`.
+'''
+import functools
+import re
+import threading
+import time
+
+import numpy
+
+from .compat import to_str, to_bytes
+
+# values of the constants in NIDAQmx.h that the package relies on, any other constant
+# declared in the header is given a unique value
+CONSTANTS = {
+    'DAQmx_Sys_GlobalChans': 0x1265,
+    'DAQmx_Sys_Scales': 0x1266,
+    'DAQmx_Sys_Tasks': 0x1267,
+    'DAQmx_Sys_DevNames': 0x193B,
+    'DAQmx_Sys_NIDAQMajorVersion': 0x1272,
+    'DAQmx_Sys_NIDAQMinorVersion': 0x1923,
+    'DAQmx_Task_Name': 0x1276,
+    'DAQmx_Task_Channels': 0x1273,
+    'DAQmx_Task_NumChans': 0x2181,
+    'DAQmx_Task_Devices': 0x230E,
+    'DAQmx_Task_NumDevices': 0x29BA,
+    'DAQmx_Task_Complete': 0x1274,
+    'DAQmx_Val_Task_Start': 0,
+    'DAQmx_Val_Task_Stop': 1,
+    'DAQmx_Val_Task_Verify': 2,
+    'DAQmx_Val_Task_Commit': 3,
+    'DAQmx_Val_Task_Reserve': 4,
+    'DAQmx_Val_Task_Unreserve': 5,
+    'DAQmx_Val_Task_Abort': 6,
+    'DAQmx_Val_MSeriesDAQ': 14643,
+    'DAQmx_Val_Unknown': 12588,
+    'DAQmx_Val_Volts': 10348,
+    'DAQmx_Val_Amps': 10342,
+    'DAQmx_Val_FromCustomScale': 10065,
+    'DAQmx_Val_Cfg_Default': -1,
+    'DAQmx_Val_RSE': 10083,
+    'DAQmx_Val_NRSE': 10078,
+    'DAQmx_Val_Diff': 10106,
+    'DAQmx_Val_PseudoDiff': 12529,
+    'DAQmx_Val_Rising': 10280,
+    'DAQmx_Val_Falling': 10171,
+    'DAQmx_Val_FiniteSamps': 10178,
+    'DAQmx_Val_ContSamps': 10123,
+    'DAQmx_Val_HWTimedSinglePoint': 12522,
+    'DAQmx_Val_SynchronousEventCallbacks': 1,
+    'DAQmx_Val_Acquired_Into_Buffer': 1,
+    'DAQmx_Val_Transferred_From_Buffer': 2,
+    'DAQmx_Val_WaitInfinitely': -1,
+    'DAQmx_Val_Auto': -1,
+    'DAQmx_Val_GroupByChannel': 0,
+    'DAQmx_Val_GroupByScanNumber': 1,
+    'DAQmx_Val_AllowRegen': 10097,
+    'DAQmx_Val_DoNotAllowRegen': 10158,
+    'DAQmx_Val_ChanPerLine': 0,
+    'DAQmx_Val_ChanForAllLines': 1,
+    'DAQmx_Val_CountUp': 10128,
+    'DAQmx_Val_CountDown': 10124,
+    'DAQmx_Val_ExtControlled': 10326,
+    'DAQmx_Val_Seconds': 10364,
+    'DAQmx_Val_Hz': 10373,
+    'DAQmx_Val_Ticks': 10304,
+    'DAQmx_Val_LowFreq1Ctr': 10105,
+    'DAQmx_Val_HighFreq2Ctr': 10157,
+    'DAQmx_Val_LargeRng2Ctr': 10205,
+    'DAQmx_Val_Bit_CouplingTypes_AC': 1,
+    'DAQmx_Val_Bit_CouplingTypes_DC': 2,
+    'DAQmx_Val_Bit_CouplingTypes_Ground': 4,
+    'DAQmx_Val_Bit_CouplingTypes_HFReject': 8,
+    'DAQmx_Val_Bit_CouplingTypes_LFReject': 16,
+    'DAQmx_Val_Bit_CouplingTypes_NoiseReject': 32,
+    'DAQmx_Val_Bit_TriggerUsageTypes_Advance': 1,
+    'DAQmx_Val_Bit_TriggerUsageTypes_Pause': 2,
+    'DAQmx_Val_Bit_TriggerUsageTypes_Reference': 4,
+    'DAQmx_Val_Bit_TriggerUsageTypes_Start': 8,
+    'DAQmx_Val_Bit_TriggerUsageTypes_Handshake': 16,
+    'DAQmx_Val_Bit_TriggerUsageTypes_ArmStart': 32,
+}
+
+# error and warning codes returned by the simulation
+ERR_TIMEOUT = -200284
+ERR_OVERWRITE = -200279
+ERR_BUFFER_TOO_SMALL = -200229
+ERR_INVALID_TASK = -200088
+ERR_NO_CHANNELS = -200478
+ERR_BAD_DEVICE = -200220
+ERR_BAD_CHANNEL = -200170
+ERR_DUPLICATE_TASK = -200089
+ERR_NOT_RUNNING = -200983
+ERR_RUNNING = -200479
+ERR_NOT_SUPPORTED = -200197
+ERR_UNDERFLOW = -200290
+ERR_WRITE_TIMEOUT = -200292
+ERR_WAIT_TIMEOUT = -200560
+
+MESSAGES = {
+    ERR_TIMEOUT: 'Some or all of the samples requested have not yet been acquired.',
+    ERR_OVERWRITE: 'Attempted to read samples that are no longer available. The requested '
+        'sample was previously available, but has since been overwritten.',
+    ERR_BUFFER_TOO_SMALL: 'Buffer is too small to fit read data.',
+    ERR_INVALID_TASK: 'Task specified is invalid or does not exist.',
+    ERR_NO_CHANNELS: 'Specified operation cannot be performed when there are no channels in the task.',
+    ERR_BAD_DEVICE: 'Device identifier is invalid.',
+    ERR_BAD_CHANNEL: 'Physical channel specified does not exist on this device.',
+    ERR_DUPLICATE_TASK: 'Task name specified conflicts with an existing task name.',
+    ERR_NOT_RUNNING: 'Specified operation cannot be performed because the task is not running.',
+    ERR_RUNNING: 'Specified operation cannot be performed while the task is running.',
+    ERR_NOT_SUPPORTED: 'Specified property is not supported by the device or is not applicable to the task.',
+    ERR_UNDERFLOW: 'The generation has stopped to prevent the regeneration of old samples. Your '
+        'application was unable to write samples to the background buffer fast enough.',
+    ERR_WRITE_TIMEOUT: 'Some or all of the samples to write could not be written to the buffer yet.',
+    ERR_WAIT_TIMEOUT: 'Wait Until Done did not indicate that the task was done within the specified timeout.',
+}
+
+class SimDevice(object):
+    '''a simulated multifunction device'''
+
+    def __init__(self, name, n_ai=16, n_ao=2, product_type='PCIe-6363', serial_number=0x1234567,
+            ai_max_rate=2e6, ai_ranges=((-10., 10.), (-5., 5.), (-1., 1.), (-0.2, 0.2)),
+            port_widths=(32, 8, 8), n_ctr=4, di_max_rate=10e6, ci_max_timebase=100e6):
+        self.name = name
+        self.product_type = product_type
+        self.serial_number = serial_number
+        self.ai_max_rate = ai_max_rate
+        self.ai_ranges = ai_ranges
+        self.di_max_rate = di_max_rate
+        self.ci_max_timebase = ci_max_timebase
+        self.ai = ['{}/ai{}'.format(name, i) for i in range(n_ai)]
+        self.ao = ['{}/ao{}'.format(name, i) for i in range(n_ao)]
+        self.ports = ['{}/port{}'.format(name, i) for i in range(len(port_widths))]
+        self.port_widths = dict(zip(self.ports, port_widths))
+        self.lines = ['{}/line{}'.format(p, i) for p in self.ports for i in range(self.port_widths[p])]
+        self.ctr = ['{}/ctr{}'.format(name, i) for i in range(n_ctr)]
+
+        # the lines as last written by on demand digital outputs, read back by digital inputs
+        self.port_state = dict((p, 0) for p in self.ports)
+
+class SimChannel(object):
+    def __init__(self, name, physical, min_val, max_val, units, kind=None):
+        self.name = name
+        self.physical = physical
+        self.min = min_val
+        self.max = max_val
+        self.units = units
+        if kind is None:
+            kind = 'ao' if re.search(r'/ao\d+$', physical) else 'ai'
+        self.kind = kind
+        self.is_output = kind in ('ao', 'do')
+
+        # every physical channel gets its own tone so that channels can be told apart
+        index = int(re.search(r'(\d+)$', physical).group(1)) if re.search(r'\d+$', physical) else 0
+        self.frequency = 10.*(index + 1)
+        self.phase = 0.3*index
+
+        # digital channels: {port: mask of the channel's lines}, bits at their line numbers
+        self.masks = {}
+        # counter channels: 'edges', 'period' or 'frequency', and how to count edges
+        self.measurement = None
+        self.initial = 0
+        self.direction = None
+        self.terminal = None
+
+    mask = property(lambda self: functools.reduce(lambda a, b: a | b, self.masks.values(), 0))
+
+class SimTask(object):
+    def __init__(self, name):
+        self.name = name
+        self.channels = []
+        self.rate = None
+        self.sample_mode = None
+        self.n_samples = 0
+        self.buffer_size = None
+        self.running = False
+        self.t0 = None
+        self.t_stop = None
+        self.read_pos = 0
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.trigger_source = None
+        self.triggered = threading.Event()
+        self.event_thread = None
+        self.callbacks = {}
+        self.done_callback = None
+        self.output = None
+        self.written = 0
+        self.tick = -1
+        self.regen = True
+        self.error = 0
+
+    is_output = property(lambda self: any(c.is_output for c in self.channels))
+
+class SimulatedLib(object):
+    '''python implementation of the DAQmx functions declared in cdefs
+
+    Constants are attributes, as on a cffi lib. `clock` and `sleep` can be replaced to
+    run the simulation against a different time base. With `realtime` set to False the 
+    sample clock is ignored: input buffers are always full, reads never wait and events 
+    fire back to back, which is what benchmarks of the python side want.
+    '''
+
+    major_version = 9
+    minor_version = 7
+    noise = 0.01
+    realtime = True
+
+    def __init__(self, ffi, header='', clock=time.time, sleep=time.sleep):
+        self._ffi = ffi
+        self._clock = clock
+        self._sleep = sleep
+        self._tasks = {}
+        self._next_handle = 1
+        self._random = numpy.random.RandomState(0)
+
+        self.devices = {'Dev1': SimDevice('Dev1'), 'Dev2': SimDevice('Dev2', product_type='PCIe-6361')}
+
+        constants = dict(CONSTANTS)
+        for name in re.findall(r'#define\s+(DAQmx_\w+)', header):
+            if name not in constants:
+                constants[name] = 0x7000 + len(constants)
+        self.__dict__.update(constants)
+
+    # helpers
+
+    def _task(self, handle):
+        return self._tasks.get(handle)
+
+    def _put_string(self, value, size, s):
+        '''copy a string into a char buffer the way DAQmx does, returning the needed size if none'''
+        s = to_bytes(s)
+        if value == self._ffi.NULL or size == 0:
+            return len(s) + 1
+        if size < len(s) + 1:
+            return ERR_BUFFER_TOO_SMALL
+        self._ffi.memmove(value, s + b'\0', len(s) + 1)
+        return 0
+
+    def _expand(self, names):
+        '''expand a physical channel list such as "Dev1/ai0:3, Dev1/ai5" into names'''
+        result = []
+        for name in to_str(names).split(','):
+            name = name.strip().lstrip('/')
+            m = re.match(r'^(.*?)(\d+):(\d+)$', name)
+            if m:
+                prefix, first, last = m.group(1), int(m.group(2)), int(m.group(3))
+                step = 1 if last >= first else -1
+                result += ['{}{}'.format(prefix, i) for i in range(first, last + step, step)]
+            elif name:
+                result.append(name)
+        return result
+
+    def _acquired(self, task):
+        '''samples per channel acquired by the task so far'''
+        if task.t0 is None or task.rate is None:
+            return 0
+
+        if not self.realtime:
+            if task.sample_mode == self.DAQmx_Val_FiniteSamps:
+                return task.n_samples
+            return task.read_pos + self._buffer_size(task)
+
+        now = self._clock() if task.t_stop is None else task.t_stop
+        n = int((now - task.t0)*task.rate)
+        if task.sample_mode == self.DAQmx_Val_FiniteSamps:
+            n = min(n, task.n_samples)
+        return n
+
+    def _waveform(self, task, start, n):
+        '''(n, channels) block of synthetic samples starting at sample index `start`'''
+        t = (numpy.arange(start, start + n)/float(task.rate))[:, numpy.newaxis]
+        freq = numpy.array([c.frequency for c in task.channels])
+        phase = numpy.array([c.phase for c in task.channels])
+        low = numpy.array([c.min for c in task.channels])
+        high = numpy.array([c.max for c in task.channels])
+
+        data = numpy.sin(2*numpy.pi*freq*t + phase) + self.noise*self._random.standard_normal((n, len(freq)))
+        return (high + low)/2. + 0.4*(high - low)*data
+
+    def _is_done(self, task):
+        if not task.running:
+            return True
+        n = self._generated(task) if task.is_output else self._acquired(task)
+        return task.sample_mode == self.DAQmx_Val_FiniteSamps and n >= task.n_samples
+
+    def _wait_for(self, task, n, timeout):
+        '''wait until `n` samples per channel past the read position have been acquired'''
+        deadline = None if timeout < 0 else self._clock() + timeout
+        target = task.read_pos + n
+
+        while self._acquired(task) < target:
+            remaining = (target - self._acquired(task))/float(task.rate)
+            if deadline is not None:
+                remaining = min(remaining, deadline - self._clock())
+                if remaining <= 0:
+                    return False
+            self._sleep(max(remaining, 0.0001))
+
+        return True
+
+    def _run_events(self, task):
+        '''fire every N samples and done events for a running task from a driver thread'''
+        finite = task.sample_mode == self.DAQmx_Val_FiniteSamps
+        output = task.is_output
+        event = self.DAQmx_Val_Transferred_From_Buffer if output else self.DAQmx_Val_Acquired_Into_Buffer
+        every = task.callbacks.get(event)
+        n_fired = 0
+
+        # an armed task starts counting samples when its start trigger arrives
+        while not task.triggered.wait(0.01):
+            if task.stop_event.is_set():
+                return
+
+        while not task.stop_event.is_set():
+            if every is not None:
+                target = (n_fired + 1)*every[0]
+                fire = not finite or target <= task.n_samples
+            else:
+                target = task.n_samples
+                fire = False
+
+            if not fire and not finite:
+                task.stop_event.wait()
+                return
+
+            if self.realtime:
+                wait = task.t0 + (target if fire else task.n_samples)/float(task.rate) - self._clock()
+                if wait > 0 and task.stop_event.wait(wait):
+                    return
+            elif output:
+                # without a clock the samples written are generated at once
+                while self._generated(task) < target and not task.stop_event.wait(0.0001):
+                    pass
+
+            if output and self._check_underflow(task):
+                break
+            if not fire:
+                break
+
+            n_fired += 1
+            nsamples, callback, data = every
+            callback(task.handle, event, nsamples, data)
+
+        if task.done_callback is not None and (task.error or not task.stop_event.is_set()):
+            callback, data = task.done_callback
+            callback(task.handle, task.error, data)
+
+    # system
+
+    def DAQmxGetSystemInfoAttribute(self, attribute, value, *args):
+        if attribute == self.DAQmx_Sys_NIDAQMajorVersion:
+            value[0] = self.major_version
+            return 0
+        elif attribute == self.DAQmx_Sys_NIDAQMinorVersion:
+            value[0] = self.minor_version
+            return 0
+        elif attribute == self.DAQmx_Sys_DevNames:
+            s = ', '.join(sorted(self.devices))
+        elif attribute in (self.DAQmx_Sys_Tasks, self.DAQmx_Sys_GlobalChans, self.DAQmx_Sys_Scales):
+            s = ''
+        else:
+            return ERR_NOT_SUPPORTED
+
+        size = int(args[0]) if args else 0
+        return self._put_string(value, size, s)
+
+    def DAQmxGetErrorString(self, errorCode, errorString, bufferSize):
+        msg = MESSAGES.get(errorCode, 'Simulated DAQmx error.')
+        return self._put_string(errorString, bufferSize, msg[:max(bufferSize - 1, 0)])
+
+    def DAQmxGetExtendedErrorInfo(self, errorString, bufferSize):
+        return self._put_string(errorString, bufferSize, '')
+
+    def DAQmxResetDevice(self, deviceName):
+        name = to_str(deviceName)
+        if name not in self.devices:
+            return ERR_BAD_DEVICE
+
+        for task in self._tasks.values():
+            if any(c.physical.startswith(name + '/') for c in task.channels):
+                self.DAQmxStopTask(task.handle)
+        return 0
+
+    # tasks
+
+    def DAQmxCreateTask(self, taskName, taskHandle):
+        name = to_str(taskName)
+        if name and any(t.name == name for t in self._tasks.values()):
+            return ERR_DUPLICATE_TASK
+
+        handle = self._next_handle
+        self._next_handle += 1
+
+        task = SimTask(name or '_unnamedTask<{}>'.format(handle))
+        task.handle = handle
+        self._tasks[handle] = task
+        taskHandle[0] = handle
+        return 0
+
+    def DAQmxClearTask(self, taskHandle):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+
+        self.DAQmxStopTask(taskHandle)
+        del self._tasks[taskHandle]
+        return 0
+
+    def DAQmxStartTask(self, taskHandle):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+        if not task.channels:
+            return ERR_NO_CHANNELS
+        if task.running:
+            return ERR_RUNNING
+
+        first = task.channels[0]
+        if task.rate is None and first.kind == 'ci' and first.measurement != 'edges':
+            # implicit timing, a period or frequency sample per period of the signal
+            task.rate = first.frequency
+            if task.sample_mode is None:
+                task.sample_mode = self.DAQmx_Val_ContSamps
+        elif task.rate is None and first.kind == 'ai':
+            # on demand timing, acquire as fast as the device allows
+            task.rate = self.devices[first.physical.split('/')[0]].ai_max_rate
+            task.sample_mode = self.DAQmx_Val_ContSamps
+
+        task.read_pos = 0
+        task.tick = -1
+        task.error = 0
+        task.stop_event = threading.Event()
+        task.triggered = threading.Event()
+        task.running = True
+        task.t_stop = None
+        task.t0 = None
+
+        if task.trigger_source is None:
+            task.t0 = self._clock()
+            task.triggered.set()
+            self._fire_start_trigger(task)
+
+        if (task.callbacks or task.done_callback is not None) and task.rate is not None:
+            task.event_thread = threading.Thread(target=self._run_events, args=(task,),
+                    name='daqmx-sim-events')
+            task.event_thread.daemon = True
+            task.event_thread.start()
+        return 0
+
+    def _fire_start_trigger(self, task):
+        '''start the armed tasks triggered by the start trigger of `task`'''
+        devices = set(c.physical.split('/')[0] for c in task.channels)
+        for other in self._tasks.values():
+            if not other.running or other.triggered.is_set() or other.trigger_source is None:
+                continue
+
+            source = other.trigger_source.strip('/').split('/')
+            if len(source) == 3 and source[0] in devices and source[1:] == ['ai', 'StartTrigger']:
+                other.t0 = task.t0
+                other.triggered.set()
+
+    def DAQmxStopTask(self, taskHandle):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+
+        if task.running:
+            task.t_stop = self._clock()
+        task.running = False
+        task.stop_event.set()
+        task.error = 0
+        if task.output is not None and task.sample_mode != self.DAQmx_Val_HWTimedSinglePoint:
+            # writes start over at the beginning of the buffer, a regenerating buffer 
+            # can also be played again as it is
+            task.written = 0
+        thread = task.event_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        task.event_thread = None
+        return 0
+
+    def DAQmxIsTaskDone(self, taskHandle, isTaskDone):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+
+        isTaskDone[0] = int(self._is_done(task))
+        return 0
+
+    def DAQmxTaskControl(self, taskHandle, action):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+
+        if action == self.DAQmx_Val_Task_Start:
+            return self.DAQmxStartTask(taskHandle)
+        elif action in (self.DAQmx_Val_Task_Stop, self.DAQmx_Val_Task_Abort):
+            return self.DAQmxStopTask(taskHandle)
+        elif action in (self.DAQmx_Val_Task_Verify, self.DAQmx_Val_Task_Commit) and not task.channels:
+            return ERR_NO_CHANNELS
+        return 0
+
+    def DAQmxGetTaskAttribute(self, taskHandle, attribute, value, *args):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+
+        devices = []
+        for c in task.channels:
+            dev = c.physical.split('/')[0]
+            if dev not in devices: devices.append(dev)
+
+        if attribute == self.DAQmx_Task_NumChans:
+            value[0] = len(task.channels)
+        elif attribute == self.DAQmx_Task_NumDevices:
+            value[0] = len(devices)
+        elif attribute == self.DAQmx_Task_Complete:
+            value[0] = int(self._is_done(task))
+        else:
+            if attribute == self.DAQmx_Task_Name:
+                s = task.name
+            elif attribute == self.DAQmx_Task_Channels:
+                s = ', '.join(c.name for c in task.channels)
+            elif attribute == self.DAQmx_Task_Devices:
+                s = ', '.join(devices)
+            else:
+                return ERR_NOT_SUPPORTED
+
+            size = int(args[0]) if args else 0
+            if value == self._ffi.NULL and not s:
+                return 0
+            return self._put_string(value, size, s)
+        return 0
+
+    # channels
+
+    def DAQmxCreateAIVoltageChan(self, taskHandle, physicalChannel, nameToAssignToChannel,
+            terminalConfig, minVal, maxVal, units, customScaleName):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+        if task.running:
+            return ERR_RUNNING
+
+        physical = self._expand(physicalChannel)
+        for p in physical:
+            dev = self.devices.get(p.split('/')[0])
+            if dev is None:
+                return ERR_BAD_DEVICE
+            if p not in dev.ai:
+                return ERR_BAD_CHANNEL
+
+        if nameToAssignToChannel == self._ffi.NULL or not nameToAssignToChannel:
+            names = physical
+        else:
+            names = self._expand(nameToAssignToChannel)
+            if len(names) == 1 and len(physical) > 1:
+                # a single name is used as a prefix for all channels
+                names = ['{}{}'.format(names[0], i) for i in range(len(physical))]
+
+        task.channels += [SimChannel(n, p, minVal, maxVal, units) for n, p in zip(names, physical)]
+        return 0
+
+    def DAQmxCreateAOVoltageChan(self, taskHandle, physicalChannel, nameToAssignToChannel,
+            minVal, maxVal, units, customScaleName):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+        if task.running:
+            return ERR_RUNNING
+
+        physical = self._expand(physicalChannel)
+        for p in physical:
+            dev = self.devices.get(p.split('/')[0])
+            if dev is None:
+                return ERR_BAD_DEVICE
+            if p not in dev.ao:
+                return ERR_BAD_CHANNEL
+
+        if nameToAssignToChannel == self._ffi.NULL or not nameToAssignToChannel:
+            names = physical
+        else:
+            names = self._expand(nameToAssignToChannel)
+
+        task.channels += [SimChannel(n, p, minVal, maxVal, units) for n, p in zip(names, physical)]
+        return 0
+
+    DAQmxCreateAOCurrentChan = DAQmxCreateAOVoltageChan
+
+    def _create_digital(self, taskHandle, lines, nameToAssignToLines, lineGrouping, kind):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+        if task.running:
+            return ERR_RUNNING
+
+        # (line name, port, line number) of every line, a port stands for all its lines
+        found = []
+        for p in self._expand(lines):
+            dev = self.devices.get(p.split('/')[0])
+            if dev is None:
+                return ERR_BAD_DEVICE
+            if p in dev.ports:
+                found += [('{}/line{}'.format(p, i), p, i) for i in range(dev.port_widths[p])]
+            elif p in dev.lines:
+                port, line = p.rsplit('/line', 1)
+                found.append((p, port, int(line)))
+            else:
+                return ERR_BAD_CHANNEL
+
+        given = None if nameToAssignToLines == self._ffi.NULL or not nameToAssignToLines \
+                else self._expand(nameToAssignToLines)
+
+        if lineGrouping == self.DAQmx_Val_ChanForAllLines:
+            # one channel, named after the lines as they were given
+            groups = [(given[0] if given else to_str(lines).strip(), found)]
+        else:
+            names = [f[0] for f in found]
+            if given:
+                names = given if len(given) == len(found) else \
+                        ['{}{}'.format(given[0], i) for i in range(len(found))]
+            groups = [(name, [f]) for name, f in zip(names, found)]
+
+        for name, group in groups:
+            channel = SimChannel(name, group[0][0], None, None, None, kind)
+            for _, port, line in group:
+                channel.masks[port] = channel.masks.get(port, 0) | (1 << line)
+            task.channels.append(channel)
+        return 0
+
+    def DAQmxCreateDIChan(self, taskHandle, lines, nameToAssignToLines, lineGrouping):
+        return self._create_digital(taskHandle, lines, nameToAssignToLines, lineGrouping, 'di')
+
+    def DAQmxCreateDOChan(self, taskHandle, lines, nameToAssignToLines, lineGrouping):
+        return self._create_digital(taskHandle, lines, nameToAssignToLines, lineGrouping, 'do')
+
+    def _create_counter(self, taskHandle, counter, nameToAssignToChannel, measurement, minVal, maxVal,
+            units, initial=0, direction=None):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+        if task.running:
+            return ERR_RUNNING
+
+        physical = self._expand(counter)
+        for p in physical:
+            dev = self.devices.get(p.split('/')[0])
+            if dev is None:
+                return ERR_BAD_DEVICE
+            if p not in dev.ctr:
+                return ERR_BAD_CHANNEL
+
+        if nameToAssignToChannel == self._ffi.NULL or not nameToAssignToChannel:
+            names = physical
+        else:
+            names = self._expand(nameToAssignToChannel)
+
+        for name, p in zip(names, physical):
+            channel = SimChannel(name, p, minVal, maxVal, units, 'ci')
+            # the signal on the counter's input, 1 kHz on ctr0, 2 kHz on ctr1, ...
+            channel.frequency *= 100.
+            channel.measurement = measurement
+            channel.initial = int(initial)
+            channel.direction = direction
+            task.channels.append(channel)
+        return 0
+
+    def DAQmxCreateCICountEdgesChan(self, taskHandle, counter, nameToAssignToChannel, edge, initialCount,
+            countDirection):
+        return self._create_counter(taskHandle, counter, nameToAssignToChannel, 'edges', 0., 0., None,
+                initialCount, countDirection)
+
+    def DAQmxCreateCIPeriodChan(self, taskHandle, counter, nameToAssignToChannel, minVal, maxVal, units,
+            edge, measMethod, measTime, divisor, customScaleName):
+        return self._create_counter(taskHandle, counter, nameToAssignToChannel, 'period', minVal, maxVal,
+                units)
+
+    def DAQmxCreateCIFreqChan(self, taskHandle, counter, nameToAssignToChannel, minVal, maxVal, units,
+            edge, measMethod, measTime, divisor, customScaleName):
+        return self._create_counter(taskHandle, counter, nameToAssignToChannel, 'frequency', minVal, maxVal,
+                units)
+
+    def _set_terminal(self, taskHandle, channel, data):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+
+        name = to_str(channel)
+        found = [c for c in task.channels if c.kind == 'ci' and (not name or c.name == name)]
+        if not found:
+            return ERR_BAD_CHANNEL
+        for c in found:
+            c.terminal = to_str(data)
+        return 0
+
+    DAQmxSetCICountEdgesTerm = DAQmxSetCIPeriodTerm = DAQmxSetCIFreqTerm = _set_terminal
+
+    def DAQmxGetChanAttribute(self, taskHandle, channel, attribute, value, *args):
+        return ERR_NOT_SUPPORTED
+
+    def DAQmxGetPhysicalChanAttribute(self, physicalChannel, attribute, value, *args):
+        return ERR_NOT_SUPPORTED
+
+    def DAQmxGetAIDevScalingCoeff(self, taskHandle, channel, data, arraySizeInElements):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+
+        name = to_str(channel)
+        for c in task.channels:
+            if c.name == name:
+                coeffs = [0., max(abs(c.min), abs(c.max))/32767., 0., 0.]
+                for i in range(min(arraySizeInElements, len(coeffs))):
+                    data[i] = coeffs[i]
+                return 0
+        return ERR_BAD_CHANNEL
+
+    # timing and buffers
+
+    def DAQmxCfgSampClkTiming(self, taskHandle, source, rate, activeEdge, sampleMode, sampsPerChanToAcquire):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+        if task.running:
+            return ERR_RUNNING
+
+        task.rate = float(rate)
+        task.sample_mode = sampleMode
+        task.n_samples = int(sampsPerChanToAcquire)
+        return 0
+
+    def DAQmxCfgImplicitTiming(self, taskHandle, sampleMode, sampsPerChanToAcquire):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+
+        task.sample_mode = sampleMode
+        task.n_samples = int(sampsPerChanToAcquire)
+        return 0
+
+    def DAQmxCfgDigEdgeStartTrig(self, taskHandle, triggerSource, triggerEdge):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+        if task.running:
+            return ERR_RUNNING
+
+        task.trigger_source = to_str(triggerSource)
+        return 0
+
+    def DAQmxDisableStartTrig(self, taskHandle):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+
+        task.trigger_source = None
+        return 0
+
+    def DAQmxCfgChangeDetectionTiming(self, taskHandle, risingEdgeChan, fallingEdgeChan, sampleMode, sampsPerChan):
+        return ERR_NOT_SUPPORTED
+
+    def DAQmxCfgInputBuffer(self, taskHandle, numSampsPerChan):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+
+        task.buffer_size = int(numSampsPerChan)
+        return 0
+
+    def DAQmxCfgOutputBuffer(self, taskHandle, numSampsPerChan):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+
+        task.buffer_size = int(numSampsPerChan)
+        if task.output is not None and len(task.output) != task.buffer_size:
+            # reallocated, the next write starts a new buffer
+            task.output = None
+            task.written = 0
+        return 0
+
+    def _buffer_size(self, task):
+        if task.buffer_size is not None:
+            return task.buffer_size
+        elif task.sample_mode == self.DAQmx_Val_FiniteSamps:
+            return task.n_samples
+        else:
+            # DAQmx sizes continuous buffers after the rate, with 10 kS as the minimum
+            return max(10000, int(task.rate))
+
+    # events
+
+    def DAQmxRegisterEveryNSamplesEvent(self, taskHandle, everyNsamplesEventType, nSamples, options,
+            callbackFunction, callbackData):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+        if task.running:
+            return ERR_RUNNING
+
+        if callbackFunction == self._ffi.NULL:
+            task.callbacks.pop(everyNsamplesEventType, None)
+        else:
+            task.callbacks[everyNsamplesEventType] = (nSamples, callbackFunction, callbackData)
+        return 0
+
+    def DAQmxRegisterDoneEvent(self, taskHandle, options, callbackFunction, callbackData):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+        if task.running:
+            return ERR_RUNNING
+
+        if callbackFunction == self._ffi.NULL:
+            task.done_callback = None
+        else:
+            task.done_callback = (callbackFunction, callbackData)
+        return 0
+
+    # reading
+
+    def DAQmxGetReadAvailSampPerChan(self, taskHandle, data):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+
+        data[0] = max(self._acquired(task) - task.read_pos, 0)
+        return 0
+
+    def _read(self, task, numSampsPerChan, timeout, arraySize):
+        '''work out how many samples to read, waiting for them. Returns (error, start, count)'''
+        if not task.channels:
+            return (ERR_NO_CHANNELS, 0, 0)
+        if task.t0 is None and not task.running:
+            return (ERR_NOT_RUNNING, 0, 0)
+
+        n_channels = len(task.channels)
+        finite = task.sample_mode == self.DAQmx_Val_FiniteSamps
+        err = 0
+
+        with task.lock:
+            if task.sample_mode == self.DAQmx_Val_HWTimedSinglePoint:
+                # there is no buffer, a read returns the samples of the latest clocks
+                task.read_pos = max(task.read_pos, self._acquired(task) - max(numSampsPerChan, 1))
+
+            if numSampsPerChan < 0:
+                # read all: what is there for continuous tasks, the rest of a finite acquisition
+                if finite:
+                    n = task.n_samples - task.read_pos
+                    if not self._wait_for(task, n, timeout):
+                        err = ERR_TIMEOUT
+                else:
+                    n = self._acquired(task) - task.read_pos
+            else:
+                n = numSampsPerChan
+                if finite:
+                    n = min(n, task.n_samples - task.read_pos)
+                if not self._wait_for(task, n, timeout):
+                    err = ERR_TIMEOUT
+
+            available = self._acquired(task) - task.read_pos
+            if not finite and available > self._buffer_size(task):
+                return (ERR_OVERWRITE, 0, 0)
+
+            n = min(n, available)
+            if n*n_channels > arraySize:
+                return (ERR_BUFFER_TOO_SMALL, 0, 0)
+
+            start = task.read_pos
+            task.read_pos += n
+            return (err, start, n)
+
+    def DAQmxReadAnalogF64(self, taskHandle, numSampsPerChan, timeout, fillMode, readArray,
+            arraySizeInSamps, sampsPerChanRead, reserved):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+        if any(c.kind != 'ai' for c in task.channels):
+            return ERR_NOT_SUPPORTED
+
+        err, start, n = self._read(task, numSampsPerChan, timeout, arraySizeInSamps)
+        sampsPerChanRead[0] = n
+        if n > 0:
+            data = self._waveform(task, start, n)
+            if fillMode == self.DAQmx_Val_GroupByChannel:
+                data = data.T
+            data = numpy.ascontiguousarray(data, dtype=numpy.float64)
+            self._ffi.memmove(readArray, data, data.nbytes)
+        return err
+
+    def DAQmxReadRaw(self, taskHandle, numSampsPerChan, timeout, readArray, arraySizeInBytes,
+            sampsRead, numBytesPerSamp, reserved):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+        if any(c.kind != 'ai' for c in task.channels):
+            return ERR_NOT_SUPPORTED
+
+        err, start, n = self._read(task, numSampsPerChan, timeout, arraySizeInBytes//2)
+        sampsRead[0] = n
+        numBytesPerSamp[0] = 2
+        if n > 0:
+            scale = numpy.array([max(abs(c.min), abs(c.max)) for c in task.channels])/32767.
+            data = numpy.round(self._waveform(task, start, n)/scale).astype(numpy.int16)
+            self._ffi.memmove(readArray, data, data.nbytes)
+        return err
+
+    def _digital(self, task, start, n):
+        '''(n, channels) uint32 block of digital samples starting at sample index `start`
+
+        Every port counts up in binary, by one per sample, so that line k toggles every
+        2**k samples. Samples are packed by line number, as DAQmx packs ports.
+        '''
+        k = numpy.arange(start, start + n, dtype=numpy.uint64)[:, numpy.newaxis]
+        masks = numpy.array([c.mask for c in task.channels], dtype=numpy.uint64)
+        return (k & masks).astype(numpy.uint32)
+
+    def _line_states(self, task):
+        '''one sample of the lines as they are now, the on demand read'''
+        values = []
+        for c in task.channels:
+            state = self.devices[c.physical.split('/')[0]].port_state
+            values.append(functools.reduce(lambda a, b: a | b,
+                    (state[port] & mask for port, mask in c.masks.items()), 0))
+        return numpy.array([values], dtype=numpy.uint32)
+
+    def DAQmxReadDigitalU8(self, taskHandle, numSampsPerChan, timeout, fillMode, readArray,
+            arraySizeInSamps, sampsPerChanRead, reserved):
+        return self._read_digital(taskHandle, numSampsPerChan, timeout, fillMode, readArray,
+                arraySizeInSamps, sampsPerChanRead, numpy.uint8)
+
+    def DAQmxReadDigitalU32(self, taskHandle, numSampsPerChan, timeout, fillMode, readArray,
+            arraySizeInSamps, sampsPerChanRead, reserved):
+        return self._read_digital(taskHandle, numSampsPerChan, timeout, fillMode, readArray,
+                arraySizeInSamps, sampsPerChanRead, numpy.uint32)
+
+    def _read_digital(self, taskHandle, numSampsPerChan, timeout, fillMode, readArray,
+            arraySizeInSamps, sampsPerChanRead, dtype):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+        if any(c.kind != 'di' for c in task.channels):
+            return ERR_NOT_SUPPORTED
+        if dtype is numpy.uint8 and any(c.mask > 0xff for c in task.channels):
+            # lines above line 7 do not fit
+            return ERR_NOT_SUPPORTED
+
+        if task.channels and task.sample_mode is None:
+            # on demand, a single sample of the lines now
+            if arraySizeInSamps < len(task.channels):
+                return ERR_BUFFER_TOO_SMALL
+            err, data = 0, self._line_states(task)
+        else:
+            err, start, n = self._read(task, numSampsPerChan, timeout, arraySizeInSamps)
+            data = self._digital(task, start, n)
+
+        sampsPerChanRead[0] = n = data.shape[0]
+        if n > 0:
+            if fillMode == self.DAQmx_Val_GroupByChannel:
+                data = data.T
+            data = numpy.ascontiguousarray(data, dtype=dtype)
+            self._ffi.memmove(readArray, data, data.nbytes)
+        return err
+
+    def _counter(self, task, start, n):
+        '''(n, channels) float64 block of counter samples starting at sample index `start`'''
+        k = numpy.arange(start, start + n)
+        data = numpy.zeros((n, len(task.channels)))
+        for i, c in enumerate(task.channels):
+            if c.measurement == 'edges':
+                # edges of the input signal counted until each sample clock
+                data[:, i] = self._count(c, c.frequency*(k + 1)/task.rate)
+            else:
+                period = (1. + 0.1*self.noise*self._random.standard_normal(n))/c.frequency
+                data[:, i] = self._scale_period(task, c, period)
+        return data
+
+    def _count(self, channel, edges):
+        edges = numpy.floor(edges)
+        if channel.direction == self.DAQmx_Val_CountDown:
+            edges = -edges
+        return (channel.initial + edges) % 2**32
+
+    def _scale_period(self, task, channel, period):
+        if channel.units == self.DAQmx_Val_Ticks:
+            return numpy.round(period*self.devices[channel.physical.split('/')[0]].ci_max_timebase)
+        elif channel.measurement == 'frequency':
+            return 1./period
+        return period
+
+    def _counts_now(self, task):
+        '''one sample of edge counts as they are now, the on demand read'''
+        elapsed = 0. if task.t0 is None else \
+                (self._clock() if task.t_stop is None else task.t_stop) - task.t0
+        return numpy.array([[self._count(c, c.frequency*elapsed) for c in task.channels]])
+
+    def DAQmxReadCounterF64(self, taskHandle, numSampsPerChan, timeout, readArray, arraySizeInSamps,
+            sampsPerChanRead, reserved):
+        return self._read_counter(taskHandle, numSampsPerChan, timeout, readArray, arraySizeInSamps,
+                sampsPerChanRead, numpy.float64)
+
+    def DAQmxReadCounterU32(self, taskHandle, numSampsPerChan, timeout, readArray, arraySizeInSamps,
+            sampsPerChanRead, reserved):
+        return self._read_counter(taskHandle, numSampsPerChan, timeout, readArray, arraySizeInSamps,
+                sampsPerChanRead, numpy.uint32)
+
+    def _read_counter(self, taskHandle, numSampsPerChan, timeout, readArray, arraySizeInSamps,
+            sampsPerChanRead, dtype):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+        if any(c.kind != 'ci' for c in task.channels):
+            return ERR_NOT_SUPPORTED
+
+        if task.channels and task.sample_mode is None and task.rate is None:
+            # on demand edge counting, the counts now
+            if not task.running and task.t0 is None:
+                return ERR_NOT_RUNNING
+            if arraySizeInSamps < len(task.channels):
+                return ERR_BUFFER_TOO_SMALL
+            err, data = 0, self._counts_now(task)
+        else:
+            err, start, n = self._read(task, numSampsPerChan, timeout, arraySizeInSamps)
+            data = self._counter(task, start, n)
+
+        sampsPerChanRead[0] = n = data.shape[0]
+        if n > 0:
+            # counter samples are always grouped by channel
+            data = numpy.ascontiguousarray(data.T)
+            if dtype is numpy.uint32:
+                data = numpy.round(data).astype(numpy.uint32)
+            self._ffi.memmove(readArray, data, data.nbytes)
+        return err
+
+    # writing
+
+    def _write(self, taskHandle, numSampsPerChan, autoStart, timeout, dataLayout, writeArray,
+            sampsPerChanWritten, dtype):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+        if not task.channels:
+            return ERR_NO_CHANNELS
+
+        dtype = numpy.dtype(dtype)
+        n, n_channels = int(numSampsPerChan), len(task.channels)
+        data = numpy.frombuffer(self._ffi.buffer(writeArray, n*n_channels*dtype.itemsize), dtype=dtype)
+        if dataLayout == self.DAQmx_Val_GroupByChannel:
+            data = data.reshape(n_channels, n).T
+        else:
+            data = data.reshape(n, n_channels)
+
+        if task.sample_mode in (None, self.DAQmx_Val_HWTimedSinglePoint):
+            # on demand and single point outputs are updated right away
+            task.output = data.copy()
+            task.written += n
+            if n > 0:
+                self._set_lines(task, data[-1])
+        else:
+            err, n = self._write_buffer(task, data, timeout)
+            if err:
+                if sampsPerChanWritten != self._ffi.NULL:
+                    sampsPerChanWritten[0] = n
+                return err
+
+        if sampsPerChanWritten != self._ffi.NULL:
+            sampsPerChanWritten[0] = n
+
+        if autoStart and not task.running:
+            return self.DAQmxStartTask(taskHandle)
+        return 0
+
+    def DAQmxWriteAnalogF64(self, taskHandle, numSampsPerChan, autoStart, timeout, dataLayout,
+            writeArray, sampsPerChanWritten, reserved):
+        return self._write(taskHandle, numSampsPerChan, autoStart, timeout, dataLayout, writeArray,
+                sampsPerChanWritten, numpy.float64)
+
+    def DAQmxWriteDigitalU8(self, taskHandle, numSampsPerChan, autoStart, timeout, dataLayout,
+            writeArray, sampsPerChanWritten, reserved):
+        return self._write(taskHandle, numSampsPerChan, autoStart, timeout, dataLayout, writeArray,
+                sampsPerChanWritten, numpy.uint8)
+
+    def DAQmxWriteDigitalU32(self, taskHandle, numSampsPerChan, autoStart, timeout, dataLayout,
+            writeArray, sampsPerChanWritten, reserved):
+        return self._write(taskHandle, numSampsPerChan, autoStart, timeout, dataLayout, writeArray,
+                sampsPerChanWritten, numpy.uint32)
+
+    def _set_lines(self, task, values):
+        '''drive the lines of the digital output channels of `task` to one sample of values'''
+        for c, value in zip(task.channels, values):
+            if c.kind != 'do':
+                continue
+            state = self.devices[c.physical.split('/')[0]].port_state
+            for port, mask in c.masks.items():
+                state[port] = (state[port] & ~mask) | (int(value) & mask)
+
+    def _generated(self, task):
+        '''samples per channel generated by an output task so far'''
+        if not self.realtime:
+            return task.written
+        n = self._acquired(task)
+        return n if task.regen else min(n, task.written)
+
+    def _check_underflow(self, task):
+        '''stop a streaming output task that has run out of samples, returning its error'''
+        if task.error or not task.running or task.regen or task.t0 is None or not self.realtime:
+            return task.error
+
+        finite = task.sample_mode == self.DAQmx_Val_FiniteSamps
+        if self._acquired(task) > task.written and not (finite and task.written >= task.n_samples):
+            task.error = ERR_UNDERFLOW
+            task.t_stop = task.t0 + task.written/task.rate
+            task.running = False
+            task.stop_event.set()
+        return task.error
+
+    def _write_buffer(self, task, data, timeout):
+        '''copy samples into the output buffer, waiting for space. Returns (error, written)'''
+        n = data.shape[0]
+        with task.lock:
+            err = self._check_underflow(task)
+            if err:
+                return (err, 0)
+
+            if task.output is None or task.output.shape[1] != data.shape[1]:
+                # like DAQmx, the first write sizes the buffer unless it was configured
+                size = task.buffer_size or n
+                task.output = numpy.zeros((size, data.shape[1]))
+                task.written = 0
+            size = len(task.output)
+
+            if task.running and not task.regen:
+                deadline = None if timeout < 0 else self._clock() + timeout
+                while size - (task.written - self._generated(task)) < n:
+                    if self._check_underflow(task):
+                        return (task.error, 0)
+                    if deadline is not None and self._clock() >= deadline:
+                        return (ERR_WRITE_TIMEOUT, 0)
+                    self._sleep(min(n/task.rate, 0.001))
+            elif not task.running:
+                # before the start the buffer is filled from its beginning
+                n = min(n, size - task.written)
+                if n <= 0:
+                    return (ERR_WRITE_TIMEOUT, 0)
+
+            index = (task.written + numpy.arange(n)) % size
+            task.output[index] = data[:n]
+            task.written += n
+            return (0, n)
+
+    def DAQmxSetWriteRegenMode(self, taskHandle, data):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+        if task.running:
+            return ERR_RUNNING
+
+        task.regen = data == self.DAQmx_Val_AllowRegen
+        return 0
+
+    def DAQmxGetWriteSpaceAvail(self, taskHandle, data):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+
+        size = len(task.output) if task.output is not None else (task.buffer_size or 0)
+        data[0] = max(size - (task.written - self._generated(task)), 0)
+        return 0
+
+    def DAQmxGetWriteTotalSampPerChanGenerated(self, taskHandle, data):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+
+        self._check_underflow(task)
+        data[0] = self._generated(task)
+        return 0
+
+    def DAQmxWaitUntilTaskDone(self, taskHandle, timeToWait):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+
+        deadline = None if timeToWait < 0 else self._clock() + timeToWait
+        while not self._is_done(task):
+            if task.is_output and self._check_underflow(task):
+                break
+            if deadline is not None and self._clock() >= deadline:
+                return ERR_WAIT_TIMEOUT
+            self._sleep(0.001)
+        return task.error
+
+    def DAQmxWaitForNextSampleClock(self, taskHandle, timeout, isLate):
+        task = self._task(taskHandle)
+        if task is None:
+            return ERR_INVALID_TASK
+        if not task.running:
+            return ERR_NOT_RUNNING
+
+        target = task.tick + 1
+        late = False
+        if self.realtime and task.t0 is not None:
+            current = int((self._clock() - task.t0)*task.rate)
+            if current >= target:
+                # the next clock arrived before the loop got here, except on the first call
+                late = task.tick >= 0
+                target = current
+            else:
+                wait = task.t0 + target/task.rate - self._clock()
+                if timeout >= 0 and wait > timeout:
+                    self._sleep(timeout)
+                    return ERR_TIMEOUT
+                if wait > 0:
+                    self._sleep(wait)
+
+        task.tick = target
+        isLate[0] = int(late)
+        return 0
+
+    # devices
+
+    def _device(self, device):
+        return self.devices.get(to_str(device))
+
+    def _device_getter(fetch):
+        def getter(self, device, data, *args):
+            dev = self._device(device)
+            if dev is None:
+                return ERR_BAD_DEVICE
+            return fetch(self, dev, data, *args)
+        getter.__name__ = fetch.__name__
+        return getter
+
+    def _device_string(fetch):
+        def getter(self, dev, data, bufferSize):
+            return self._put_string(data, bufferSize, fetch(self, dev))
+        getter.__name__ = fetch.__name__
+        return getter
+
+    def _device_value(fetch):
+        def getter(self, dev, data):
+            data[0] = fetch(self, dev)
+            return 0
+        getter.__name__ = fetch.__name__
+        return getter
+
+    DAQmxGetDevIsSimulated = _device_getter(_device_value(lambda self, dev: 1))
+    DAQmxGetDevProductCategory = _device_getter(_device_value(lambda self, dev: self.DAQmx_Val_MSeriesDAQ))
+    DAQmxGetDevProductType = _device_getter(_device_string(lambda self, dev: dev.product_type))
+    DAQmxGetDevProductNum = _device_getter(_device_value(lambda self, dev: 0x7435))
+    DAQmxGetDevSerialNum = _device_getter(_device_value(lambda self, dev: dev.serial_number))
+    DAQmxGetDevAnlgTrigSupported = _device_getter(_device_value(lambda self, dev: 1))
+    DAQmxGetDevDigTrigSupported = _device_getter(_device_value(lambda self, dev: 1))
+    DAQmxGetDevAIPhysicalChans = _device_getter(_device_string(lambda self, dev: ', '.join(dev.ai)))
+    DAQmxGetDevAOPhysicalChans = _device_getter(_device_string(lambda self, dev: ', '.join(dev.ao)))
+    DAQmxGetDevDILines = _device_getter(_device_string(lambda self, dev: ', '.join(dev.lines)))
+    DAQmxGetDevDIPorts = _device_getter(_device_string(lambda self, dev: ', '.join(dev.ports)))
+    DAQmxGetDevDIMaxRate = _device_getter(_device_value(lambda self, dev: dev.di_max_rate))
+    DAQmxGetDevDOLines = DAQmxGetDevDILines
+    DAQmxGetDevDOPorts = DAQmxGetDevDIPorts
+    DAQmxGetDevDOMaxRate = DAQmxGetDevDIMaxRate
+    DAQmxGetDevCIPhysicalChans = _device_getter(_device_string(lambda self, dev: ', '.join(dev.ctr)))
+    DAQmxGetDevCOPhysicalChans = DAQmxGetDevCIPhysicalChans
+    DAQmxGetDevCIMaxSize = _device_getter(_device_value(lambda self, dev: 32))
+    DAQmxGetDevCIMaxTimebase = _device_getter(_device_value(lambda self, dev: dev.ci_max_timebase))
+    DAQmxGetDevCISampClkSupported = _device_getter(_device_value(lambda self, dev: 1))
+    DAQmxGetDevAIMaxSingleChanRate = _device_getter(_device_value(lambda self, dev: dev.ai_max_rate))
+    DAQmxGetDevAIMaxMultiChanRate = _device_getter(_device_value(lambda self, dev: dev.ai_max_rate))
+    DAQmxGetDevAIMinRate = _device_getter(_device_value(lambda self, dev: 0.1))
+    DAQmxGetDevAISimultaneousSamplingSupported = _device_getter(_device_value(lambda self, dev: 0))
+    DAQmxGetDevAITrigUsage = _device_getter(_device_value(lambda self, dev:
+            self.DAQmx_Val_Bit_TriggerUsageTypes_Start | self.DAQmx_Val_Bit_TriggerUsageTypes_Reference))
+    DAQmxGetDevAICouplings = _device_getter(_device_value(lambda self, dev: self.DAQmx_Val_Bit_CouplingTypes_DC))
+    DAQmxGetDevTerminals = _device_getter(_device_string(lambda self, dev:
+            ', '.join('/{}/PFI{}'.format(dev.name, i) for i in range(16))))
+
+    def _ranges(self, dev, data, arraySizeInSamples):
+        values = [v for r in dev.ai_ranges for v in r]
+        if data == self._ffi.NULL or arraySizeInSamples == 0:
+            return len(values)
+        for i in range(arraySizeInSamples):
+            data[i] = values[i] if i < len(values) else 0.
+        return 0
+
+    DAQmxGetDevAIVoltageRngs = _device_getter(_ranges)
+
+    del _device_getter, _device_string, _device_value
+
+    def __getattr__(self, name):
+        # any other device query declared in the header is reported as unsupported
+        if name.startswith('DAQmxGet'):
+            return lambda *args: ERR_NOT_SUPPORTED
+        raise AttributeError(name)
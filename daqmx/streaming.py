@@ -0,0 +1,110 @@
+from .defs import EventType
+from .lowlevel import resolve, register_nsamples_callback, unregister_nsamples_callback
+from .ring import RingBuffer
+import threading
+import logging
+
+try:
+    import Queue as queue
+except ImportError:
+    import queue
+
+log = logging.getLogger('daqmx')
+
+__all__ = ['StreamingReader']
+
+class StreamingReader(object):
+    '''reads a continuous task on a dedicated thread, driven by the every N samples event
+
+    The DAQmx every N samples callback only signals that a block is ready; the read 
+    itself happens on the reader's own thread, straight into a RingBuffer, so neither 
+    the driver's callback thread nor the caller's (e.g. UI) thread ever blocks on 
+    DAQmx. Each block is handed on as a (samples, channels) view into the ring, either 
+    to `callback` from the reader thread or through the bounded `blocks` queue. When 
+    the queue is full, the block is dropped from the queue (it is still in the ring) 
+    and `dropped_blocks` is incremented.
+
+    Consumers that only want the latest data can ignore both and use `ring` directly.
+    '''
+
+    def __init__(self, handle, n_channels, samples_per_block, ring_blocks=16, 
+            queue_size=8, callback=None, timeout=1.):
+        if queue_size >= ring_blocks:
+            raise ValueError('queue_size must be smaller than ring_blocks so queued blocks stay valid')
+
+        self._handle = resolve(handle)
+        self._samples_per_block = samples_per_block
+        self._timeout = timeout
+        self._user_callback = callback
+
+        self.ring = RingBuffer(ring_blocks*samples_per_block, n_channels)
+        self.blocks = queue.Queue(queue_size)
+        self.n_blocks = 0
+        self.dropped_blocks = 0
+        self.error = None
+
+        self._events = queue.Queue()
+        self._thread = None
+
+        # the callback store only holds weak references, keep the bound method alive
+        self._on_samples_ref = self._on_samples
+
+    is_running = property(lambda self: self._thread is not None and self._thread.is_alive())
+
+    def _on_samples(self, handle, event_type, n_samples, data):
+        # runs on a DAQmx thread, do as little as possible here
+        self._events.put(n_samples)
+        return 0
+
+    def _run(self):
+        while True:
+            n = self._events.get()
+            if n is None: break
+
+            try:
+                slot = self.ring.write_slot(n)
+                count = self._handle.read_f64_into(slot, slot.shape[0], self._timeout)
+                data = slot[:count]
+                self.ring.commit(count)
+                self.n_blocks += 1
+
+                if self._user_callback is not None:
+                    self._user_callback(data)
+                else:
+                    try:
+                        self.blocks.put_nowait(data)
+                    except queue.Full:
+                        self.dropped_blocks += 1
+            except Exception as e:
+                log.exception(e)
+                self.error = e
+                break
+
+    def start(self):
+        '''register the every N samples event, start the reader thread and the task'''
+        if self.is_running:
+            raise RuntimeError('reader is already running')
+
+        self.error = None
+        register_nsamples_callback(self._handle, self._samples_per_block, self._on_samples_ref)
+
+        self._thread = threading.Thread(target=self._run, name='daqmx-reader')
+        self._thread.daemon = True
+        self._thread.start()
+
+        try:
+            self._handle.start()
+        except Exception:
+            self._events.put(None)
+            raise
+
+    def stop(self):
+        '''stop the task and the reader thread'''
+        try:
+            self._handle.stop()
+            unregister_nsamples_callback(self._handle, EventType.Acquired_Into_Buffer)
+        finally:
+            if self._thread is not None:
+                self._events.put(None)
+                self._thread.join()
+                self._thread = None
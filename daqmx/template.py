@@ -0,0 +1,229 @@
+from .defs import SampleMode, ActiveEdge, Units, TerminalConfig, TaskState
+from .lowlevel import make_task, clear_task, control_task, resolve, add_input_voltage_channels, \
+    set_timing_sample_clock, set_input_buffer_size, set_start_trigger_digital_edge
+import collections
+import itertools
+import threading
+import logging
+import json
+
+log = logging.getLogger('daqmx')
+
+__all__ = ['TaskTemplate', 'TaskPool']
+
+_task_ids = itertools.count()
+
+def _enum(cls, name):
+    '''value of an enum class attribute given by name, e.g. SampleMode 'Finite' '''
+    if name.startswith('_') or not hasattr(cls, name):
+        raise ValueError('{} has no value {!r}'.format(cls.__name__, name))
+    return getattr(cls, name)
+
+class TaskTemplate(object):
+    '''everything needed to build an analog input task, as plain data
+
+    Enum values are stored by name ('Finite', 'Volts', ...) so that templates can be
+    saved as JSON and loaded with another driver version. `build()` creates, configures
+    and commits a task; `TaskPool` keeps built tasks around for reuse.
+
+        template = TaskTemplate().add_voltage_channels('Dev1/ai0:7', -1., 1.) \\
+                .set_timing(1e5, 1000, 'Finite')
+        handle = template.build()
+    '''
+
+    def __init__(self, channels=None, timing=None, buffer_size=None, start_trigger=None,
+            name='template'):
+        self.channels = list(channels or [])
+        self.timing = timing
+        self.buffer_size = buffer_size
+        self.start_trigger = start_trigger
+        self.name = name
+
+    def add_voltage_channels(self, pchannels, min, max, names=None, units='Volts',
+            terminal_config='Default'):
+        '''add channels, see `add_input_voltage_channels`. Returns the template'''
+        _enum(Units, units)
+        _enum(TerminalConfig, terminal_config)
+        self.channels.append({'physical': pchannels, 'min': min, 'max': max, 'names': names,
+            'units': units, 'terminal_config': terminal_config})
+        return self
+
+    def set_timing(self, rate, n_samples, sample_mode='Finite', active_edge='Rising',
+            source='OnboardClock'):
+        '''time the task from a sample clock. Returns the template'''
+        _enum(SampleMode, sample_mode)
+        _enum(ActiveEdge, active_edge)
+        self.timing = {'rate': rate, 'n_samples': n_samples, 'sample_mode': sample_mode,
+            'active_edge': active_edge, 'source': source}
+        return self
+
+    def set_start_trigger(self, source, edge='Rising'):
+        '''start the task on a digital edge. Returns the template'''
+        _enum(ActiveEdge, edge)
+        self.start_trigger = {'source': source, 'edge': edge}
+        return self
+
+    def to_dict(self):
+        return {'name': self.name, 'channels': self.channels, 'timing': self.timing,
+            'buffer_size': self.buffer_size, 'start_trigger': self.start_trigger}
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d.get('channels'), d.get('timing'), d.get('buffer_size'),
+                d.get('start_trigger'), d.get('name', 'template'))
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    @classmethod
+    def from_json(cls, s):
+        return cls.from_dict(json.loads(s))
+
+    # the configuration without the name, tasks built from equal keys are interchangeable
+    key = property(lambda self: json.dumps(dict(self.to_dict(), name=None), sort_keys=True))
+
+    def __eq__(self, other):
+        return isinstance(other, TaskTemplate) and self.key == other.key
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __repr__(self):
+        return 'TaskTemplate({})'.format(self.to_json(sort_keys=True))
+
+    def build(self, name=None, commit=True):
+        '''create the task, configure it and commit it to the hardware. Returns a Handle
+
+        A committed task has been verified and programmed already, starting it only
+        starts the acquisition; stopping it returns it to the committed state, so it
+        can be started again without any configuration.
+        '''
+        if name is None:
+            name = '{}_{}'.format(self.name, next(_task_ids))
+
+        handle = make_task(name)
+        try:
+            table = None
+            for c in self.channels:
+                table = add_input_voltage_channels(handle, c['physical'], c['min'], c['max'],
+                        _enum(Units, c['units']), c['names'], _enum(TerminalConfig, c['terminal_config']),
+                        table)
+
+            t = self.timing
+            if t is not None:
+                set_timing_sample_clock(handle, t['rate'], t['n_samples'], _enum(SampleMode, t['sample_mode']),
+                        _enum(ActiveEdge, t['active_edge']), t['source'])
+
+            if self.buffer_size is not None:
+                set_input_buffer_size(handle, self.buffer_size)
+
+            if self.start_trigger is not None:
+                set_start_trigger_digital_edge(handle, self.start_trigger['source'],
+                        _enum(ActiveEdge, self.start_trigger['edge']))
+
+            if commit:
+                control_task(handle, TaskState.Commit)
+        except Exception:
+            clear_task(handle)
+            raise
+
+        return resolve(handle)
+
+class TaskPool(object):
+    '''committed tasks kept ready for reuse, per template
+
+    `acquire(template)` returns an idle task built from an equal template, or builds
+    one; `release(handle)` stops it and puts it back. A released task stays committed,
+    so the next acquire costs no configuration at all. Up to `max_idle` tasks are
+    kept per template, surplus tasks are cleared.
+
+    A committed task has its physical channels reserved, so on real hardware only one
+    task of a template can be committed at a time; a second one fails to commit with
+    a resource reserved error (-50103). Keep the default `max_idle` of 1 unless the
+    templates' channels can be shared, e.g. on simulated devices.
+
+        with pool.task(template) as handle:
+            handle.start()
+            ...
+    '''
+
+    def __init__(self, max_idle=1):
+        self.max_idle = max_idle
+        self._idle = collections.defaultdict(list)
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def prepare(self, template, n=1):
+        '''build tasks until `n` are idle for `template`'''
+        with self._lock:
+            missing = n - len(self._idle[template.key])
+        for i in range(missing):
+            self.release(self._build(template))
+
+    def _build(self, template):
+        handle = template.build()
+        with self._lock:
+            self._templates[handle.value] = template.key
+        return handle
+
+    def acquire(self, template):
+        '''an idle committed task for `template`, building one if there is none'''
+        with self._lock:
+            idle = self._idle[template.key]
+            if idle:
+                return idle.pop()
+        return self._build(template)
+
+    def release(self, handle):
+        '''stop a task from `acquire` and keep it for reuse'''
+        handle.stop()
+
+        with self._lock:
+            key = self._templates[handle.value]
+            idle = self._idle[key]
+            if len(idle) < self.max_idle:
+                idle.append(handle)
+                return
+            del self._templates[handle.value]
+        clear_task(handle)
+
+    def task(self, template):
+        '''context manager that acquires a task and releases it afterwards'''
+        return _PooledTask(self, template)
+
+    def idle(self, template=None):
+        '''number of idle tasks, for one template or all'''
+        with self._lock:
+            if template is not None:
+                return len(self._idle[template.key])
+            return sum(len(v) for v in self._idle.values())
+
+    def clear(self):
+        '''clear all idle tasks'''
+        with self._lock:
+            handles = [h for v in self._idle.values() for h in v]
+            self._idle.clear()
+            for h in handles:
+                del self._templates[h.value]
+
+        for h in handles:
+            try:
+                clear_task(h)
+            except Exception as e:
+                log.warning(e)
+
+class _PooledTask(object):
+    def __init__(self, pool, template):
+        self._pool = pool
+        self._template = template
+        self._handle = None
+
+    def __enter__(self):
+        self._handle = self._pool.acquire(self._template)
+        return self._handle
+
+    def __exit__(self, *exc):
+        self._pool.release(self._handle)
@@ -1,6 +1,5 @@
 import daqmx
 import daqmx.lowlevel as d 
-from collections import deque
 import numpy
 import sys
 import logging
@@ -32,6 +31,15 @@ class ScopeUI(QMainWindow, Ui_MainWindow):
 
         self.worker = TwoChanScope()
 
+        # blocks averaged per frame, and points drawn in xy mode
+        self.navg = 1
+        self.xy_points = 4096
+
+        self._shown = 0
+        self._n_bins = 0
+        self._avg = None
+        self._xy_i = self._xy_q = None
+
         self.graphicsView.showGrid(x=True, y=True)
         self.graphicsView.setMenuEnabled(True)
 
@@ -61,10 +69,6 @@ class ScopeUI(QMainWindow, Ui_MainWindow):
         self.scope_timer.setInterval(25)
         self.scope_timer.timeout.connect(self.update_plots)
 
-        self.data_timer = QTimer()
-        self.data_timer.setInterval(1)
-        self.data_timer.timeout.connect(self.worker.get_data)
-
         self.is_paused = False
 
     def start_clicked(self):
@@ -72,14 +76,12 @@ class ScopeUI(QMainWindow, Ui_MainWindow):
         	log.debug('was paused, starting')
         	self.startButton.setText('Pause')
         	self.is_paused = not self.is_paused
-        	self.data_timer.start()
         	self.worker.start()
         else:
         	log.debug('was running, pausing')
         	self.startButton.setText('Run')
         	self.is_paused = not self.is_paused
         	self.worker.stop()
-        	self.data_timer.stop()
 
     def q_offset_changed(self):
         self._q_val = float(self.qOffsetBox.value())/100
@@ -115,30 +117,60 @@ class ScopeUI(QMainWindow, Ui_MainWindow):
         else:
         	pass
 
+    def _allocate(self, n_bins, n_samples):
+        # plot arrays are reused between frames, only the window width changes them
+        self._n_bins = n_bins
+        self._env = numpy.empty((2*n_bins, 2))
+        self._i_plot = numpy.empty(2*n_bins)
+        self._q_plot = numpy.empty(2*n_bins)
+
+        # every bin is drawn as a vertical stroke from its min to its max
+        self._x = numpy.repeat((numpy.arange(n_bins)*n_samples)//n_bins, 2).astype(numpy.float64)
+
+    def _scale(self, i, q, i_out, q_out):
+        numpy.multiply(i, self._i_gain, out=i_out)
+        i_out += self._i_val
+        numpy.multiply(q, self._q_gain, out=q_out)
+        q_out += self._q_val
+
     def update_plots(self):
         try:
-            navg = 1 
-            if len(self.worker.data) >= navg:
-                block1 = self.worker.data.popleft()
-                nsamp = block1.shape[0]
-                data = numpy.zeros((nsamp*navg, 2))
-                data[:nsamp] = block1
-
-                for i in xrange(1, navg):
-                    data[i*nsamp:(i+1)*nsamp, :] = self.worker.data.popleft()
-
-                log.debug('data shape %s', str(data.shape))
-
-                if self.xy_mode is True:
-                    log.debug('updating xy plot')
-                    self.xy_curve.setData(self._i_gain*data[:, 0] + self._i_val, self._q_gain*data[:, 1] + \
-                        self._q_val)
-                elif self.stacked_mode is True:
-                    log.debug('updating stacked plot')
-                    self.i_curve.setData(self._i_gain*data[:, 0] + self._i_val)
-                    self.q_curve.setData(self._q_gain*data[:, 1] + self._q_val)
-        except IndexError:
-            pass
+            nsamp = self.worker.block_size
+            n = nsamp*self.navg
+
+            written = self.worker.ring.written
+            if written - self._shown < n:
+                return
+            self._shown = written
+
+            # only the newest frame is drawn, straight from the ring the reader fills
+            data = self.worker.ring.latest(n)
+            if self.navg > 1:
+                if self._avg is None or self._avg.shape[0] != nsamp:
+                    self._avg = numpy.empty((nsamp, 2))
+                numpy.mean(data.reshape(self.navg, nsamp, 2), axis=0, out=self._avg)
+                data = self._avg
+
+            if self.xy_mode is True:
+                log.debug('updating xy plot')
+                step = max(1, nsamp//self.xy_points)
+                i, q = data[::step, 0], data[::step, 1]
+                if self._xy_i is None or self._xy_i.shape != i.shape:
+                    self._xy_i, self._xy_q = numpy.empty(i.shape), numpy.empty(q.shape)
+                self._scale(i, q, self._xy_i, self._xy_q)
+                self.xy_curve.setData(self._xy_i, self._xy_q)
+            elif self.stacked_mode is True:
+                log.debug('updating stacked plot')
+                # one min/max pair per horizontal pixel is all the screen can show
+                lo, hi = daqmx.envelope(data, max(self.graphicsView.width(), 1))
+                if lo.shape[0] != self._n_bins:
+                    self._allocate(lo.shape[0], data.shape[0])
+
+                self._env[0::2] = lo
+                self._env[1::2] = hi
+                self._scale(self._env[:, 0], self._env[:, 1], self._i_plot, self._q_plot)
+                self.i_curve.setData(self._x, self._i_plot)
+                self.q_curve.setData(self._x, self._q_plot)
         except Exception as e:
             log.exception(e)
 
@@ -148,7 +180,6 @@ class ScopeUI(QMainWindow, Ui_MainWindow):
 
     def show(self):
         self.scope_timer.start()
-        self.data_timer.start()
         self.worker.start()
 
         super(QMainWindow, self).show()
@@ -166,21 +197,18 @@ class TwoChanScope(object):
         
         d.set_timing_sample_clock(self.h, 2<<16, 2<<16, sample_mode=d.SampleMode.Continuous)
         #d.set_input_buffer_size(self.h, 2<<15)
-        self.data = deque()
-        
-    def get_data(self):
-        nsamples = 2<<15
-        log.debug('in callback, nsamples: %d, reading %d samples per channel', nsamples, nsamples>>1)
-        data, count = d.read_f64(self.h, nsamples, n_samps_per_channel=nsamples>>1, timeout=0.2)
-        log.debug('got count: %d, data %s', count, str(data))
-        data = numpy.frombuffer(data, dtype=numpy.float64, count=count<<1)
-        self.data.append(data.reshape(count, 2))
+
+        # blocks are read on a background thread whenever the driver signals that 
+        # block_size samples have arrived, straight into the reader's ring
+        self.block_size = 2<<14
+        self.streamer = daqmx.StreamingReader(self.h, 2, self.block_size)
+        self.ring = self.streamer.ring
 
     def start(self):
-        d.start_task(self.h)
+        self.streamer.start()
 
     def stop(self):
-        d.stop_task(self.h)
+        self.streamer.stop()
 
     def clear(self):
         d.clear_task(self.h)
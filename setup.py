@@ -0,0 +1,24 @@
+'''builds the cffi modules of daqmx.clib along with the package
+
+    pip install .
+
+compiles daqmx._nidaqmx against the NI-DAQmx headers and library and writes the
+parsed declarations to daqmx._types. Set DAQMX_BACKEND=sim to build only _types,
+on machines without NI-DAQmx.
+'''
+import os
+from setuptools import setup
+
+cffi_modules = ['daqmx/_build.py:types_builder']
+if os.environ.get('DAQMX_BACKEND', 'nidaqmx') != 'sim':
+    cffi_modules.append('daqmx/_build.py:nidaqmx_builder')
+
+setup(
+    name='daqmx',
+    version='0.1',
+    description='python binding to the NI-DAQmx C library',
+    packages=['daqmx'],
+    setup_requires=['cffi>=1.0'],
+    install_requires=['cffi>=1.0', 'numpy', 'bidict'],
+    cffi_modules=cffi_modules,
+)
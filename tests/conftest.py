@@ -0,0 +1,26 @@
+'''the tests run against the simulated driver, see daqmx.sim'''
+import itertools
+import os
+
+# the backend is picked when daqmx.clib is first imported
+os.environ['DAQMX_BACKEND'] = 'sim'
+
+import pytest
+
+from daqmx import lowlevel
+
+_ids = itertools.count()
+
+@pytest.fixture
+def make_task():
+    '''make_task(name) creates a task with a unique name, cleared after the test'''
+    handles = []
+
+    def make(name='task'):
+        handle = lowlevel.make_task('{}_{}'.format(name, next(_ids)))
+        handles.append(handle)
+        return handle
+
+    yield make
+    for handle in handles:
+        lowlevel.clear_task(handle)
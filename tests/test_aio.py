@@ -0,0 +1,54 @@
+import sys
+
+import pytest
+
+from daqmx.defs import SampleMode
+from daqmx.errors import BufferOverwriteError
+from daqmx.lowlevel import add_input_voltage_channels, set_timing_sample_clock
+
+pytestmark = pytest.mark.skipif(sys.version_info < (3, 7), reason='daqmx.aio needs asyncio.run')
+
+def _acquire(handle):
+    import asyncio
+    from daqmx.aio import AsyncTask
+
+    task = AsyncTask(handle, n_channels=2, samples_per_event=100)
+
+    async def run():
+        task.start()
+        blocks = [block.shape for block in [b async for b in task.stream(250)]]
+        await task.wait_until_done()
+        task.stop()
+        return blocks
+
+    return asyncio.run(run())
+
+def test_stream_in_new_event_loops(make_task):
+    handle = make_task('aio')
+    add_input_voltage_channels(handle, 'Dev1/ai0:1', -1., 1.)
+    set_timing_sample_clock(handle, 1e5, 1000, SampleMode.Finite)
+
+    # every asyncio.run has a loop of its own, the task is made outside of it and
+    # takes the running one when it starts
+    assert _acquire(handle) == [(250, 2)]*4
+    assert _acquire(handle) == [(250, 2)]*4
+
+def test_error_status_is_typed(make_task):
+    import asyncio
+    from daqmx.aio import AsyncTask
+
+    handle = make_task('aio')
+    add_input_voltage_channels(handle, 'Dev1/ai0', -1., 1.)
+    set_timing_sample_clock(handle, 1e5, 1000, SampleMode.Continuous)
+
+    async def run():
+        task = AsyncTask(handle)
+        task.start()
+        task._task_done(-200279)
+        try:
+            await task.wait_until_done()
+        finally:
+            task.stop()
+
+    with pytest.raises(BufferOverwriteError):
+        asyncio.run(run())
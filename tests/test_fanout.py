@@ -0,0 +1,19 @@
+import numpy
+
+from daqmx.fanout import FanOut
+
+def _large(seq, block):
+    # bigger than a pipe buffer, the worker blocks until it is taken out of the queue
+    return numpy.full(1 << 18, float(seq))
+
+def test_stop_keeps_results_of_the_last_blocks():
+    fan = FanOut(_large, n_channels=2, block_samples=100, n_workers=2)
+    fan.start()
+    for i in range(6):
+        fan.publish(numpy.full((100, 2), float(i)), timeout=5.)
+    fan.stop(timeout=10.)
+
+    results = sorted(fan.results())
+    assert [seq for seq, value in results] == list(range(6))
+    assert all(value[0] == seq for seq, value in results)
+    assert fan.errors == []
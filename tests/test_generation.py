@@ -0,0 +1,34 @@
+import numpy
+
+from daqmx.lowlevel import add_output_voltage_channels, query_samples_generated
+from daqmx.generation import WaveformStreamer
+
+def test_streamer_plays_an_array_source(make_task):
+    ao = make_task('ao')
+    add_output_voltage_channels(ao, 'Dev1/ao0', -10., 10.)
+
+    streamer = WaveformStreamer(ao, numpy.linspace(-1., 1., 8000), 40000., block_samples=1000)
+    streamer.start()
+    try:
+        streamer.wait(5.)
+        assert query_samples_generated(ao) == 8000
+    finally:
+        streamer.stop()
+
+    assert streamer.blocks_written == 8
+    assert streamer.error is None
+
+def test_streamer_restarts_after_a_finite_generation(make_task):
+    ao = make_task('ao')
+    add_output_voltage_channels(ao, 'Dev1/ao0', -10., 10.)
+
+    streamer = WaveformStreamer(ao, numpy.linspace(-1., 1., 8000), 40000., block_samples=1000)
+    for i in range(3):
+        streamer.start()
+        try:
+            streamer.wait(5.)
+        finally:
+            streamer.stop()
+
+        assert streamer.blocks_written == 8
+        assert streamer.error is None
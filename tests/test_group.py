@@ -0,0 +1,50 @@
+import numpy
+import pytest
+
+from daqmx.defs import SampleMode, FillMode
+from daqmx.group import TaskGroup
+from daqmx.lowlevel import add_input_voltage_channel
+
+@pytest.fixture
+def group(make_task):
+    a = make_task('master')
+    add_input_voltage_channel(a, 'Dev1/ai0:1', -1., 1.)
+    b = make_task('slave')
+    add_input_voltage_channel(b, 'Dev2/ai0:2', -1., 1.)
+
+    group = TaskGroup([a, b])
+    group.configure(1e4, 100000, SampleMode.Continuous)
+    group.start()
+    yield group
+    group.stop()
+
+def test_read_is_aligned(group):
+    data = group.read(500, 1.)
+
+    assert data.channels == ['Dev1/ai0', 'Dev1/ai1', 'Dev2/ai0', 'Dev2/ai1', 'Dev2/ai2']
+    assert data.fill_mode == FillMode.GroupByChannel
+    assert data.by_scan.shape == (500, 5)
+    # the simulated devices put the same waveform on ai0, up to noise
+    assert numpy.allclose(data.channel('Dev1/ai0'), data.channel('Dev2/ai0'), atol=0.1)
+
+def test_short_reads_keep_the_tasks_aligned(group):
+    out = numpy.empty((5, 500))
+    group.read_into(out, 500, 1.)
+    read_b, view_b = group._reads[1]
+
+    # the slave returns fewer samples than asked for on some reads
+    limits = [300, 100, None, 450]
+    def short_read(view, n, timeout, fill_mode):
+        limit = limits.pop(0) if limits else None
+        return read_b(view, min(n, limit) if limit else n, timeout, fill_mode)
+    group._reads[1] = (short_read, view_b)
+
+    a, b = [], []
+    for i in range(6):
+        count = group.read_into(out, 500, 1.)
+        a.append(out[0, :count].copy())
+        b.append(out[2, :count].copy())
+    a, b = numpy.concatenate(a), numpy.concatenate(b)
+
+    assert len(a) == 300 + 100 + 500 + 450 + 500 + 500
+    assert numpy.allclose(a, b, atol=0.1)
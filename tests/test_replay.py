@@ -0,0 +1,77 @@
+import threading
+
+import numpy
+import pytest
+
+from daqmx.defs import FillMode
+from daqmx.record import Recorder, Recording
+from daqmx.replay import ReplayTask
+
+@pytest.fixture
+def recording(tmpdir):
+    data = numpy.arange(20000.).reshape(-1, 2)
+    recorder = Recorder(str(tmpdir.join('run')), 2, 1e5, channels=['a', 'b'], chunk_samples=3000,
+            buffer_samples=1000)
+    recorder.start()
+    for i in range(0, data.shape[0], 1000):
+        recorder.write(data[i:i + 1000])
+    recorder.close()
+    return Recording(str(tmpdir.join('run'))), data
+
+def test_unpaced_reads_return_the_recording(recording):
+    rec, data = recording
+    task = ReplayTask(rec, speed=None, buffer_samples=1000)
+    task.start()
+    out = numpy.empty((2500, 2))
+    blocks = []
+    while task.read_position < len(rec):
+        n = task.read_f64_into(out, min(2500, len(rec) - task.read_position), 1.)
+        blocks.append(out[:n].copy())
+    task.stop()
+
+    assert numpy.array_equal(numpy.concatenate(blocks), data)
+
+def test_unpaced_read_as_does_not_wait_for_the_whole_recording(recording):
+    rec, data = recording
+    task = ReplayTask(rec, speed=None, buffer_samples=1000)
+    task.start()
+
+    result = []
+    reader = threading.Thread(target=lambda: result.append(task.read_as('AnalogF64', 4000, 2000)))
+    reader.daemon = True
+    reader.start()
+    reader.join(5.)
+    task.stop()
+
+    assert not reader.is_alive()
+    assert numpy.array_equal(result[0].by_scan, data[:2000])
+
+def test_unpaced_events_deliver_every_block(recording):
+    rec, data = recording
+    task = ReplayTask(rec, speed=None, buffer_samples=2000)
+    blocks = []
+    done = threading.Event()
+
+    def on_samples(task, event_type, n_samples, callback_data):
+        out = numpy.empty((n_samples, 2))
+        task.read_f64_into(out, n_samples, 1.)
+        blocks.append(out)
+        return 0
+
+    task.register_nsamples_callback(1000, on_samples)
+    task.register_done_callback(lambda task, status, callback_data: done.set())
+    task.start()
+    assert done.wait(5.)
+    task.stop()
+
+    assert numpy.array_equal(numpy.concatenate(blocks), data)
+
+def test_paced_read_as_waits_for_the_recording(recording):
+    rec, data = recording
+    # 10000 samples at 1e5 Hz, replayed 10 times faster
+    task = ReplayTask(rec, speed=10.)
+    task.start()
+    result = task.read_as('AnalogF64', 2*len(rec), len(rec), fill_mode=FillMode.GroupByChannel)
+    task.stop()
+
+    assert numpy.array_equal(result.by_scan, data)
@@ -0,0 +1,66 @@
+import os
+import socket
+import time
+
+import numpy
+import pytest
+
+from daqmx.defs import SampleMode
+from daqmx.lowlevel import add_input_voltage_channels, set_timing_sample_clock
+from daqmx.server import StreamServer, StreamClient
+
+@pytest.fixture
+def task(make_task):
+    handle = make_task('srv')
+    add_input_voltage_channels(handle, 'Dev1/ai0:1', -10., 10.)
+    set_timing_sample_clock(handle, 1e4, 1000, SampleMode.Continuous)
+    return handle
+
+def test_subscribers_get_their_decimation(task):
+    with StreamServer(task, ('127.0.0.1', 0), rate=1e4, samples_per_block=500) as server:
+        full = StreamClient(server.address)
+        every_third = StreamClient(server.address, decimate=3)
+        filtered = StreamClient(server.address, decimate=5, lowpass=True)
+
+        frames = [full.read() for i in range(3)]
+        assert [f.sample_index for f in frames] == [frames[0].sample_index + 500*i for i in range(3)]
+        assert frames[0].data.shape == (500, 2)
+        assert full.channels == ['Dev1/ai0', 'Dev1/ai1']
+
+        # every third sample of the acquisition, whichever block it falls in
+        for f in [every_third.read() for i in range(3)]:
+            assert f.sample_index % 3 == 0
+            assert f.data.shape[0] in (166, 167)
+
+        assert filtered.info['rate_out'] == 2e3
+        assert filtered.read().data.shape == (100, 2)
+
+    for client in (full, every_third, filtered):
+        client.close()
+
+def test_raw_stream_over_a_unix_socket(task, tmpdir):
+    path = str(tmpdir.join('daqmx.sock'))
+    with StreamServer(task, path, rate=1e4, samples_per_block=500, raw=True) as server:
+        client = StreamClient(path)
+        frame = client.read()
+        client.close()
+
+    assert client.info['dtype'] == numpy.dtype(numpy.int16).str
+    assert len(client.info['scaling_coeffs']) == 2
+    assert frame.data.dtype == numpy.int16
+    assert not os.path.exists(path)
+
+def test_bad_subscription_is_rejected(task):
+    with StreamServer(task, ('127.0.0.1', 0), rate=1e4, samples_per_block=500) as server:
+        with pytest.raises(ValueError):
+            StreamClient(server.address, policy='never')
+
+def test_silent_client_does_not_block_others(task):
+    with StreamServer(task, ('127.0.0.1', 0), rate=1e4, samples_per_block=500) as server:
+        silent = socket.create_connection(server.address)
+        t0 = time.time()
+        client = StreamClient(server.address)
+        client.read()
+        assert time.time() - t0 < 1.
+        client.close()
+        silent.close()
@@ -0,0 +1,60 @@
+import itertools
+
+import numpy
+import pytest
+
+from daqmx.daqmx import Device, Task, AnalogInputVoltage, AnalogOutputVoltage, DigitalInput, \
+    DigitalOutput, SampleClock, PhysicalChannelInput, PhysicalChannelOutput
+from daqmx.defs import Units
+
+_ids = itertools.count()
+
+def make_task(name='task'):
+    return Task('{}_{}'.format(name, next(_ids)))
+
+def test_analog_input_read():
+    task = make_task('ai')
+    channel = task.add_channel(AnalogInputVoltage, PhysicalChannelInput('Dev1/ai0'), -10., 10., 
+            Units.Volts, name='a')
+    task.add_channel(AnalogInputVoltage, PhysicalChannelInput('Dev1/ai1'), -10., 10., Units.Volts)
+    assert task.channels == [channel, task.channel_by_name('Dev1/ai1')]
+
+    task.set_timing(SampleClock, 1000., n_per_channel=100)
+    task.start()
+    data = task.read_as('AnalogF64', 200, 100)
+    task.stop()
+
+    assert data.channels == ['a', 'Dev1/ai1']
+    assert data.by_scan.shape == (100, 2)
+
+def test_bulk_channels_are_kept_in_the_table():
+    task = make_task('bulk')
+    table = task.add_channel(AnalogInputVoltage, 'Dev1/ai0:3', -1., 1., names='x0:3')
+
+    assert table is task.table
+    assert [c.name for c in task.channels] == ['x0', 'x1', 'x2', 'x3']
+    assert task.channel_by_name('x2').physical == 'Dev1/ai2'
+
+def test_analog_output_write():
+    task = make_task('ao')
+    channel = task.add_channel(AnalogOutputVoltage, PhysicalChannelOutput('Dev1/ao0'), -5., 5., name='out')
+
+    assert task.channels == [channel]
+    assert task.write(numpy.zeros((1, 1))) == 1
+
+    with pytest.raises(RuntimeError):
+        task.add_channel(AnalogOutputVoltage, PhysicalChannelInput('Dev1/ai0'), -5., 5.)
+
+def test_digital_output_to_input():
+    device = Device('Dev1')
+    out = make_task('do')
+    out.add_channel(DigitalOutput, device.do[2])
+    assert out.write(numpy.array([0x3c], dtype=numpy.uint32)) == 1
+
+    task = make_task('di')
+    channel = task.add_channel(DigitalInput, device.di[2], name='pattern')
+    assert task.channels == [channel]
+    assert task.read_as('DigitalU32', n_per_channel=1, timeout=1.)[0, 0] == 0x3c
+
+    with pytest.raises(RuntimeError):
+        task.add_channel(DigitalInput, device.do[0])